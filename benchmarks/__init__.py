@@ -0,0 +1,7 @@
+"""
+Benchmarks for memo-ai-backend.
+
+Each script is runnable with ``python -m benchmarks.<name>`` from the
+project root and works against a throwaway test database, so it never
+touches real data. ``datagen`` generates the data some of them use.
+"""
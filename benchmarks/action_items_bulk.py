@@ -0,0 +1,80 @@
+"""
+Compare per-item action item requests with the bulk endpoints.
+
+    python -m benchmarks.action_items_bulk --items 50 --repeat 10
+
+Each round creates ``--items`` action items and then marks them completed,
+once with one request per item and once with a single ``bulk/`` request.
+Audit entries are written inline so their INSERTs count towards each
+round's queries.
+"""
+import argparse
+
+from .common import benchmark_database, emit, setup_django, summarize, timed
+
+BULK_URL = '/api/sessions/action-items/bulk/'
+ITEMS_URL = '/api/sessions/action-items/'
+
+
+def per_item(client, session, items):
+    ids = []
+    for i in range(items):
+        response = client.post(ITEMS_URL, {'session': session.pk, 'title': f'Item {i}'}, format='json')
+        ids.append(response.json()['id'])
+    for pk in ids:
+        client.patch(f'{ITEMS_URL}{pk}/', {'status': 'completed'}, format='json')
+
+
+def bulk(client, session, items):
+    response = client.post(
+        BULK_URL,
+        [{'session': session.pk, 'title': f'Item {i}'} for i in range(items)],
+        format='json',
+    )
+    client.patch(
+        BULK_URL,
+        [{'id': item['id'], 'status': 'completed'} for item in response.json()],
+        format='json',
+    )
+
+
+def measure(func, client, session, items, repeat):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    samples, queries = [], 0
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as captured:
+            samples.append(timed(func, client, session, items)[1])
+        queries = len(captured)
+    return {'latency_ms': summarize(samples), 'queries_per_round': queries}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+    from sessions.models import RecordingSession
+    from users.models import User
+
+    with benchmark_database(), override_settings(AUDIT_LOG_SYNC=True):
+        user = User.objects.create(username='bench', email='bench@example.com')
+        session = RecordingSession.objects.create(user=user, title='Bench session')
+        client = APIClient()
+        client.force_authenticate(user)
+
+        emit({
+            'items': args.items,
+            'per_item': measure(per_item, client, session, args.items, args.repeat),
+            'bulk': measure(bulk, client, session, args.items, args.repeat),
+        }, args.output)
+
+
+if __name__ == '__main__':
+    main()
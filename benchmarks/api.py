@@ -0,0 +1,229 @@
+"""
+Benchmark the main API endpoints at several concurrency levels.
+
+    python -m benchmarks.api --users 50 --concurrency 1 --concurrency 8 \\
+        --concurrency 32 --requests 2000 --output after.json
+    python -m benchmarks.api --compare before.json after.json
+
+Users and their data come from ``benchmarks.datagen`` in a throwaway test
+database. Every level sends the same seeded sequence of requests (an
+endpoint and a user per request) from ``--concurrency`` threads in this
+process. It reports throughput, p50/p95/p99 latency and database queries
+per request, overall and per endpoint.
+
+Supabase is never called. Tokens are signed with a benchmark HS256 secret,
+and the signing key store is stubbed to hold only that secret, so
+authentication takes its normal local path. Each user makes one warm-up
+request first, so timed requests hit the token cache as they would in
+production.
+
+``--compare`` diffs two reports. It exits with status 1 when an endpoint
+runs more queries per request, or when its p95 grows by more than
+``--tolerance``. To compare real WSGI and ASGI servers, use
+``benchmarks.loadtest`` instead.
+"""
+import argparse
+import contextlib
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from .common import benchmark_database, emit, ratio, setup_django, summarize
+from .loadtest import mint_token
+
+SECRET = 'benchmark-secret'
+ENDPOINTS = {
+    'me': '/api/users/me/',
+    'sessions-list': '/api/sessions/sessions/',
+    'session-detail': '/api/sessions/sessions/{session}/',
+    'action-items-list': '/api/sessions/action-items/',
+    'invoices-list': '/api/subscriptions/invoices/',
+    'usage-list': '/api/users/usage/',
+}
+
+
+@contextlib.contextmanager
+def local_auth():
+    """Verify benchmark tokens in-process instead of with Supabase."""
+    from django.test import override_settings
+    from users.jwks import SupabaseKeyStore
+    from users.token_cache import token_cache
+
+    store = SupabaseKeyStore(jwks_url='', secret=SECRET)
+    token_cache.clear()
+    with override_settings(SUPABASE_AUTH_MODE='local', SUPABASE_JWT_SECRET=SECRET), \
+            mock.patch('users.authentication.get_key_store', return_value=store):
+        yield
+    token_cache.clear()
+
+
+def targets(users):
+    """Token and URL parameters for each generated user."""
+    from sessions.models import RecordingSession
+
+    latest = {}
+    for user_id, session_id in RecordingSession.objects.order_by('user_id', 'pk').values_list('user_id', 'pk'):
+        latest[user_id] = session_id
+    return [
+        {'token': mint_token(SECRET, str(user.supabase_id), email=user.email), 'session': latest.get(user.pk)}
+        for user in users
+    ]
+
+
+def plan(users, requests, seed):
+    """The same list of ``(endpoint, path, token)`` for every run with ``seed``."""
+    rng = random.Random(seed)
+    with_sessions = [user for user in users if user['session'] is not None]
+    planned = []
+    for _ in range(requests):
+        name = rng.choice(list(ENDPOINTS))
+        user = rng.choice(with_sessions if '{session}' in ENDPOINTS[name] else users)
+        planned.append((name, ENDPOINTS[name].format(session=user['session']), user['token']))
+    return planned
+
+
+def send(client, path, token):
+    """Return ``(status, latency_ms, queries)`` for one GET."""
+    start = time.perf_counter()
+    response = client.get(path, HTTP_AUTHORIZATION=f'Bearer {token}')
+    elapsed = (time.perf_counter() - start) * 1000
+    return response.status_code, elapsed, response.wsgi_request.query_metrics.db_queries
+
+
+def run_level(planned, concurrency):
+    from django.db import connections
+    from django.test import Client
+
+    samples = []
+    lock = threading.Lock()
+
+    def worker(share):
+        client = Client()
+        results = [(name, *send(client, path, token)) for name, path, token in share]
+        connections.close_all()
+        with lock:
+            samples.extend(results)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, [planned[n::concurrency] for n in range(concurrency)]))
+    elapsed = time.perf_counter() - started
+
+    report = {
+        'concurrency': concurrency,
+        'requests_per_second': round(len(samples) / elapsed, 1),
+        **measure(samples),
+        'endpoints': {},
+    }
+    for name in ENDPOINTS:
+        report['endpoints'][name] = measure([sample for sample in samples if sample[0] == name])
+    return report
+
+
+def measure(samples):
+    queries = [sample[3] for sample in samples]
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for sample in samples if sample[1] >= 400),
+        'latency_ms': summarize([sample[2] for sample in samples]),
+        'queries_per_request': round(statistics.fmean(queries), 2) if queries else None,
+        'max_queries': max(queries, default=None),
+    }
+
+
+def row_counts():
+    from sessions.models import ActionItem, Comment, RecordingSession
+    from subscriptions.models import BillingLog, Invoice
+    from users.models import Usage, User
+
+    models = [User, RecordingSession, ActionItem, Comment, Usage, Invoice, BillingLog]
+    return {model._meta.db_table: model.objects.count() for model in models}
+
+
+def benchmark(args):
+    from django.test import Client, override_settings
+    from .datagen import generate
+
+    with benchmark_database(), local_auth(), \
+            override_settings(REQUEST_METRICS_LOG=False, QUERY_INSPECTION=False):
+        users = targets(generate(args.users, seed=args.seed))
+        client = Client()
+        for user in users:
+            send(client, ENDPOINTS['me'], user['token'])
+        planned = plan(users, args.requests, args.seed)
+        return {
+            'users': args.users,
+            'seed': args.seed,
+            'rows': row_counts(),
+            'levels': {str(level): run_level(planned, level) for level in args.concurrency},
+        }
+
+
+def compare(before, after, tolerance):
+    """Ratios (after / before) of throughput and latency, and query deltas."""
+    report, regressions = {}, []
+
+    def diff(old, new, label):
+        queries = None
+        if old.get('queries_per_request') is not None and new.get('queries_per_request') is not None:
+            queries = round(new['queries_per_request'] - old['queries_per_request'], 2)
+        result = {
+            p: ratio(new['latency_ms'].get(p, 0), old['latency_ms'].get(p, 0)) for p in ('p50', 'p95', 'p99')
+        }
+        result['queries_per_request'] = queries
+        if queries and queries > 0:
+            regressions.append(f'{label}: {queries:+} queries per request')
+        if result['p95'] and result['p95'] > 1 + tolerance:
+            regressions.append(f"{label}: p95 x{result['p95']}")
+        return result
+
+    for level, new in after['levels'].items():
+        old = before['levels'].get(level)
+        if old is None:
+            continue
+        report[level] = {
+            'requests_per_second': ratio(new['requests_per_second'], old['requests_per_second']),
+            **diff(old, new, f'concurrency {level}'),
+            'endpoints': {
+                name: diff(old['endpoints'][name], endpoint, f'concurrency {level} {name}')
+                for name, endpoint in new['endpoints'].items()
+                if name in old['endpoints'] and endpoint['requests'] and old['endpoints'][name]['requests']
+            },
+        }
+    return {'levels': report, 'regressions': regressions}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per concurrency level.')
+    parser.add_argument('--concurrency', type=int, action='append',
+                        help='Concurrent clients (repeatable; default 1, 8 and 32).')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'),
+                        help='Diff two reports instead of running.')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='p95 growth allowed by --compare before it counts as a regression.')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    if args.compare:
+        before, after = (json.loads(open(path).read()) for path in args.compare)
+        report = compare(before, after, args.tolerance)
+        emit(report, args.output)
+        if report['regressions']:
+            sys.exit(1)
+        return
+
+    args.concurrency = args.concurrency or [1, 8, 32]
+    setup_django()
+    emit(benchmark(args), args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Shared setup and reporting helpers for the benchmark scripts.
+"""
+import contextlib
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django():
+    """Configure Django the same way manage.py does."""
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'memo_ai_backend.settings')
+    import django
+    django.setup()
+
+
+@contextlib.contextmanager
+def benchmark_database(keepdb=False):
+    """Run the block against a freshly created test database."""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+        teardown_test_environment()
+
+
+def timed(func, *args, **kwargs):
+    """Call ``func`` and return ``(result, elapsed_ms)``."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def summarize(samples):
+    """Latency summary in milliseconds for a list of samples."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+
+    def pct(p):
+        return round(ordered[min(int(len(ordered) * p), len(ordered) - 1)], 3)
+
+    return {
+        'count': len(ordered),
+        'mean': round(statistics.fmean(ordered), 3),
+        'p50': pct(0.50),
+        'p95': pct(0.95),
+        'p99': pct(0.99),
+        'max': round(ordered[-1], 3),
+    }
+
+
+def ratio(new, old):
+    """``new / old`` rounded, or ``None`` when there is no baseline."""
+    return round(new / old, 3) if old else None
+
+
+def emit(report, output=None):
+    """Print ``report`` as JSON and optionally write it to ``output``."""
+    text = json.dumps(report, indent=2, default=str)
+    print(text)
+    if output:
+        Path(output).write_text(text + '\n')
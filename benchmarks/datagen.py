@@ -0,0 +1,141 @@
+"""
+Generate realistic benchmark data with bulk inserts.
+
+    from benchmarks.datagen import generate
+    users = generate(users=100, seed=1)
+
+Activity is skewed the way real accounts are: most users have a handful
+of sessions and a few have hundreds (log-normal), most sessions are
+completed, and only paying users have invoices and billing logs. The
+same ``seed`` always produces the same data.
+"""
+import datetime
+import io
+import random
+import uuid
+from decimal import Decimal
+
+from django.core.management import call_command
+
+SESSION_STATUSES = {'completed': 80, 'pending': 8, 'recording': 3, 'processing': 4, 'failed': 5}
+ITEM_PRIORITIES = {'low': 30, 'medium': 50, 'high': 20}
+ITEM_STATUSES = {'pending': 45, 'in_progress': 15, 'completed': 35, 'cancelled': 5}
+PLANS = {'free': 60, 'basic': 20, 'pro': 15, 'enterprise': 5}
+PLAN_PRICES = {'basic': Decimal('9.00'), 'pro': Decimal('29.00'), 'enterprise': Decimal('99.00')}
+WORDS = ('budget review roadmap hiring launch customer pricing onboarding retro '
+         'incident migration design quarterly planning security sync').split()
+
+
+def choice(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def generate(users, seed=0, days=90, max_sessions=500, batch_size=1000):
+    """
+    Create ``users`` users and their sessions, action items, comments,
+    usage days, subscriptions, invoices and billing logs.
+
+    Returns the created users. Their ``supabase_id`` is set so tokens can
+    be minted for them.
+    """
+    from sessions.models import ActionItem, Comment, RecordingSession
+    from subscriptions.models import BillingLog, Invoice, Subscription
+    from users.models import Profile, Usage, User
+
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    User.objects.bulk_create([
+        User(username=f'bench-{seed}-{n}', email=f'bench-{seed}-{n}@example.com',
+             supabase_id=uuid.UUID(int=rng.getrandbits(128)), is_verified=True)
+        for n in range(users)
+    ], batch_size=batch_size)
+    # bulk_create only sets primary keys on some backends, so read them back
+    created = list(User.objects.filter(username__startswith=f'bench-{seed}-').order_by('pk'))
+    Profile.objects.bulk_create([
+        Profile(user=user, first_name=f'Bench {n}', company=rng.choice(WORDS).title())
+        for n, user in enumerate(created)
+    ], batch_size=batch_size)
+
+    sessions = []
+    for user in created:
+        # Median around 12 sessions with a long tail of heavy users
+        for _ in range(min(int(rng.lognormvariate(2.5, 1.0)), max_sessions)):
+            status = choice(rng, SESSION_STATUSES)
+            duration = round(rng.lognormvariate(7.0, 0.7), 1) if status == 'completed' else 0.0
+            sessions.append(RecordingSession(
+                user=user,
+                title=sentence(rng, 3),
+                description=sentence(rng, rng.randint(0, 12)),
+                transcript=sentence(rng, int(duration / 2)) if duration else '',
+                duration=duration,
+                status=status,
+                started_at=now - datetime.timedelta(days=rng.randint(0, days)),
+            ))
+    RecordingSession.objects.bulk_create(sessions, batch_size=batch_size)
+    sessions = RecordingSession.objects.filter(user__in=created).order_by('pk').only('pk', 'user_id', 'status')
+
+    items, comments = [], []
+    for session in sessions:
+        for _ in range(rng.choice((0, 1, 2, 3, 3, 4, 6)) if session.status == 'completed' else 0):
+            status = choice(rng, ITEM_STATUSES)
+            items.append(ActionItem(
+                session=session,
+                user_id=session.user_id,
+                title=sentence(rng, 4),
+                priority=choice(rng, ITEM_PRIORITIES),
+                status=status,
+                completed_at=now if status == 'completed' else None,
+            ))
+        for _ in range(rng.choice((0, 0, 1, 2, 4))):
+            comments.append(Comment(session=session, user_id=session.user_id, content=sentence(rng, 8)))
+    ActionItem.objects.bulk_create(items, batch_size=batch_size)
+    Comment.objects.bulk_create(comments, batch_size=batch_size)
+
+    usage = []
+    for user in created:
+        active = rng.random()
+        for offset in range(days):
+            if rng.random() < active:
+                recordings = rng.randint(1, 4)
+                usage.append(Usage(
+                    user=user,
+                    date=today - datetime.timedelta(days=offset),
+                    recordings_count=recordings,
+                    minutes_recorded=round(recordings * rng.lognormvariate(2.5, 0.6), 2),
+                    transcriptions_count=recordings,
+                ))
+    Usage.objects.bulk_create(usage, batch_size=batch_size)
+
+    Subscription.objects.bulk_create([
+        Subscription(user=user, plan=choice(rng, PLANS), status='active') for user in created
+    ], batch_size=batch_size)
+    subscriptions = Subscription.objects.filter(user__in=created).order_by('pk')
+
+    invoices, logs = [], []
+    for subscription in subscriptions:
+        if subscription.plan == 'free':
+            continue
+        for month in range(rng.randint(1, 24)):
+            paid = month > 0 or rng.random() < 0.9
+            invoices.append(Invoice(
+                subscription=subscription,
+                user_id=subscription.user_id,
+                amount=PLAN_PRICES[subscription.plan],
+                status='paid' if paid else 'open',
+                paid_at=now - datetime.timedelta(days=30 * month) if paid else None,
+            ))
+            logs.append(BillingLog(user_id=subscription.user_id, event_type='invoice_created'))
+            if paid:
+                logs.append(BillingLog(user_id=subscription.user_id, event_type='invoice_paid'))
+    Invoice.objects.bulk_create(invoices, batch_size=batch_size)
+    BillingLog.objects.bulk_create(logs, batch_size=batch_size)
+
+    # Keep the monthly rollup in step, as the usage meter would have
+    call_command('rebuild_usage_rollups', user=[user.pk for user in created], stdout=io.StringIO())
+    return created
@@ -0,0 +1,165 @@
+"""
+Load-test the WSGI and ASGI serving paths against each other.
+
+    python -m benchmarks.loadtest --server wsgi --server asgi --workers 4 \
+        --concurrency 64 --duration 20 --output loadtest.json
+
+Each ``--server`` is started in turn on the configured database (gunicorn
+for ``wsgi``; uvicorn with ``ASYNC_VIEWS=True`` for ``asgi``) and driven
+by ``--concurrency`` concurrent clients over the hot read endpoints for
+``--duration`` seconds. Use ``--url`` to target an already running server
+instead. Tokens are minted locally with ``SUPABASE_JWT_SECRET``, so run it
+with ``SUPABASE_AUTH_MODE=local``; remote mode would load-test Supabase.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+
+from .common import BASE_DIR, emit, ratio, summarize
+
+SERVERS = {
+    'wsgi': ['gunicorn', 'memo_ai_backend.wsgi:application',
+             '--bind', '127.0.0.1:{port}', '--workers', '{workers}'],
+    'asgi': ['uvicorn', 'memo_ai_backend.asgi:application',
+             '--host', '127.0.0.1', '--port', '{port}', '--workers', '{workers}', '--no-access-log'],
+}
+PATHS = ['/api/users/me/', '/api/sessions/sessions/', '/api/subscriptions/subscriptions/']
+
+
+def mint_token(secret, subject, lifetime=3600, email=None):
+    import jwt
+
+    return jwt.encode({
+        'sub': subject,
+        'email': email or f'loadtest-{subject[:8]}@example.com',
+        'aud': os.getenv('SUPABASE_JWT_AUDIENCE', 'authenticated'),
+        'exp': int(time.time()) + lifetime,
+    }, secret, algorithm='HS256')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Server did not start listening on port {port}')
+
+
+async def prepare(client, headers, seed):
+    """Create the load-test user (via /me) and ``seed`` sessions once."""
+    response = await client.get('/api/users/me/', headers=headers)
+    response.raise_for_status()
+    listing = await client.get('/api/sessions/sessions/', headers=headers)
+    if not listing.json()['results']:
+        for i in range(seed):
+            await client.post('/api/sessions/sessions/', json={'title': f'Load test {i}'}, headers=headers)
+    detail = (await client.get('/api/sessions/sessions/', headers=headers)).json()['results']
+    return PATHS + ([f"/api/sessions/sessions/{detail[0]['id']}/"] if detail else [])
+
+
+async def drive(url, token, concurrency, duration, seed):
+    import httpx
+
+    headers = {'Authorization': f'Bearer {token}'}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        paths = await prepare(client, headers, seed)
+        latencies, errors = [], 0
+        deadline = time.monotonic() + duration
+
+        async def worker(offset):
+            nonlocal errors
+            i = offset
+            while time.monotonic() < deadline:
+                path = paths[i % len(paths)]
+                i += 1
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path, headers=headers)
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append((time.perf_counter() - start) * 1000)
+                errors += not ok
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.monotonic() - started
+
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'latency_ms': summarize(latencies),
+        'paths': paths,
+    }
+
+
+def run_server(kind, args, token):
+    port = free_port()
+    command = [part.format(port=port, workers=args.workers) for part in SERVERS[kind]]
+    env = dict(os.environ, ASYNC_VIEWS='True' if kind == 'asgi' else 'False', DEBUG='False')
+    process = subprocess.Popen(command, cwd=BASE_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+    try:
+        wait_for_port(port)
+        return asyncio.run(drive(f'http://127.0.0.1:{port}', token, args.concurrency, args.duration, args.seed))
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def compare(wsgi, asgi):
+    """ASGI relative to WSGI: >1 is more throughput and a longer tail."""
+    return {
+        'requests_per_second': ratio(asgi['requests_per_second'], wsgi['requests_per_second']),
+        'p99': ratio(asgi['latency_ms'].get('p99', 0), wsgi['latency_ms'].get('p99', 0)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--server', action='append', choices=list(SERVERS),
+                        help='Start and test this server (repeatable).')
+    parser.add_argument('--url', help='Test an already running server instead.')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--seed', type=int, default=50, help='Sessions to create for the test user.')
+    parser.add_argument('--subject', default=str(uuid.uuid4()), help='Supabase user id for the token.')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    secret = os.getenv('SUPABASE_JWT_SECRET')
+    if not secret:
+        sys.exit('SUPABASE_JWT_SECRET must be set to mint load-test tokens')
+    token = mint_token(secret, args.subject)
+
+    report = {'concurrency': args.concurrency, 'duration': args.duration, 'workers': args.workers}
+    if args.url:
+        report['results'] = {args.url: asyncio.run(
+            drive(args.url, token, args.concurrency, args.duration, args.seed)
+        )}
+    else:
+        report['results'] = {kind: run_server(kind, args, token) for kind in args.server or list(SERVERS)}
+        if 'wsgi' in report['results'] and 'asgi' in report['results']:
+            report['asgi_vs_wsgi'] = compare(report['results']['wsgi'], report['results']['asgi'])
+    emit(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
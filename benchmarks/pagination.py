@@ -0,0 +1,85 @@
+"""
+Compare page-number and cursor pagination latency at increasing depth.
+
+    python -m benchmarks.pagination --rows 20000 --depths 1,10,100,500
+
+With OFFSET pagination the time per page grows with the page number;
+with keyset (cursor) pagination it should stay flat.
+"""
+import argparse
+from unittest import mock
+
+from .common import benchmark_database, emit, setup_django, summarize, timed
+
+
+def seed(user, rows):
+    from sessions.models import RecordingSession
+
+    RecordingSession.objects.bulk_create(
+        [RecordingSession(user=user, title=f'Session {i}') for i in range(rows)],
+        batch_size=1000,
+    )
+
+
+def measure_cursor(client, depths, repeat):
+    """Walk the cursor chain once, then re-time the pages at each depth."""
+    urls = {}
+    url = '/api/sessions/sessions/'
+    page = 1
+    while url and page <= max(depths):
+        if page in depths:
+            urls[page] = url
+        url = client.get(url).json()['next']
+        page += 1
+    return {
+        page: summarize([timed(client.get, url)[1] for _ in range(repeat)])
+        for page, url in urls.items()
+    }
+
+
+def measure_page_number(client, depths, repeat):
+    from rest_framework.pagination import PageNumberPagination
+    from sessions.views import RecordingSessionViewSet
+
+    with mock.patch.object(RecordingSessionViewSet, 'pagination_class', PageNumberPagination):
+        return {
+            page: summarize([
+                timed(client.get, f'/api/sessions/sessions/?page={page}')[1]
+                for _ in range(repeat)
+            ])
+            for page in depths
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--depths', default='1,10,100,500,1000')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from rest_framework.test import APIClient
+    from users.models import User
+
+    depths = sorted({int(d) for d in args.depths.split(',')})
+    depths = [d for d in depths if d * settings.REST_FRAMEWORK['PAGE_SIZE'] <= args.rows]
+
+    with benchmark_database():
+        user = User.objects.create(username='bench', email='bench@example.com')
+        seed(user, args.rows)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        emit({
+            'rows': args.rows,
+            'page_size': settings.REST_FRAMEWORK['PAGE_SIZE'],
+            'cursor': measure_cursor(client, depths, args.repeat),
+            'page_number': measure_page_number(client, depths, args.repeat),
+        }, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Check every budgeted read endpoint against its ``query_budget``.
+
+    python -m benchmarks.query_budgets --rows 50
+
+Seeds ``--rows`` sessions (each with action items and comments),
+invoices and usage days, requests each endpoint with query inspection on,
+and reports the queries its view ran against the budget, plus any query
+shape repeated ``N_PLUS_ONE_THRESHOLD`` times. Exits with status 1 when
+an endpoint is over budget or shows an N+1, so CI can run it before a
+deploy.
+"""
+import argparse
+import datetime
+import sys
+
+from .common import benchmark_database, emit, setup_django
+
+
+def seed(user, rows):
+    from sessions.models import ActionItem, Comment, RecordingSession
+    from subscriptions.models import BillingLog, Invoice, Subscription
+    from users.models import Profile, Usage
+
+    sessions = RecordingSession.objects.bulk_create(
+        [RecordingSession(user=user, title=f'Session {i}', transcript='budget review') for i in range(rows)]
+    )
+    ActionItem.objects.bulk_create([
+        ActionItem(session=session, user=user, title=f'Follow up {j}')
+        for session in sessions for j in range(3)
+    ])
+    Comment.objects.bulk_create([
+        Comment(session=session, user=user, content='Noted') for session in sessions for _ in range(2)
+    ])
+    subscription = Subscription.objects.create(user=user, plan='pro', status='active')
+    Invoice.objects.bulk_create([Invoice(subscription=subscription, user=user, amount=10) for _ in range(rows)])
+    BillingLog.objects.bulk_create([
+        BillingLog(user=user, event_type='invoice_paid')
+        for _ in range(rows)
+    ])
+    Usage.objects.bulk_create([
+        Usage(user=user, date=datetime.date(2026, 1, 1) + datetime.timedelta(days=i), minutes_recorded=5)
+        for i in range(rows)
+    ])
+    profile = Profile.objects.create(user=user, first_name='Bench')
+    return {
+        'session': sessions[0].pk,
+        'action_item': ActionItem.objects.values_list('pk', flat=True).first(),
+        'subscription': subscription.pk,
+        'invoice': Invoice.objects.values_list('pk', flat=True).first(),
+        'log': BillingLog.objects.values_list('pk', flat=True).first(),
+        'usage': Usage.objects.values_list('pk', flat=True).first(),
+        'profile': profile.pk,
+    }
+
+
+def endpoints(ids):
+    return [
+        '/api/users/me/',
+        '/api/users/dashboard/',
+        '/api/users/dashboard/',
+        '/api/users/profiles/',
+        f"/api/users/profiles/{ids['profile']}/",
+        '/api/users/usage/',
+        f"/api/users/usage/{ids['usage']}/",
+        '/api/users/usage/summary/?from=2026-01-01&to=2026-12-31&bucket=week',
+        '/api/sessions/sessions/',
+        f"/api/sessions/sessions/{ids['session']}/",
+        f"/api/sessions/sessions/{ids['session']}/transcript/",
+        '/api/sessions/action-items/',
+        f"/api/sessions/action-items/{ids['action_item']}/",
+        '/api/sessions/search/?q=budget',
+        '/api/sessions/sync/',
+        '/api/subscriptions/subscriptions/',
+        f"/api/subscriptions/subscriptions/{ids['subscription']}/",
+        '/api/subscriptions/invoices/',
+        f"/api/subscriptions/invoices/{ids['invoice']}/",
+        '/api/subscriptions/logs/',
+        f"/api/subscriptions/logs/{ids['log']}/",
+    ]
+
+
+def check(client, url):
+    from django.conf import settings
+    from memo_ai_backend.instrumentation import query_budget
+
+    response = client.get(url)
+    metrics = response.wsgi_request.query_metrics
+    budget = query_budget(response.wsgi_request)
+    repeated = {shape: count for shape, count in metrics.shapes.items()
+                if count >= settings.N_PLUS_ONE_THRESHOLD}
+    return {
+        'url': url,
+        'status': response.status_code,
+        'queries': metrics.view_queries,
+        'budget': budget,
+        'ok': (budget is None or metrics.view_queries <= budget) and not repeated,
+        'repeated_shapes': repeated,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+    from users.models import User
+
+    with benchmark_database(), override_settings(QUERY_INSPECTION=True, QUERY_BUDGET_STRICT=False,
+                                                 AUDIT_LOG_SYNC=True):
+        user = User.objects.create(username='bench', email='bench@example.com')
+        ids = seed(user, args.rows)
+        client = APIClient()
+        client.force_authenticate(user)
+        results = [check(client, url) for url in endpoints(ids)]
+
+    failures = [result for result in results if not result['ok']]
+    emit({'rows': args.rows, 'failures': len(failures), 'results': results}, args.output)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['task', 'queue', 'status', 'attempts', 'run_at', 'created_at']
+    list_filter = ['status', 'queue', 'task']
+    search_fields = ['task', 'last_error']
+    readonly_fields = ['created_at', 'updated_at']
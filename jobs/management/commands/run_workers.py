@@ -0,0 +1,69 @@
+"""
+Run background job workers.
+"""
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs.worker import Worker
+from users import metering
+
+
+class Command(BaseCommand):
+    help = 'Process queued background jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queue', action='append', dest='queues',
+                            help='Queue to consume (repeatable, default: default).')
+        parser.add_argument('--processes', type=int, default=1,
+                            help='Worker processes to start.')
+        parser.add_argument('--threads', type=int, default=1,
+                            help='Job threads per process.')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to sleep when every queue is empty.')
+
+    def handle(self, *args, **options):
+        worker_options = {
+            'queues': options['queues'] or ['default'],
+            'threads': options['threads'],
+            'poll_interval': options['poll_interval'],
+        }
+        self.stdout.write(
+            f"Starting {options['processes']} process(es) x {options['threads']} thread(s) "
+            f"on {', '.join(worker_options['queues'])}"
+        )
+
+        if options['processes'] <= 1:
+            _run_worker(worker_options)
+            return
+
+        # Children must open their own database connections
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        processes = [
+            context.Process(target=_run_worker, args=(worker_options,))
+            for _ in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+
+        def forward(signum, frame):
+            for process in processes:
+                process.terminate()
+
+        signal.signal(signal.SIGINT, forward)
+        signal.signal(signal.SIGTERM, forward)
+        for process in processes:
+            process.join()
+
+
+def _run_worker(worker_options):
+    worker = Worker(**worker_options)
+    # Finish the current job, then exit
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+    # Forked children exit without running atexit hooks
+    metering.flush()
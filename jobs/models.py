@@ -0,0 +1,43 @@
+"""
+Database-backed job queue.
+"""
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """A unit of background work claimed by `manage.py run_workers`."""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    queue = models.CharField(max_length=50, default='default')
+    task = models.CharField(max_length=200)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'jobs'
+        ordering = ['run_at', 'id']
+        indexes = [
+            models.Index(
+                fields=['queue', 'run_at'],
+                name='job_pending_idx',
+                condition=Q(status__in=['queued', 'running']),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.id} ({self.status})"
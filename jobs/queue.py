@@ -0,0 +1,203 @@
+"""
+Enqueueing, claiming and settling jobs.
+
+Workers claim jobs with ``SELECT ... FOR UPDATE SKIP LOCKED`` so any
+number of them can poll the same table without blocking each other. A
+claimed job is leased until ``locked_until`` and the lease is renewed
+while the job runs; if the worker dies the lease expires and another
+worker picks the job up again (the visibility timeout).
+"""
+import contextlib
+import logging
+import random
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+class Task:
+    """A registered background task; call ``enqueue()`` to schedule it."""
+    def __init__(self, name, func, queue='default', max_attempts=None,
+                 timeout=None, on_failure=None):
+        self.name = name
+        self.func = func
+        self.queue = queue
+        self.max_attempts = max_attempts or settings.JOBS_MAX_ATTEMPTS
+        self.timeout = timeout or settings.JOBS_VISIBILITY_TIMEOUT
+        self.on_failure = on_failure
+
+    def __call__(self, **payload):
+        return self.func(**payload)
+
+    def enqueue(self, delay=0, **payload):
+        """
+        Insert a job row for this task.
+
+        Called inside a transaction, the job only becomes visible to
+        workers if that transaction commits.
+        """
+        return Job.objects.create(
+            queue=self.queue,
+            task=self.name,
+            payload=payload,
+            max_attempts=self.max_attempts,
+            run_at=timezone.now() + timedelta(seconds=delay),
+        )
+
+
+def task(name, **options):
+    """Decorator registering a function as a background task."""
+    def decorator(func):
+        registered = Task(name, func, **options)
+        _registry[name] = registered
+        return registered
+    return decorator
+
+
+def get_task(name):
+    return _registry[name]
+
+
+def claim(queue, worker_id):
+    """Lease the next runnable job on ``queue``, or return ``None``."""
+    while True:
+        now = timezone.now()
+        with transaction.atomic():
+            job = (
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(queue=queue, run_at__lte=now)
+                .filter(Q(status='queued') | Q(status='running', locked_until__lt=now))
+                .order_by('run_at', 'id')
+                .first()
+            )
+            if job is None:
+                return None
+
+            if job.attempts >= job.max_attempts:
+                # Its last lease expired without the worker reporting back
+                job.status = 'failed'
+                job.last_error = job.last_error or 'Visibility timeout expired'
+                job.save(update_fields=['status', 'last_error', 'updated_at'])
+                _notify_failure(job)
+                continue
+
+            job.status = 'running'
+            job.attempts += 1
+            job.locked_by = worker_id
+            job.locked_until = now + timedelta(seconds=lease_timeout(job))
+            job.save(update_fields=['status', 'attempts', 'locked_by', 'locked_until', 'updated_at'])
+            return job
+
+
+def leased(job):
+    """
+    ``job``'s row, as long as it is still under the lease ``job`` holds.
+
+    Once the lease expires and another worker claims the job, ``locked_by``
+    or ``attempts`` changes and writes from the old lease match nothing.
+    """
+    return Job.objects.filter(pk=job.pk, locked_by=job.locked_by, attempts=job.attempts)
+
+
+def lease_timeout(job):
+    registered = _registry.get(job.task)
+    return registered.timeout if registered else settings.JOBS_VISIBILITY_TIMEOUT
+
+
+@contextlib.contextmanager
+def lease_renewed(job):
+    """
+    Keep extending ``job``'s lease while the block runs.
+
+    The lease is renewed every third of the task's timeout, so a job that
+    runs longer than the timeout is not handed to a second worker while
+    the first is still working on it.
+    """
+    timeout = lease_timeout(job)
+    done = threading.Event()
+
+    def renew():
+        try:
+            while not done.wait(timeout / 3):
+                leased(job).filter(status='running').update(
+                    locked_until=timezone.now() + timedelta(seconds=timeout),
+                )
+        except Exception:
+            logger.exception('Failed to renew the lease of job %s', job.pk)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=renew, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+
+
+def run(job):
+    """Execute a claimed job and record the outcome."""
+    try:
+        with lease_renewed(job):
+            get_task(job.task)(**job.payload)
+    except Exception:
+        fail(job, traceback.format_exc())
+        return False
+    leased(job).update(
+        status='succeeded',
+        locked_until=None,
+        last_error='',
+        updated_at=timezone.now(),
+    )
+    return True
+
+
+def fail(job, error):
+    """
+    Schedule a retry with exponential backoff, or give up.
+
+    Does nothing once another worker has claimed the job, so a worker whose
+    lease expired cannot requeue or fail a job that is running elsewhere.
+    """
+    if job.attempts >= job.max_attempts or job.task not in _registry:
+        changes = {'status': 'failed'}
+    else:
+        delay = min(
+            settings.JOBS_RETRY_BACKOFF_BASE * 2 ** (job.attempts - 1),
+            settings.JOBS_RETRY_BACKOFF_MAX,
+        )
+        changes = {
+            'status': 'queued',
+            'run_at': timezone.now() + timedelta(seconds=delay * random.uniform(0.8, 1.2)),
+        }
+    changes.update(last_error=error, locked_until=None, updated_at=timezone.now())
+    if not leased(job).update(**changes):
+        logger.warning('Job %s was claimed again before its failure was recorded', job.pk)
+        return
+    for field, value in changes.items():
+        setattr(job, field, value)
+    if job.status == 'failed':
+        _notify_failure(job)
+
+
+def _notify_failure(job):
+    registered = _registry.get(job.task)
+    if registered and registered.on_failure:
+        try:
+            # A savepoint, so a failing hook cannot roll back the caller's claim
+            with transaction.atomic():
+                registered.on_failure(**job.payload)
+        except Exception:
+            logger.exception('on_failure hook of job %s (%s) failed', job.pk, job.task)
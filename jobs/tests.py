@@ -0,0 +1,102 @@
+import time
+from datetime import timedelta
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from sessions.tasks import process_recording
+
+from . import queue as job_queue
+from .models import Job
+from .worker import Worker
+
+
+def raise_error(**payload):
+    raise RuntimeError('hook failed')
+
+
+failing = job_queue.task('jobs.tests.failing', max_attempts=1, on_failure=raise_error)(raise_error)
+
+
+@job_queue.task('jobs.tests.retried', max_attempts=2)
+def retried():
+    pass
+
+
+# What another worker's claim() returned while a slow job was running
+claimed_meanwhile = []
+
+
+@job_queue.task('jobs.tests.slow', timeout=0.3)
+def slow(seconds):
+    time.sleep(seconds)
+    claimed_meanwhile.append(job_queue.claim('default', 'other-worker'))
+
+
+@override_settings(JOBS_RETRY_BACKOFF_BASE=0)
+class FailureHookTests(TestCase):
+    def setUp(self):
+        self.worker = Worker(['default'])
+
+    def test_deleted_session_fails_its_job_without_stopping_the_worker(self):
+        job = process_recording.enqueue(session_id=999999)
+        for _ in range(job.max_attempts):
+            self.assertTrue(self.worker.run_once('test-worker'))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('DoesNotExist', job.last_error)
+
+    def test_raising_hook_is_logged(self):
+        job = failing.enqueue()
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            self.assertTrue(self.worker.run_once('test-worker'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+
+    def test_raising_hook_does_not_roll_back_a_claim(self):
+        # Its last lease expired without the worker reporting back
+        expired = failing.enqueue()
+        Job.objects.filter(pk=expired.pk).update(
+            status='running', attempts=1, locked_until=timezone.now() - timedelta(seconds=1),
+        )
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            self.assertIsNone(job_queue.claim('default', 'test-worker'))
+        expired.refresh_from_db()
+        self.assertEqual(expired.status, 'failed')
+
+
+class StaleLeaseTests(TestCase):
+    def test_failure_after_another_worker_claimed_the_job_is_ignored(self):
+        retried.enqueue()
+        stale = job_queue.claim('default', 'worker-a')
+        Job.objects.filter(pk=stale.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        current = job_queue.claim('default', 'worker-b')
+        self.assertEqual(current.pk, stale.pk)
+
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            job_queue.fail(stale, 'worker-a gave up')
+
+        job = Job.objects.get(pk=stale.pk)
+        self.assertEqual((job.status, job.locked_by, job.attempts), ('running', 'worker-b', 2))
+        self.assertEqual(job.last_error, '')
+
+    def test_failure_under_the_current_lease_requeues(self):
+        retried.enqueue()
+        job = job_queue.claim('default', 'worker-a')
+        job_queue.fail(job, 'boom')
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.last_error, job.locked_until), ('queued', 'boom', None))
+
+
+class LeaseRenewalTests(TransactionTestCase):
+    def test_running_job_is_not_claimed_after_its_timeout(self):
+        slow.enqueue(seconds=1)
+        job = job_queue.claim('default', 'test-worker')
+        claimed_meanwhile.clear()
+
+        self.assertTrue(job_queue.run(job))
+        # The job outlived its 0.3s lease several times over
+        self.assertEqual(claimed_meanwhile, [None])
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'succeeded')
@@ -0,0 +1,67 @@
+"""
+Worker loop used by `manage.py run_workers`.
+"""
+import logging
+import os
+import socket
+import threading
+
+from django.db import close_old_connections, connection
+
+from . import queue as job_queue
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """Runs jobs from ``queues`` on ``threads`` threads until stopped."""
+    def __init__(self, queues, threads=1, poll_interval=1.0):
+        self.queues = queues
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.stopping = threading.Event()
+
+    def worker_id(self, index):
+        return f'{socket.gethostname()}:{os.getpid()}:{index}'
+
+    def run(self):
+        threads = [
+            threading.Thread(target=self._loop, args=(self.worker_id(i),), daemon=True)
+            for i in range(self.threads)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def stop(self, *args):
+        self.stopping.set()
+
+    def _loop(self, worker_id):
+        try:
+            while not self.stopping.is_set():
+                if not self.run_once(worker_id):
+                    self.stopping.wait(self.poll_interval)
+        finally:
+            connection.close()
+
+    def run_once(self, worker_id):
+        """Claim and run one job from the first non-empty queue."""
+        close_old_connections()
+        for name in self.queues:
+            try:
+                job = job_queue.claim(name, worker_id)
+            except Exception:
+                logger.exception('Failed to claim a job from %s', name)
+                return False
+            if job is not None:
+                try:
+                    ok = job_queue.run(job)
+                except Exception:
+                    # Its lease expires and another attempt is made
+                    logger.exception('Failed to run job %s (%s)', job.pk, job.task)
+                    ok = False
+                logger.info('Job %s %s (%s, attempt %s)',
+                            job.pk, 'succeeded' if ok else 'failed', job.task, job.attempts)
+                return True
+        return False
@@ -0,0 +1,56 @@
+"""
+Async entry points for the hot read endpoints (``ASYNC_VIEWS = True``).
+
+    path('me/', async_view(CurrentUserView), name='current-user')
+
+The wrapper awaits ``SupabaseJWTAuthentication.aauthenticate`` on the
+event loop, where in remote mode the Supabase call is a non-blocking
+request, and then runs the unchanged DRF view in a worker thread with
+that result. Status codes, pagination, conditional GETs and payloads are
+therefore identical to the WSGI path. Django 4.2's async ORM can neither
+prefetch nor drive DRF pagination, so the queries themselves stay
+synchronous.
+"""
+from asgiref.sync import sync_to_async
+from rest_framework import authentication, exceptions
+
+from users.authentication import SupabaseJWTAuthentication
+
+
+class PreAuthenticated(authentication.BaseAuthentication):
+    """Hands DRF the outcome of the authentication the async wrapper awaited."""
+    def authenticate(self, request):
+        result = getattr(request._request, 'async_auth_result', None)
+        if isinstance(result, exceptions.AuthenticationFailed):
+            raise result
+        return result
+
+    def authenticate_header(self, request):
+        return SupabaseJWTAuthentication().authenticate_header(request)
+
+
+def async_view(view_class, actions=None, **initkwargs):
+    """Wrap a DRF view (or viewset ``actions``) in an async Django view."""
+    initkwargs['authentication_classes'] = [PreAuthenticated] + [
+        auth for auth in view_class.authentication_classes
+        if auth is not SupabaseJWTAuthentication
+    ]
+    if actions is None:
+        view = view_class.as_view(**initkwargs)
+    else:
+        view = view_class.as_view(actions, **initkwargs)
+    sync_view = sync_to_async(view)
+
+    async def async_wrapper(request, *args, **kwargs):
+        try:
+            request.async_auth_result = await SupabaseJWTAuthentication().aauthenticate(request)
+        except exceptions.AuthenticationFailed as e:
+            request.async_auth_result = e
+        return await sync_view(request, *args, **kwargs)
+
+    # What DRF's as_view() exposes, for CSRF, audit logging and the router
+    for name in ('cls', 'initkwargs', 'actions', 'csrf_exempt'):
+        if hasattr(view, name):
+            setattr(async_wrapper, name, getattr(view, name))
+    async_wrapper.__name__ = view.__name__
+    return async_wrapper
@@ -0,0 +1,116 @@
+"""
+Conditional GET (``ETag`` / ``Last-Modified``) support for the API views.
+
+Validators are derived from cheap aggregates (``MAX(updated_at)`` and
+``COUNT(*)``) over the rows a response is built from rather than from the
+rendered body, so a client revalidating an unchanged resource gets a
+``304 Not Modified`` before any queryset is evaluated or serializer runs.
+"""
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    digest = hashlib.sha256('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def not_modified(request, etag, last_modified):
+    """A 304 response if the request's validators match, else ``None``."""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None and response.status_code == 304:
+        return response
+    return None
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Per-user data: caches may keep it, but must revalidate every time
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+def user_validators(request):
+    """Validators for responses that only depend on the authenticated user."""
+    user = request.user
+    return make_etag(user.pk, user.updated_at.isoformat()), user.updated_at
+
+
+class ConditionalGetMixin:
+    """
+    ETag/Last-Modified handling for ``list`` and ``retrieve``.
+
+    Each source from ``get_conditional_sources()`` is reduced to one
+    aggregate row; views whose payload also depends on related rows (such
+    as nested action items) override it to add those querysets. Models
+    without ``updated_at`` set ``conditional_field = 'created_at'`` and
+    fold mutable columns in through ``conditional_aggregates``.
+
+    ``Last-Modified`` is only sent for a ``retrieve`` built from its one
+    row. Deleting one of several rows leaves ``MAX(updated_at)`` where it
+    was, so lists and nested details are validated by the ETag alone,
+    which includes each source's ``COUNT(*)``.
+    """
+    conditional_field = 'updated_at'
+    conditional_aggregates = {}
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+    def conditional_source(self, queryset, field='updated_at', **aggregates):
+        """One ``(queryset, aggregates)`` pair for ``get_conditional_sources``."""
+        return queryset.order_by(), {'latest': Max(field), 'count': Count('pk'), **aggregates}
+
+    def get_conditional_sources(self):
+        if self.action == 'retrieve':
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = self.get_queryset().filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        else:
+            queryset = self.filter_queryset(self.get_queryset())
+        return [self.conditional_source(queryset, self.conditional_field, **self.conditional_aggregates)]
+
+    def get_validators(self):
+        """
+        ``(etag, last_modified)``, or ``None`` when the object does not exist.
+        ``last_modified`` is ``None`` when the response has no single row to date.
+        """
+        request = self.request
+        user = request.user
+        parts = [request.get_full_path(), request.accepted_renderer.format,
+                 user.pk, user.updated_at.isoformat()]
+        try:
+            sources = [
+                queryset.aggregate(**aggregates)
+                for queryset, aggregates in self.get_conditional_sources()
+            ]
+        except (TypeError, ValueError, ValidationError):
+            # A malformed lookup value; the view answers it with a 404
+            return None
+        for index, values in enumerate(sources):
+            if index == 0 and self.action == 'retrieve' and not values['count']:
+                # Let the view raise its usual 404
+                return None
+            parts.extend(f'{key}={values[key]}' for key in sorted(values))
+        last_modified = None
+        if self.action == 'retrieve' and len(sources) == 1:
+            last_modified = max(user.updated_at, sources[0]['latest'] or user.updated_at)
+        return make_etag(*parts), last_modified
+
+    def conditional(self, handler, request, *args, **kwargs):
+        validators = self.get_validators()
+        if validators is None:
+            return handler(request, *args, **kwargs)
+        etag, last_modified = validators
+        response = not_modified(request, etag, last_modified) or handler(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
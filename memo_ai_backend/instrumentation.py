@@ -0,0 +1,391 @@
+"""
+Per-request performance instrumentation.
+
+``InstrumentationMiddleware`` (first in ``MIDDLEWARE``) times each request
+and, through an execute wrapper on every connection, every query it runs.
+Both work under WSGI and ASGI: the request's metrics live in a context
+variable, which follows sync views into the threads ASGI runs them in.
+Time in authentication and serialization is collected by ``timed()``
+sections; views and serializers opt in with ``InstrumentedViewMixin`` and
+``InstrumentedSerializerMixin``. Each response gets a ``Server-Timing``
+header and a structured log line, and the numbers feed per-route
+histograms served in Prometheus text format at ``/metrics``. Metrics live
+in the serving process: with several workers, scrape each one or
+aggregate them in the collector.
+
+With ``QUERY_INSPECTION`` on (development and tests) the same hook also
+flags query shapes repeated within a request (N+1), logs queries slower
+than ``SLOW_QUERY_MS`` with their ``EXPLAIN`` plan, and checks each view's
+``query_budget``:
+
+    class InvoiceViewSet(InstrumentedViewMixin, viewsets.ReadOnlyModelViewSet):
+        query_budget = {'list': 3, 'retrieve': 3}  # or one number for all actions
+
+Budgets count the queries run inside ``InstrumentedViewMixin.dispatch``,
+not authentication or middleware. Exceeding one is logged, or raises
+``QueryBudgetExceeded`` when ``QUERY_BUDGET_STRICT`` is set, which fails
+the test that made the request.
+"""
+import asyncio
+import contextlib
+import contextvars
+import functools
+import hmac
+import json
+import logging
+import re
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+
+logger = logging.getLogger('memo_ai_backend.requests')
+query_logger = logging.getLogger('memo_ai_backend.queries')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Slow queries explained per request, at most
+MAX_EXPLAINS = 5
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+_IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+_SPACE_RE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_shape(sql):
+    """``sql`` with ``IN`` lists of any length made identical."""
+    return _SPACE_RE.sub(' ', _IN_LIST_RE.sub('IN (...)', sql)).strip()
+
+
+class RequestMetrics:
+    """Timings of the request being served, in seconds."""
+    def __init__(self, inspect=False):
+        self.started = time.perf_counter()
+        self.inspect = inspect
+        self.db_queries = 0
+        self.db_time = 0.0
+        # Queries run by the view itself, for query budgets
+        self.view_queries = 0
+        self.shapes = {}
+        self.slow_queries = []
+        self.sections = {}
+        self._depth = {}
+
+    def record_query(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.db_queries += 1
+            self.db_time += elapsed
+            if self._depth.get('view') and not self._depth.get('auth'):
+                self.view_queries += 1
+            if self.inspect:
+                shape = query_shape(sql)
+                self.shapes[shape] = self.shapes.get(shape, 0) + 1
+                if elapsed * 1000 >= settings.SLOW_QUERY_MS and not many:
+                    self.slow_queries.append((context['connection'].alias, sql, params, elapsed))
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper on every connection; counts towards the current request."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.record_query(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def add_query_hook(sender=None, connection=None, **kwargs):
+    # First, so that execute_wrapper() blocks active at connect time
+    # still pop their own wrapper on exit
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+@contextlib.contextmanager
+def section(name):
+    """Add the block's duration to ``name``; nested blocks count once."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    depth = metrics._depth.get(name, 0)
+    metrics._depth[name] = depth + 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics._depth[name] = depth
+        if depth == 0:
+            metrics.sections[name] = metrics.sections.get(name, 0.0) + time.perf_counter() - start
+
+
+def timed(name):
+    """Decorator form of ``section`` for sync and async functions."""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with section(name):
+                    return await func(*args, **kwargs)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with section(name):
+                    return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _labels(names, values):
+    def escape(value):
+        return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+    return ','.join(f'{name}="{escape(value)}"' for name, value in zip(names, values))
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        lines += [f'{self.name}{{{_labels(self.labelnames, labels)}}} {value}' for labels, value in values]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets, labelnames=('route', 'method')):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.labelnames = labelnames
+        # labels -> [cumulative count per bucket..., sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for labels, series in items:
+            base = _labels(self.labelnames, labels)
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {series[-1]}')
+            lines.append(f'{self.name}_sum{{{base}}} {series[-2]}')
+            lines.append(f'{self.name}_count{{{base}}} {series[-1]}')
+        return lines
+
+
+REQUESTS = Counter('http_requests_total', 'Requests served.', ('route', 'method', 'status'))
+REQUEST_DURATION = Histogram('http_request_duration_seconds', 'Wall time per request.', LATENCY_BUCKETS)
+DB_QUERIES = Histogram('http_request_db_queries', 'Database queries per request.', QUERY_BUCKETS)
+DB_DURATION = Histogram('http_request_db_duration_seconds', 'Database time per request.', LATENCY_BUCKETS)
+AUTH_DURATION = Histogram('http_request_auth_duration_seconds', 'Authentication time per request.',
+                          LATENCY_BUCKETS)
+SERIALIZE_DURATION = Histogram('http_request_serialize_duration_seconds', 'Serializer time per request.',
+                               LATENCY_BUCKETS)
+RESPONSE_SIZE = Histogram('http_response_size_bytes', 'Response body size.', SIZE_BUCKETS)
+METRICS = [REQUESTS, REQUEST_DURATION, DB_QUERIES, DB_DURATION, AUTH_DURATION, SERIALIZE_DURATION,
+           RESPONSE_SIZE]
+
+
+class InstrumentedViewMixin:
+    """Times ``dispatch`` as the ``view`` section, which query budgets count."""
+    def dispatch(self, request, *args, **kwargs):
+        with section('view'):
+            return super().dispatch(request, *args, **kwargs)
+
+
+class InstrumentedSerializerMixin:
+    """Times ``to_representation`` as the ``serialize`` section; nested serializers count once."""
+    def to_representation(self, instance):
+        with section('serialize'):
+            return super().to_representation(instance)
+
+
+def route_name(request):
+    """The DRF route name (e.g. ``recordingsession-list``) used as the metrics label."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.url_name or match.route
+
+
+def query_budget(request):
+    """The matched view's ``query_budget`` for this request's action, if any."""
+    match = getattr(request, 'resolver_match', None)
+    view_class = getattr(match.func, 'cls', None) if match else None
+    budget = getattr(view_class, 'query_budget', None)
+    if isinstance(budget, dict):
+        actions = getattr(match.func, 'actions', None) or {}
+        budget = budget.get(actions.get(request.method.lower()))
+    return budget
+
+
+def explain(alias, sql, params):
+    connection = connections[alias]
+    prefix = connection.ops.explain_query_prefix()
+    with connection.cursor() as cursor:
+        cursor.execute(f'{prefix} {sql}', params)
+        return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # Connections opened before this module was imported
+        for connection in connections.all(initialized_only=True):
+            add_query_hook(connection=connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics(inspect=settings.QUERY_INSPECTION)
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        # For tooling such as benchmarks.query_budgets
+        request.query_metrics = metrics
+        self.report(request, response, metrics)
+        if metrics.inspect:
+            self.inspect(request, metrics)
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics(inspect=settings.QUERY_INSPECTION)
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        request.query_metrics = metrics
+        self.report(request, response, metrics)
+        if metrics.inspect:
+            # EXPLAIN runs queries, which must stay off the event loop
+            await sync_to_async(self.inspect)(request, metrics)
+        return response
+
+    def report(self, request, response, metrics):
+        duration = time.perf_counter() - metrics.started
+        auth = metrics.sections.get('auth', 0.0)
+        serialize = metrics.sections.get('serialize', 0.0)
+        # Streamed bodies are still being produced; their size is unknown here
+        size = None if response.streaming else len(response.content)
+        route = route_name(request)
+        labels = (route, request.method)
+
+        REQUESTS.inc((route, request.method, str(response.status_code)))
+        REQUEST_DURATION.observe(labels, duration)
+        DB_QUERIES.observe(labels, metrics.db_queries)
+        DB_DURATION.observe(labels, metrics.db_time)
+        AUTH_DURATION.observe(labels, auth)
+        SERIALIZE_DURATION.observe(labels, serialize)
+        if size is not None:
+            RESPONSE_SIZE.observe(labels, size)
+
+        if settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = ', '.join([
+                f'total;dur={duration * 1000:.1f}',
+                f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.db_queries} queries"',
+                f'auth;dur={auth * 1000:.1f}',
+                f'serialize;dur={serialize * 1000:.1f}',
+            ])
+        if settings.REQUEST_METRICS_LOG:
+            logger.info(json.dumps({
+                'route': route,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 2),
+                'db_queries': metrics.db_queries,
+                'db_ms': round(metrics.db_time * 1000, 2),
+                'auth_ms': round(auth * 1000, 2),
+                'serialize_ms': round(serialize * 1000, 2),
+                'response_bytes': size,
+            }))
+
+    def inspect(self, request, metrics):
+        route = route_name(request)
+        for shape, count in metrics.shapes.items():
+            if count >= settings.N_PLUS_ONE_THRESHOLD:
+                query_logger.warning('Possible N+1 in %s %s (%s): %d x %s',
+                                     request.method, request.path, route, count, shape)
+        for alias, sql, params, elapsed in metrics.slow_queries[:MAX_EXPLAINS]:
+            plan = ''
+            if sql.lstrip().upper().startswith('SELECT'):
+                try:
+                    plan = explain(alias, sql, params)
+                except Exception as e:
+                    plan = f'EXPLAIN failed: {e}'
+            query_logger.warning('Slow query in %s %s (%s): %.1f ms\n%s\n%s',
+                                 request.method, request.path, route, elapsed * 1000, sql, plan)
+
+        budget = query_budget(request)
+        if budget is not None and metrics.view_queries > budget:
+            message = (f'{request.method} {request.path} ({route}) ran {metrics.view_queries} '
+                       f'queries, over its budget of {budget}')
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            query_logger.warning(message)
+
+
+def render():
+    return '\n'.join(line for metric in METRICS for line in metric.render()) + '\n'
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint; requires ``METRICS_TOKEN`` as a bearer token.
+    Without a token configured it is only served with ``DEBUG`` on.
+    """
+    token = settings.METRICS_TOKEN
+    if not token and not settings.DEBUG:
+        return HttpResponse(status=403)
+    # Compared as bytes: compare_digest() rejects non-ASCII strings
+    supplied = request.headers.get('Authorization', '').encode()
+    if token and not hmac.compare_digest(supplied, f'Bearer {token}'.encode()):
+        return HttpResponse(status=403)
+    return HttpResponse(render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,25 @@
+"""
+Pagination classes shared by the API apps.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination ordered by ``(-created_at, -id)``.
+
+    Pages are fetched with ``WHERE created_at < <cursor>`` instead of
+    ``OFFSET``, and no ``COUNT(*)`` is issued, so page 1000 costs the same
+    as page 1. Cursors are opaque base64 tokens returned in ``next`` and
+    ``previous``. DRF builds the cursor from ``created_at`` alone: ``-id``
+    only gives rows with the same timestamp a stable order, which the
+    cursor's offset within that timestamp then steps through.
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class DateCursorPagination(CreatedAtCursorPagination):
+    """Keyset pagination for per-day rows, which are unique per user and date."""
+    ordering = '-date'
@@ -38,9 +38,11 @@ INSTALLED_APPS = [
     'users',
     'sessions.apps.SessionsConfig', 
     'subscriptions',
+    'jobs',
 ]
 
 MIDDLEWARE = [
+    'memo_ai_backend.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -49,6 +51,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'users.middleware.AuditLogMiddleware',
 ]
 
 ROOT_URLCONF = 'memo_ai_backend.urls'
@@ -100,6 +103,35 @@ SUPABASE_URL = os.getenv('SUPABASE_URL', '')
 SUPABASE_KEY = os.getenv('SUPABASE_KEY', os.getenv('SUPABASE_ANON_KEY', ''))
 SUPABASE_SERVICE_KEY = os.getenv('SUPABASE_SERVICE_KEY', os.getenv('SUPABASE_SERVICE_ROLE_KEY', ''))
 
+# Pooled HTTP client shared by all Supabase calls in a worker process
+SUPABASE_HTTP_TIMEOUT = float(os.getenv('SUPABASE_HTTP_TIMEOUT', '10'))  # seconds
+SUPABASE_HTTP_CONNECT_TIMEOUT = float(os.getenv('SUPABASE_HTTP_CONNECT_TIMEOUT', '3'))
+SUPABASE_HTTP_MAX_CONNECTIONS = int(os.getenv('SUPABASE_HTTP_MAX_CONNECTIONS', '20'))
+SUPABASE_HTTP_MAX_KEEPALIVE = int(os.getenv('SUPABASE_HTTP_MAX_KEEPALIVE', '10'))
+SUPABASE_HTTP_KEEPALIVE_EXPIRY = float(os.getenv('SUPABASE_HTTP_KEEPALIVE_EXPIRY', '60'))
+
+# Token verification: 'local' checks signatures in-process with PyJWT,
+# 'remote' calls the Supabase auth server for every request. Without a
+# JWT secret, local mode would reject HS256 tokens, so it is opt-in there
+# (for projects that only sign with JWKS keys).
+SUPABASE_JWT_SECRET = os.getenv('SUPABASE_JWT_SECRET', '')
+SUPABASE_AUTH_MODE = os.getenv('SUPABASE_AUTH_MODE', 'local' if SUPABASE_JWT_SECRET else 'remote')
+SUPABASE_JWT_AUDIENCE = os.getenv('SUPABASE_JWT_AUDIENCE', 'authenticated')
+SUPABASE_JWT_LEEWAY = int(os.getenv('SUPABASE_JWT_LEEWAY', '10'))  # seconds
+SUPABASE_JWKS_URL = os.getenv(
+    'SUPABASE_JWKS_URL',
+    f"{SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json" if SUPABASE_URL else '',
+)
+SUPABASE_JWKS_REFRESH_INTERVAL = int(os.getenv('SUPABASE_JWKS_REFRESH_INTERVAL', '600'))
+SUPABASE_JWKS_MIN_REFRESH_INTERVAL = int(os.getenv('SUPABASE_JWKS_MIN_REFRESH_INTERVAL', '30'))
+
+# Verified-token cache; entries never outlive the token's exp claim.
+SUPABASE_TOKEN_CACHE_SIZE = int(os.getenv('SUPABASE_TOKEN_CACHE_SIZE', '10000'))
+SUPABASE_TOKEN_CACHE_TTL = int(os.getenv('SUPABASE_TOKEN_CACHE_TTL', '300'))  # seconds
+
+# Minimum seconds between claim syncs onto a user row (0 = every verification).
+SUPABASE_USER_SYNC_INTERVAL = int(os.getenv('SUPABASE_USER_SYNC_INTERVAL', '0'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -154,6 +186,89 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20,
 }
 
+# Characters fetched per query when streaming a session transcript
+TRANSCRIPT_CHUNK_SIZE = int(os.getenv('TRANSCRIPT_CHUNK_SIZE', '65536'))
+
+# Largest accepted body for one chunk of a chunked audio upload
+AUDIO_UPLOAD_MAX_CHUNK_SIZE = int(os.getenv('AUDIO_UPLOAD_MAX_CHUNK_SIZE', str(8 * 1024 * 1024)))
+
+# Text search configuration used for session/action item search vectors
+SEARCH_CONFIG = os.getenv('SEARCH_CONFIG', 'english')
+
+# Delta sync: how long deletions are remembered, and the overlap between
+# consecutive sync windows that covers late-committing transactions
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv('SYNC_TOMBSTONE_RETENTION_DAYS', '30'))
+SYNC_CLOCK_SKEW = int(os.getenv('SYNC_CLOCK_SKEW', '5'))  # seconds
+
+# Serve the hot read endpoints (me, sessions, subscriptions) through async
+# views; only useful when running the ASGI application under uvicorn
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False') == 'True'
+
+# Server-sent event streams (ASGI only)
+SSE_HEARTBEAT_INTERVAL = int(os.getenv('SSE_HEARTBEAT_INTERVAL', '15'))  # seconds
+SSE_MAX_DURATION = int(os.getenv('SSE_MAX_DURATION', '300'))  # seconds; clients reconnect
+SSE_QUEUE_SIZE = int(os.getenv('SSE_QUEUE_SIZE', '100'))
+
+# Most action items accepted by one bulk create/update request
+ACTION_ITEM_BULK_MAX_ITEMS = int(os.getenv('ACTION_ITEM_BULK_MAX_ITEMS', '500'))
+
+# Request instrumentation (Server-Timing header, structured request log
+# lines); /metrics requires "Authorization: Bearer <METRICS_TOKEN>" and
+# is refused while no token is set, unless DEBUG is on
+SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', 'True') == 'True'
+REQUEST_METRICS_LOG = os.getenv('REQUEST_METRICS_LOG', 'True') == 'True'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Query inspection for development and tests: repeated query shapes
+# (N+1), slow queries with their EXPLAIN plan, and per-view query budgets
+# (QUERY_BUDGET_STRICT makes an exceeded budget raise)
+QUERY_INSPECTION = os.getenv('QUERY_INSPECTION', str(DEBUG)) == 'True'
+N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', '5'))
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '100'))
+QUERY_BUDGET_STRICT = os.getenv('QUERY_BUDGET_STRICT', 'False') == 'True'
+
+# Widest date range one usage summary request may cover
+USAGE_SUMMARY_MAX_DAYS = int(os.getenv('USAGE_SUMMARY_MAX_DAYS', '1096'))
+
+# Usage metering write-behind buffer (0 = write every increment immediately)
+USAGE_FLUSH_INTERVAL = float(os.getenv('USAGE_FLUSH_INTERVAL', '5'))  # seconds
+USAGE_MAX_PENDING = int(os.getenv('USAGE_MAX_PENDING', '1000'))
+
+# Per-plan limits (None = unlimited) and how long resolved entitlements are cached
+PLAN_LIMITS = {
+    'free': {'minutes_per_month': 60, 'max_sessions': 20},
+    'basic': {'minutes_per_month': 600, 'max_sessions': 200},
+    'pro': {'minutes_per_month': 3000, 'max_sessions': None},
+    'enterprise': {'minutes_per_month': None, 'max_sessions': None},
+}
+ENTITLEMENTS_CACHE_TTL = int(os.getenv('ENTITLEMENTS_CACHE_TTL', '300'))  # seconds
+USAGE_TOTALS_CACHE_TTL = int(os.getenv('USAGE_TOTALS_CACHE_TTL', '60'))  # seconds
+
+# Audit logging: entries are buffered and bulk-inserted by a background thread
+AUDIT_LOG_PATH_PREFIX = '/api/'
+AUDIT_LOG_SYNC = os.getenv('AUDIT_LOG_SYNC', 'False') == 'True'
+AUDIT_LOG_BUFFER_SIZE = int(os.getenv('AUDIT_LOG_BUFFER_SIZE', '10000'))
+AUDIT_LOG_BATCH_SIZE = int(os.getenv('AUDIT_LOG_BATCH_SIZE', '200'))
+AUDIT_LOG_FLUSH_INTERVAL = float(os.getenv('AUDIT_LOG_FLUSH_INTERVAL', '2'))  # seconds
+
+# Monthly partitions for audit_logs/billing_logs (see `manage.py partition_logs`)
+LOG_PARTITION_MONTHS_AHEAD = int(os.getenv('LOG_PARTITION_MONTHS_AHEAD', '3'))
+AUDIT_LOG_RETENTION_MONTHS = int(os.getenv('AUDIT_LOG_RETENTION_MONTHS', '12'))
+BILLING_LOG_RETENTION_MONTHS = int(os.getenv('BILLING_LOG_RETENTION_MONTHS', '84'))
+LOG_ARCHIVE_DIR = Path(os.getenv('LOG_ARCHIVE_DIR', BASE_DIR / 'archive'))
+
+# Background jobs (see `manage.py run_workers`)
+JOBS_MAX_ATTEMPTS = int(os.getenv('JOBS_MAX_ATTEMPTS', '5'))
+JOBS_VISIBILITY_TIMEOUT = int(os.getenv('JOBS_VISIBILITY_TIMEOUT', '300'))  # seconds
+JOBS_RETRY_BACKOFF_BASE = int(os.getenv('JOBS_RETRY_BACKOFF_BASE', '5'))  # seconds
+JOBS_RETRY_BACKOFF_MAX = int(os.getenv('JOBS_RETRY_BACKOFF_MAX', '600'))  # seconds
+
+# Dotted paths to the session processing backends
+SESSION_TRANSCRIBER = os.getenv('SESSION_TRANSCRIBER', '')
+SESSION_ACTION_ITEM_EXTRACTOR = os.getenv(
+    'SESSION_ACTION_ITEM_EXTRACTOR', 'sessions.processing.extract_action_items'
+)
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = os.getenv(
     'CORS_ALLOWED_ORIGINS',
@@ -174,6 +289,11 @@ LOGGING = {
             'format': '{levelname} {asctime} {module} {message}',
             'style': '{',
         },
+        # Request metrics are already JSON
+        'message': {
+            'format': '{message}',
+            'style': '{',
+        },
     },
     'handlers': {
         'file': {
@@ -182,6 +302,19 @@ LOGGING = {
             'filename': BASE_DIR / 'logs' / 'django.log',
             'formatter': 'verbose',
         },
+        'requests_file': {
+            'level': 'INFO',
+            'class': 'logging.FileHandler',
+            'filename': BASE_DIR / 'logs' / 'requests.log',
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'memo_ai_backend.requests': {
+            'handlers': ['requests_file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
     'root': {
         'handlers': ['file'],
@@ -0,0 +1,243 @@
+import asyncio
+import importlib
+import time
+import unittest
+from unittest import mock
+
+from django.db import connection, transaction
+from django.core.handlers.base import BaseHandler
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import clear_url_caches, resolve
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+import memo_ai_backend.urls
+import sessions.urls
+import subscriptions.urls
+import users.urls
+from sessions.models import ActionItem, Comment, RecordingSession
+from subscriptions.models import BillingLog, Invoice, Subscription
+from users.authentication import SupabaseJWTAuthentication
+from users.models import AuditLog, User
+from users.tests import LocalAuthTestMixin, make_token
+
+
+class IndexUsageTests(TestCase):
+    """``EXPLAIN`` shows each per-user access pattern using its index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        users = [User.objects.create(username=f'user{i}', email=f'user{i}@example.com') for i in range(10)]
+        sessions = RecordingSession.objects.bulk_create(
+            [RecordingSession(user=users[i % 10], title=f'Session {i}') for i in range(200)]
+        )
+        ActionItem.objects.bulk_create([ActionItem(session=s, user=s.user, title='Follow up') for s in sessions])
+        Comment.objects.bulk_create([Comment(session=s, user=s.user, content='Noted') for s in sessions])
+        AuditLog.objects.bulk_create(
+            [AuditLog(user=users[i % 10], action='view', resource_type='session') for i in range(200)]
+        )
+        cls.user, cls.session = users[0], sessions[0]
+
+    def explain(self, queryset):
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    # Small tables would otherwise be seq-scanned regardless of indexes
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+
+    def assertUsesIndex(self, queryset, index):
+        plan = self.explain(queryset)
+        self.assertIn(index, plan, f'{index} not used:\n{plan}')
+
+    def test_list_queries_use_user_indexes(self):
+        patterns = [
+            (RecordingSession.objects.filter(user=self.user).order_by('-created_at', '-id')[:20],
+             'rec_session_user_created_idx'),
+            (ActionItem.objects.filter(user=self.user).order_by('-created_at', '-id')[:20],
+             'action_item_user_created_idx'),
+            (Comment.objects.filter(session=self.session).order_by('-created_at'),
+             'comment_session_created_idx'),
+            (Invoice.objects.filter(user=self.user).order_by('-created_at', '-id')[:20],
+             'invoice_user_created_idx'),
+            (BillingLog.objects.filter(user=self.user).order_by('-created_at', '-id')[:20],
+             'billing_log_user_created_idx'),
+            (AuditLog.objects.filter(user=self.user).order_by('-created_at')[:20],
+             'audit_log_user_created_idx'),
+        ]
+        for queryset, index in patterns:
+            with self.subTest(index=index):
+                self.assertUsesIndex(queryset, index)
+
+    # SQLite only uses a partial index when the WHERE clause matches it
+    # literally, which never happens with bound parameters.
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'partial index matching needs PostgreSQL')
+    def test_open_action_items_use_partial_index(self):
+        self.assertUsesIndex(
+            ActionItem.objects.filter(user=self.user, status__in=['pending', 'in_progress'])
+            .order_by('-created_at')[:20],
+            'action_item_user_open_idx',
+        )
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='owner', email='owner@example.com')
+        session = RecordingSession.objects.create(user=cls.user, title='Standup')
+        cls.items = ActionItem.objects.bulk_create(
+            [ActionItem(session=session, user=cls.user, title=f'Follow up {i}') for i in range(3)]
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_revalidates_after_a_deletion(self):
+        url = '/api/sessions/action-items/'
+        first = self.client.get(url)
+        self.assertNotIn('Last-Modified', first)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        # Not the newest row, so MAX(updated_at) stays where it was
+        self.items[0].delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_sends_last_modified(self):
+        url = f'/api/sessions/action-items/{self.items[0].pk}/'
+        first = self.client.get(url)
+        self.assertIn('Last-Modified', first)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(AUDIT_LOG_SYNC=True)
+class AsyncServingTests(TransactionTestCase):
+    def test_middleware_is_not_adapted(self):
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            BaseHandler().load_middleware(is_async=True)
+
+    def test_queries_in_view_threads_are_counted(self):
+        user = User.objects.create(username='owner', email='owner@example.com')
+        RecordingSession.objects.create(user=user, title='Standup')
+
+        # Outside async_to_sync, so the view runs in a thread of its own
+        # with its own connection, as it does under an ASGI server
+        with mock.patch.object(SupabaseJWTAuthentication, 'authenticate', return_value=(user, None)):
+            response = asyncio.run(AsyncClient().get('/api/sessions/sessions/'))
+
+        self.assertEqual(response.status_code, 200)
+        metrics = response.asgi_request.query_metrics
+        # Validators (sessions, action items, comments), the page, and the
+        # audit entry's BEGIN and INSERT
+        self.assertEqual(metrics.db_queries, 6)
+        self.assertEqual(metrics.view_queries, 4)
+
+
+@override_settings(AUDIT_LOG_SYNC=True)
+class AsyncRouteTests(LocalAuthTestMixin, TransactionTestCase):
+    """The ``ASYNC_VIEWS`` routes answer exactly as the sync ones do."""
+    urls = (
+        '/api/users/me/',
+        '/api/sessions/sessions/',
+        '/api/sessions/sessions/{session}/',
+        '/api/subscriptions/subscriptions/',
+        '/api/subscriptions/subscriptions/{subscription}/',
+    )
+
+    def setUp(self):
+        super().setUp()
+        self.token = make_token()
+        # Verified once here, so every request below is a token cache hit
+        self.user, _ = self.authenticate(self.token)
+        self.ids = {
+            'session': RecordingSession.objects.create(user=self.user, title='Standup').pk,
+            'subscription': Subscription.objects.create(user=self.user, plan='pro', status='active').pk,
+        }
+
+    def use_async_routes(self):
+        async_views = override_settings(ASYNC_VIEWS=True)
+        async_views.enable()
+        self.addCleanup(self.reload_urls)
+        self.addCleanup(async_views.disable)
+        self.reload_urls()
+
+    def reload_urls(self):
+        for module in (users.urls, sessions.urls, subscriptions.urls, memo_ai_backend.urls):
+            importlib.reload(module)
+        clear_url_caches()
+
+    def async_get(self, url, token):
+        return asyncio.run(AsyncClient().get(url, headers={'Authorization': f'Bearer {token}'}))
+
+    def test_responses_match_the_sync_routes(self):
+        urls = [url.format(**self.ids) for url in self.urls]
+        expected = {}
+        for url in urls:
+            response = self.client.get(url, HTTP_AUTHORIZATION=f'Bearer {self.token}')
+            expected[url] = (response.status_code, response.json())
+
+        self.use_async_routes()
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertTrue(asyncio.iscoroutinefunction(resolve(url).func))
+                response = self.async_get(url, self.token)
+                self.assertEqual((response.status_code, response.json()), expected[url])
+
+    def test_bad_token_is_rejected(self):
+        urls = [url.format(**self.ids) for url in self.urls]
+        for url in urls:
+            response = self.client.get(url, HTTP_AUTHORIZATION='Bearer not-a-token')
+            self.assertEqual(response.status_code, 401)
+
+        self.use_async_routes()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.async_get(url, 'not-a-token')
+                self.assertEqual(response.status_code, 401)
+                self.assertEqual(response['WWW-Authenticate'], 'Bearer')
+
+    def test_token_cache_hit_costs_one_query(self):
+        self.use_async_routes()
+        response = self.async_get('/api/users/me/', self.token)
+        self.assertEqual(response.status_code, 200)
+        metrics = response.asgi_request.query_metrics
+        # Outside the view: the user lookup, then the audit entry's BEGIN and INSERT
+        self.assertEqual(metrics.db_queries - metrics.view_queries, 3)
+
+
+class InstrumentationTests(TestCase):
+    def test_view_and_serializer_sections_are_recorded(self):
+        user = User.objects.create(username='owner', email='owner@example.com')
+        RecordingSession.objects.create(user=user, title='Standup')
+        client = APIClient()
+        client.force_authenticate(user)
+
+        metrics = client.get('/api/sessions/sessions/').wsgi_request.query_metrics
+        self.assertIn('serialize', metrics.sections)
+        # Validators (sessions, action items, comments) and the page
+        self.assertEqual(metrics.view_queries, 4)
+
+
+class MetricsViewTests(SimpleTestCase):
+    @override_settings(METRICS_TOKEN='', DEBUG=False)
+    def test_refused_without_a_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='', DEBUG=True)
+    def test_open_in_debug_without_a_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    @override_settings(METRICS_TOKEN='scrape-token', DEBUG=False)
+    def test_requires_the_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        for header in ('Bearer scrape-tokeN', 'Bearer scrape-tøken'):
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION=header)
+            self.assertEqual(response.status_code, 403)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-token')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'http_requests_total', response.content)
@@ -6,11 +6,14 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from .instrumentation import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/users/', include('users.urls')),
     path('api/sessions/', include('sessions.urls')),
     path('api/subscriptions/', include('subscriptions.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 # Serve media files in development
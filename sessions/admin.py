@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import RecordingSession, ActionItem, Comment
+from .models import RecordingSession, ActionItem, Comment, AudioUpload
 
 
 @admin.register(RecordingSession)
@@ -22,3 +22,9 @@ class CommentAdmin(admin.ModelAdmin):
     list_filter = ['created_at']
     search_fields = ['content', 'session__title']
 
+
+@admin.register(AudioUpload)
+class AudioUploadAdmin(admin.ModelAdmin):
+    list_display = ['id', 'session', 'user', 'status', 'total_size', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['session__title', 'user__email']
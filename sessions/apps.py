@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class SessionsConfig(AppConfig):
@@ -6,3 +7,11 @@ class SessionsConfig(AppConfig):
     name = 'sessions'
     label = 'recording_sessions'  # Custom label to avoid conflict with Django's built-in sessions
 
+    def ready(self):
+        from . import signals  # noqa: F401
+        post_migrate.connect(_create_search_indexes, sender=self)
+
+
+def _create_search_indexes(using, **kwargs):
+    from .search import create_indexes
+    create_indexes(using)
@@ -0,0 +1,236 @@
+"""
+Live session events for the server-sent event stream.
+
+    events.publish(user_id, 'session.status', {'id': 7, 'status': 'completed'})
+
+Writers publish inside their transaction. On PostgreSQL that is a
+``pg_notify`` on the ``memo_events`` channel, which is only delivered
+once the transaction commits. Each serving process runs one listener
+thread on one dedicated connection that ``LISTEN``s and fans every
+notification out to the in-process subscribers of the affected user, so
+open streams cost a queue each rather than a connection or a worker.
+Other databases dispatch in-process after commit, which covers
+development and tests.
+"""
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'memo_events'
+# NOTIFY payloads must be shorter than 8000 bytes
+MAX_PAYLOAD = 7900
+# Fields kept when an event is too large to send whole
+_ID_FIELDS = ('id', 'session')
+
+
+def publish(user_id, event, data):
+    publish_many([(user_id, event, data)])
+
+
+def publish_many(events):
+    """Publish ``(user_id, event, data)`` triples with a single statement."""
+    payloads = [_encode(user_id, event, data) for user_id, event, data in events]
+    if not payloads:
+        return
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload',
+                [CHANNEL, payloads],
+            )
+    else:
+        transaction.on_commit(lambda: [broker.dispatch(payload) for payload in payloads])
+
+
+def _encode(user_id, event, data):
+    payload = json.dumps({'user': user_id, 'event': event, 'data': data}, cls=DjangoJSONEncoder)
+    if len(payload.encode()) > MAX_PAYLOAD:
+        # Clients fetch the full row by id
+        data = {key: data[key] for key in _ID_FIELDS if key in data}
+        data['truncated'] = True
+        payload = json.dumps({'user': user_id, 'event': event, 'data': data}, cls=DjangoJSONEncoder)
+    return payload
+
+
+def session_status_changed(session, previous):
+    publish(session.user_id, 'session.status', {
+        'id': session.pk,
+        'status': session.status,
+        'previous': previous,
+        'updated_at': session.updated_at,
+    })
+
+
+def action_items_created(items):
+    publish_many([
+        (item.user_id, 'action_item.created', {
+            'id': item.pk,
+            'session': item.session_id,
+            'title': item.title,
+            'status': item.status,
+            'priority': item.priority,
+            'due_date': item.due_date,
+            'created_at': item.created_at,
+        })
+        for item in items
+    ])
+
+
+def comment_created(comment, owner_id):
+    publish(owner_id, 'comment.created', {
+        'id': comment.pk,
+        'session': comment.session_id,
+        'user': comment.user_id,
+        'content': comment.content,
+        'created_at': comment.created_at,
+    })
+
+
+class Subscriber:
+    """One open stream: a bounded queue on the stream's event loop."""
+    def __init__(self, user_id, loop, size):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(size)
+        self.overflowed = False
+
+    def deliver(self, message):
+        """Hand ``message`` to the stream; safe to call from any thread."""
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # The stream's event loop has already closed
+            pass
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # A client this far behind must resync; the stream ends
+            self.overflowed = True
+
+    async def get(self, timeout):
+        """The next message, or ``None`` after ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker:
+    """Per-process registry of subscribers fed by one LISTEN connection."""
+    def __init__(self, queue_size=100, reconnect_delay=2.0):
+        self.queue_size = queue_size
+        self.reconnect_delay = reconnect_delay
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.dispatched = 0
+
+    def subscribe(self, user_id):
+        """Register a stream for ``user_id``; call from its event loop."""
+        subscriber = Subscriber(user_id, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscriber)
+        self._ensure_listener()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            streams = self._subscribers.get(subscriber.user_id)
+            if streams is not None:
+                streams.discard(subscriber)
+                if not streams:
+                    del self._subscribers[subscriber.user_id]
+
+    def dispatch(self, payload):
+        message = json.loads(payload)
+        with self._lock:
+            targets = list(self._subscribers.get(message['user'], ()))
+            self.dispatched += 1
+        for subscriber in targets:
+            subscriber.deliver(message)
+
+    def _ensure_listener(self):
+        if connection.vendor != 'postgresql':
+            return
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._listen, name='event-listener', daemon=True)
+            self._thread.start()
+
+    def _listen(self):
+        wrapper = connections['default']
+        while True:
+            conn = None
+            try:
+                # A dedicated connection: Django's own ones are per thread
+                # and must stay free for queries.
+                conn = wrapper.Database.connect(**wrapper.get_connection_params())
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN {CHANNEL}')
+                while True:
+                    if select.select([conn], [], [], 5.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self.dispatch(conn.notifies.pop(0).payload)
+            except Exception:
+                logger.exception('Event listener failed; reconnecting in %ss', self.reconnect_delay)
+                time.sleep(self.reconnect_delay)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'users': len(self._subscribers),
+                'streams': sum(len(streams) for streams in self._subscribers.values()),
+                'dispatched': self.dispatched,
+            }
+
+
+broker = EventBroker(queue_size=settings.SSE_QUEUE_SIZE)
+
+
+def format_event(message):
+    data = json.dumps(message['data'], cls=DjangoJSONEncoder)
+    return f"event: {message['event']}\ndata: {data}\n\n"
+
+
+async def stream(subscriber, heartbeat, max_duration):
+    """
+    Server-sent event lines for ``subscriber``.
+
+    Comment lines keep idle connections open through proxies. The stream
+    ends after ``max_duration`` seconds, since Django 4.2 does not notice
+    a client that went away; EventSource clients reconnect on their own.
+    """
+    deadline = time.monotonic() + max_duration
+    try:
+        yield 'retry: 3000\n\n'
+        while time.monotonic() < deadline:
+            message = await subscriber.get(min(heartbeat, max(deadline - time.monotonic(), 0)))
+            if subscriber.overflowed:
+                yield 'event: overflow\ndata: {}\n\n'
+                return
+            yield ': keep-alive\n\n' if message is None else format_event(message)
+    finally:
+        broker.unsubscribe(subscriber)
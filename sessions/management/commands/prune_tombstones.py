@@ -0,0 +1,23 @@
+"""
+Delete sync tombstones older than the retention window.
+"""
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from sessions.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = 'Delete delta-sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS (run daily).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.SYNC_TOMBSTONE_RETENTION_DAYS,
+                            help='Keep tombstones from this many days.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - datetime.timedelta(days=options['days'])
+        deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(f'Deleted {deleted} tombstones older than {cutoff:%Y-%m-%d %H:%M}')
@@ -0,0 +1,34 @@
+"""
+Backfill the full-text search vectors of sessions and action items.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from sessions import search
+from sessions.models import ActionItem, RecordingSession
+
+
+class Command(BaseCommand):
+    help = 'Compute search vectors for rows that have none (or for every row with --all).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Recompute every vector, e.g. after changing SEARCH_CONFIG.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            raise CommandError('Full-text search vectors require PostgreSQL.')
+
+        search.create_indexes()
+        targets = [
+            (RecordingSession, search.update_session_vectors),
+            (ActionItem, search.update_action_item_vectors),
+        ]
+        for model, update in targets:
+            queryset = model.objects.all()
+            if not options['all']:
+                queryset = queryset.filter(search_vector__isnull=True)
+            pks = list(queryset.order_by('pk').values_list('pk', flat=True))
+            for start in range(0, len(pks), options['batch_size']):
+                update(pks[start:start + options['batch_size']])
+            self.stdout.write(f'{model._meta.db_table}: {len(pks)} rows indexed')
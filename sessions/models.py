@@ -1,13 +1,29 @@
 """
-RecordingSession, ActionItem, and Comment models.
+RecordingSession, ActionItem, Comment, and audio upload models.
 """
+import uuid
+
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
 User = get_user_model()
 
 
+class SearchableManager(models.Manager):
+    """
+    Leaves the full-text ``search_vector`` column out of ordinary loads.
+
+    The vector is as large as the text it indexes and is only ever read by
+    the database, and an instance that never loaded it cannot write a stale
+    copy back on ``save()``.
+    """
+    def get_queryset(self):
+        return super().get_queryset().defer('search_vector')
+
+
 class RecordingSession(models.Model):
     """Recording session model."""
     STATUS_CHOICES = [
@@ -27,12 +43,20 @@ class RecordingSession(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     started_at = models.DateTimeField(null=True, blank=True)
     ended_at = models.DateTimeField(null=True, blank=True)
+    # title (A), description (B) and transcript (C); see sessions.search
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = SearchableManager()
+
     class Meta:
         db_table = 'recording_sessions'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='rec_session_user_created_idx'),
+            models.Index(fields=['user', 'updated_at'], name='rec_session_user_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.title}"
@@ -61,12 +85,25 @@ class ActionItem(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     due_date = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = SearchableManager()
+
     class Meta:
         db_table = 'action_items'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='action_item_user_created_idx'),
+            models.Index(fields=['session', '-created_at'], name='action_item_session_idx'),
+            models.Index(fields=['user', 'updated_at'], name='action_item_user_updated_idx'),
+            models.Index(
+                fields=['user', '-created_at'],
+                name='action_item_user_open_idx',
+                condition=Q(status__in=['pending', 'in_progress']),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.session.title}"
@@ -83,7 +120,88 @@ class Comment(models.Model):
     class Meta:
         db_table = 'comments'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='comment_user_created_idx'),
+            models.Index(fields=['session', '-created_at'], name='comment_session_created_idx'),
+            models.Index(fields=['session', 'updated_at'], name='comment_session_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Comment by {self.user.email} on {self.session.title}"
 
+
+class Tombstone(models.Model):
+    """
+    Record of a deleted session, action item or comment for delta sync.
+
+    Deleting a session implies its action items and comments, so cascaded
+    children get no tombstone of their own. Rows are pruned after
+    ``SYNC_TOMBSTONE_RETENTION_DAYS``.
+    """
+    KIND_CHOICES = [
+        ('session', 'Session'),
+        ('action_item', 'Action Item'),
+        ('comment', 'Comment'),
+    ]
+
+    # No database constraint: tombstones written while a user is being
+    # deleted must not block that delete.
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False,
+                             related_name='+')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'sync_tombstones'
+        ordering = ['deleted_at']
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} deleted at {self.deleted_at}"
+
+
+class AudioUpload(models.Model):
+    """Resumable, chunked upload of a session's audio file."""
+    STATUS_CHOICES = [
+        ('open', 'Open'),
+        ('completed', 'Completed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    session = models.ForeignKey(RecordingSession, on_delete=models.CASCADE, related_name='audio_uploads')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='audio_uploads')
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    total_size = models.BigIntegerField(null=True, blank=True)  # in bytes, if known upfront
+    sha256 = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'audio_uploads'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Upload {self.id} - {self.session.title}"
+
+
+class AudioUploadChunk(models.Model):
+    """One stored part of an AudioUpload."""
+    upload = models.ForeignKey(AudioUpload, on_delete=models.CASCADE, related_name='chunks')
+    index = models.PositiveIntegerField()
+    file = models.FileField(upload_to='uploads/', max_length=255)
+    size = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'audio_upload_chunks'
+        ordering = ['index']
+        unique_together = ['upload', 'index']
+
+    def __str__(self):
+        return f"Upload {self.upload_id} - chunk {self.index}"
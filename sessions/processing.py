@@ -0,0 +1,111 @@
+"""
+Recording post-processing: transcription and action-item extraction.
+
+Both steps are pluggable through settings so a real speech-to-text or
+LLM backend can be dropped in without touching the job plumbing:
+``SESSION_TRANSCRIBER`` and ``SESSION_ACTION_ITEM_EXTRACTOR`` are dotted
+paths to callables.
+"""
+import re
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from users import dashboard, metering
+
+from . import events, search
+from .models import ActionItem, RecordingSession
+
+_ACTION_LINE_RE = re.compile(
+    r'^\s*(?:[-*]\s*)?(?:action item|todo|to-do|follow[- ]up|next step)s?\s*[:\-]\s*(?P<title>.+)$',
+    re.IGNORECASE,
+)
+
+
+def extract_action_items(transcript):
+    """
+    Default extractor: lines such as ``Action item: send the deck``.
+
+    Returns a list of dicts with ``title`` and optional ``priority`` and
+    ``description`` keys.
+    """
+    items = []
+    for line in transcript.splitlines():
+        match = _ACTION_LINE_RE.match(line)
+        if match:
+            items.append({'title': match.group('title').strip()[:200]})
+    return items
+
+
+def process_session(session_id):
+    """
+    Drive a session from ``processing`` to ``completed``.
+
+    Transcription runs outside any transaction; the transcript, the
+    extracted action items and the final status are then written in one
+    transaction under the session's row lock, so neither a retried job nor
+    one running alongside an earlier attempt creates duplicate items.
+    """
+    session = RecordingSession.objects.get(pk=session_id)
+    if session.status == 'completed':
+        return
+
+    previous = session.status
+    session.status, session.updated_at = 'processing', timezone.now()
+    RecordingSession.objects.filter(pk=session_id).update(
+        status=session.status, updated_at=session.updated_at,
+    )
+    # update() sends no post_save; the final save() below compares against this
+    session._loaded_status = session.status
+    if previous != session.status:
+        events.session_status_changed(session, previous)
+        dashboard.session_status_changed(session.user_id, previous, session.status)
+
+    transcript = session.transcript
+    transcribed = bool(settings.SESSION_TRANSCRIBER and session.audio_file)
+    if transcribed:
+        transcript = import_string(settings.SESSION_TRANSCRIBER)(session)
+
+    extractor = import_string(settings.SESSION_ACTION_ITEM_EXTRACTOR)
+    items = [
+        ActionItem(
+            session=session,
+            user_id=session.user_id,
+            title=item['title'],
+            description=item.get('description', ''),
+            priority=item.get('priority', 'medium'),
+        )
+        for item in extractor(transcript)
+    ]
+
+    with transaction.atomic():
+        locked = RecordingSession.objects.select_for_update().only('id', 'status').get(pk=session_id)
+        if locked.status == 'completed':
+            # Another attempt finished while this one was transcribing
+            return
+        ActionItem.objects.bulk_create(items, batch_size=500)
+        search.update_action_item_vectors([item.pk for item in items])
+        events.action_items_created(items)
+        dashboard.action_items_changed([(item.user_id, None, dashboard.item_state(item)) for item in items])
+        session.transcript = transcript
+        session.status = 'completed'
+        session.save(update_fields=['transcript', 'status', 'updated_at'])
+
+    if transcribed:
+        metering.record(session.user_id, transcriptions=1)
+
+
+def mark_failed(session_id):
+    session = RecordingSession.objects.only('id', 'user_id', 'status').filter(pk=session_id).first()
+    if session is None:
+        # Deleted while its job was being retried
+        return
+    previous = session.status
+    session.status, session.updated_at = 'failed', timezone.now()
+    RecordingSession.objects.filter(pk=session_id).update(
+        status=session.status, updated_at=session.updated_at,
+    )
+    events.session_status_changed(session, previous)
+    dashboard.session_status_changed(session.user_id, previous, session.status)
@@ -0,0 +1,137 @@
+"""
+Full-text search over recording sessions and action items.
+
+On PostgreSQL each row keeps a ``search_vector`` tsvector, refreshed with
+a single ``UPDATE`` whenever the text it covers changes, and GIN indexes
+over those columns serve ``websearch_to_tsquery`` matches, ``ts_rank``
+ordering and ``ts_headline`` snippets. Other databases (SQLite in tests
+and local development) fall back to case-insensitive substring matching.
+"""
+from django.conf import settings
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import F, Q
+
+from .models import ActionItem, RecordingSession
+
+# Text fields folded into each model's search vector, with their weights
+SESSION_FIELDS = (('title', 'A'), ('description', 'B'), ('transcript', 'C'))
+ACTION_ITEM_FIELDS = (('title', 'A'),)
+
+GIN_INDEXES = {
+    'rec_session_search_idx': RecordingSession,
+    'action_item_search_idx': ActionItem,
+}
+
+SNIPPET_CHARS = 160
+
+
+def is_supported(using='default'):
+    return connections[using].vendor == 'postgresql'
+
+
+def _vector(fields):
+    config = settings.SEARCH_CONFIG
+    vector = None
+    for name, weight in fields:
+        part = SearchVector(name, weight=weight, config=config)
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def update_session_vectors(pks):
+    """Recompute the search vector of the given sessions with one UPDATE."""
+    if pks and is_supported():
+        RecordingSession.objects.filter(pk__in=pks).update(search_vector=_vector(SESSION_FIELDS))
+
+
+def update_action_item_vectors(pks):
+    """Recompute the search vector of the given action items with one UPDATE."""
+    if pks and is_supported():
+        ActionItem.objects.filter(pk__in=pks).update(search_vector=_vector(ACTION_ITEM_FIELDS))
+
+
+def create_indexes(using='default'):
+    """Create the GIN indexes; they are PostgreSQL-only, so not in ``Meta.indexes``."""
+    if not is_supported(using):
+        return
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for name, model in GIN_INDEXES.items():
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {qn(name)} ON {qn(model._meta.db_table)} '
+                f'USING GIN ({qn("search_vector")})'
+            )
+
+
+def search_sessions(user, text, limit):
+    queryset = RecordingSession.objects.filter(user=user)
+    if not is_supported(queryset.db):
+        return _fallback(queryset.only('id', 'title', 'status', 'created_at', 'transcript'),
+                         text, 'transcript', [name for name, _ in SESSION_FIELDS], limit)
+
+    query = SearchQuery(text, search_type='websearch', config=settings.SEARCH_CONFIG)
+    return list(
+        queryset.filter(search_vector=query)
+        .only('id', 'title', 'status', 'created_at')
+        .annotate(
+            rank=SearchRank(F('search_vector'), query),
+            snippet=_headline('transcript', query),
+        )
+        .order_by('-rank', '-created_at')[:limit]
+    )
+
+
+def search_action_items(user, text, limit):
+    queryset = ActionItem.objects.filter(user=user)
+    if not is_supported(queryset.db):
+        return _fallback(queryset.only('id', 'session_id', 'title', 'status', 'priority', 'created_at'),
+                         text, 'title', [name for name, _ in ACTION_ITEM_FIELDS], limit)
+
+    query = SearchQuery(text, search_type='websearch', config=settings.SEARCH_CONFIG)
+    return list(
+        queryset.filter(search_vector=query)
+        .only('id', 'session_id', 'title', 'status', 'priority', 'created_at')
+        .annotate(
+            rank=SearchRank(F('search_vector'), query),
+            snippet=_headline('title', query),
+        )
+        .order_by('-rank', '-created_at')[:limit]
+    )
+
+
+def _headline(field, query):
+    return SearchHeadline(
+        field,
+        query,
+        config=settings.SEARCH_CONFIG,
+        start_sel='<mark>',
+        stop_sel='</mark>',
+        max_words=35,
+        min_words=15,
+        max_fragments=2,
+    )
+
+
+def _fallback(queryset, text, snippet_field, fields, limit):
+    """Every word must appear in at least one field; newest first, unranked."""
+    words = text.split()
+    for word in words:
+        match = Q()
+        for name in fields:
+            match |= Q(**{f'{name}__icontains': word})
+        queryset = queryset.filter(match)
+    results = list(queryset.order_by('-created_at')[:limit])
+    for result in results:
+        result.rank = None
+        result.snippet = _excerpt(getattr(result, snippet_field), words)
+    return results
+
+
+def _excerpt(value, words):
+    lowered = value.lower()
+    positions = [lowered.find(word.lower()) for word in words]
+    start = min((p for p in positions if p >= 0), default=0)
+    start = max(start - SNIPPET_CHARS // 4, 0)
+    return value[start:start + SNIPPET_CHARS]
@@ -1,9 +1,13 @@
+from django.utils import timezone
 from rest_framework import serializers
-from .models import RecordingSession, ActionItem, Comment
+from memo_ai_backend.instrumentation import InstrumentedSerializerMixin
+from . import events, search
+from .models import RecordingSession, ActionItem, Comment, AudioUpload
+from users import dashboard
 from users.serializers import UserSerializer
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     
     class Meta:
@@ -12,20 +16,196 @@ class CommentSerializer(serializers.ModelSerializer):
         read_only_fields = ['user', 'created_at', 'updated_at']
 
 
-class ActionItemSerializer(serializers.ModelSerializer):
+class SessionField(serializers.PrimaryKeyRelatedField):
+    """
+    Reference to one of the requesting user's sessions.
+
+    Resolves against ``context['sessions']`` (a ``{pk: session}`` map of the
+    caller's sessions) when it is present, so a bulk write checks ownership
+    without one query per item.
+    """
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        request = self.context.get('request')
+        if request is not None:
+            queryset = queryset.filter(user=request.user)
+        return queryset
+
+    def to_internal_value(self, data):
+        sessions = self.context.get('sessions')
+        if sessions is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return sessions[int(data)]
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+
+
+def _item_id(data):
+    try:
+        return int(data.get('id'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class ActionItemListSerializer(serializers.ListSerializer):
+    """
+    Writes many action items with one ``bulk_create``/``bulk_update``.
+
+    For updates ``instance`` is a ``{pk: ActionItem}`` map and every item in
+    the data must carry the ``id`` of one of those rows.
+    """
+    def to_internal_value(self, data):
+        self._seen_ids = set()
+        return super().to_internal_value(data)
+
+    def run_child_validation(self, data):
+        if self.instance is None:
+            return super().run_child_validation(data)
+        pk = _item_id(data)
+        if pk not in self.instance:
+            raise serializers.ValidationError({'id': ['Unknown action item.']})
+        if pk in self._seen_ids:
+            raise serializers.ValidationError({'id': ['Duplicate action item in request.']})
+        self._seen_ids.add(pk)
+        self.child.instance = self.instance[pk]
+        try:
+            return super().run_child_validation(data)
+        finally:
+            self.child.instance = None
+
+    def create(self, validated_data):
+        items = ActionItem.objects.bulk_create([ActionItem(**attrs) for attrs in validated_data])
+        # bulk_create() sends no post_save, so index, count and announce them here
+        search.update_action_item_vectors([item.pk for item in items])
+        events.action_items_created(items)
+        dashboard.action_items_changed([(item.user_id, None, dashboard.item_state(item)) for item in items])
+        return items
+
+    def update(self, instance, validated_data):
+        items = []
+        fields = {'updated_at'}
+        now = timezone.now()
+        for data, attrs in zip(self.initial_data, validated_data):
+            item = instance[_item_id(data)]
+            for attr, value in attrs.items():
+                setattr(item, attr, value)
+            # bulk_update() skips pre_save, so auto_now is not applied
+            item.updated_at = now
+            fields.update(attrs)
+            items.append(item)
+        ActionItem.objects.bulk_update(items, sorted(fields))
+        if 'title' in fields:
+            search.update_action_item_vectors([item.pk for item in items])
+        changes = []
+        for item in items:
+            current = dashboard.item_state(item)
+            changes.append((item.user_id, item._loaded_state, current))
+            item._loaded_state = current
+        dashboard.action_items_changed(changes)
+        return items
+
+
+class ActionItemSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
+    session = SessionField(queryset=RecordingSession.objects.all())
+
     class Meta:
         model = ActionItem
-        fields = '__all__'
+        exclude = ['search_vector']
         read_only_fields = ['user', 'created_at', 'updated_at']
+        list_serializer_class = ActionItemListSerializer
+
+    def validate(self, attrs):
+        """Stamp ``completed_at`` when an item becomes completed, clear it when it stops being."""
+        previous = self.instance.status if self.instance is not None else None
+        current = attrs.get('status', previous or 'pending')
+        if current != previous:
+            if current == 'completed':
+                attrs.setdefault('completed_at', timezone.now())
+            elif previous == 'completed':
+                attrs.setdefault('completed_at', None)
+        return attrs
 
 
-class RecordingSessionSerializer(serializers.ModelSerializer):
+class RecordingSessionSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     action_items = ActionItemSerializer(many=True, read_only=True)
     comments = CommentSerializer(many=True, read_only=True)
     
     class Meta:
         model = RecordingSession
-        fields = '__all__'
+        exclude = ['search_vector']
         read_only_fields = ['user', 'created_at', 'updated_at']
 
+
+class RecordingSessionListSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
+    """Slim representation for list views; counts come from annotations."""
+    action_item_count = serializers.IntegerField(read_only=True)
+    comment_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = RecordingSession
+        fields = [
+            'id', 'user', 'title', 'audio_file', 'duration', 'status',
+            'started_at', 'ended_at', 'created_at', 'updated_at',
+            'action_item_count', 'comment_count',
+        ]
+        read_only_fields = fields
+
+
+class AudioUploadSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
+    received_chunks = serializers.SerializerMethodField()
+    received_bytes = serializers.SerializerMethodField()
+
+    class Meta:
+        model = AudioUpload
+        fields = [
+            'id', 'session', 'filename', 'content_type', 'total_size', 'sha256',
+            'status', 'received_chunks', 'received_bytes', 'created_at', 'updated_at',
+        ]
+        read_only_fields = ['id', 'session', 'status', 'created_at', 'updated_at']
+
+    def get_received_chunks(self, obj):
+        return [chunk.index for chunk in obj.chunks.all()]
+
+    def get_received_bytes(self, obj):
+        return sum(chunk.size for chunk in obj.chunks.all())
+
+
+class SessionSearchResultSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
+    rank = serializers.FloatField(read_only=True, allow_null=True)
+    snippet = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = RecordingSession
+        fields = ['id', 'title', 'status', 'created_at', 'rank', 'snippet']
+        read_only_fields = fields
+
+
+class ActionItemSearchResultSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
+    rank = serializers.FloatField(read_only=True, allow_null=True)
+    snippet = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = ActionItem
+        fields = ['id', 'session', 'title', 'status', 'priority', 'created_at', 'rank', 'snippet']
+        read_only_fields = fields
+
+
+class SyncSessionSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
+    """Session row for delta sync; the transcript is fetched separately."""
+    class Meta:
+        model = RecordingSession
+        exclude = ['search_vector', 'transcript']
+        read_only_fields = ['user', 'created_at', 'updated_at']
+
+
+class SyncCommentSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Comment
+        fields = '__all__'
+        read_only_fields = ['user', 'created_at', 'updated_at']
@@ -0,0 +1,143 @@
+"""
+Signal handlers for the sessions app.
+"""
+from django.db.models import Count, QuerySet
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from users import dashboard
+
+from . import events, search
+from .models import ActionItem, Comment, RecordingSession, Tombstone
+
+_SEARCH_FIELDS = {
+    RecordingSession: [name for name, _ in search.SESSION_FIELDS],
+    ActionItem: [name for name, _ in search.ACTION_ITEM_FIELDS],
+}
+_UPDATERS = {
+    RecordingSession: search.update_session_vectors,
+    ActionItem: search.update_action_item_vectors,
+}
+
+
+def _search_text(instance):
+    # __dict__ rather than getattr so deferred fields are not loaded
+    return tuple(instance.__dict__.get(name) for name in _SEARCH_FIELDS[type(instance)])
+
+
+@receiver(post_init, sender=RecordingSession)
+@receiver(post_init, sender=ActionItem)
+def remember_search_text(sender, instance, **kwargs):
+    instance._search_text = _search_text(instance)
+
+
+@receiver(post_save, sender=RecordingSession)
+@receiver(post_save, sender=ActionItem)
+def refresh_search_vector(sender, instance, created, update_fields=None, **kwargs):
+    """Re-index a row only when the text its search vector covers changed."""
+    if update_fields is not None and not set(update_fields) & set(_SEARCH_FIELDS[sender]):
+        return
+    current = _search_text(instance)
+    if not created and current == instance._search_text:
+        return
+    _UPDATERS[sender]([instance.pk])
+    instance._search_text = current
+    # The in-memory vector is stale now; dropping it keeps later saves
+    # of this instance from writing it back.
+    instance.__dict__.pop('search_vector', None)
+
+
+_TOMBSTONE_KINDS = {
+    RecordingSession: 'session',
+    ActionItem: 'action_item',
+    Comment: 'comment',
+}
+
+
+def _cascaded(sender, origin):
+    """Whether this delete is implied by deleting some other model's row."""
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return origin is not None and origin_model is not sender
+
+
+@receiver(post_delete, sender=RecordingSession)
+@receiver(post_delete, sender=ActionItem)
+@receiver(post_delete, sender=Comment)
+def record_tombstone(sender, instance, origin=None, **kwargs):
+    """Leave a tombstone for delta sync, unless a parent's deletion implies this one."""
+    if _cascaded(sender, origin):
+        return
+    if sender is Comment:
+        # Sync is per session owner, who is not necessarily the author
+        user_id = RecordingSession.objects.filter(pk=instance.session_id).values_list('user_id', flat=True).first()
+    else:
+        user_id = instance.user_id
+    if user_id is not None:
+        Tombstone.objects.create(user_id=user_id, kind=_TOMBSTONE_KINDS[sender], object_id=instance.pk)
+
+
+@receiver(post_init, sender=RecordingSession)
+def remember_status(sender, instance, **kwargs):
+    instance._loaded_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=RecordingSession)
+def publish_status_change(sender, instance, created, **kwargs):
+    previous = instance._loaded_status
+    current = instance.__dict__.get('status')
+    if created:
+        dashboard.session_status_changed(instance.user_id, None, current)
+    elif current is not None and current != previous:
+        events.session_status_changed(instance, previous)
+        if previous is not None:
+            dashboard.session_status_changed(instance.user_id, previous, current)
+    instance._loaded_status = current
+
+
+@receiver(pre_delete, sender=RecordingSession)
+def count_removed_session(sender, instance, origin=None, **kwargs):
+    """
+    Take a session and its open action items off the dashboard.
+
+    The items' own deletes are skipped as cascades, so they are counted
+    here with one query. A deleted user's summary goes with the user.
+    """
+    if _cascaded(sender, origin):
+        return
+    dashboard.session_status_changed(instance.user_id, instance.status, None)
+    dashboard.open_items_removed(
+        ActionItem.objects.filter(session=instance, status__in=dashboard.OPEN_STATUSES).order_by()
+        .values_list('user_id', 'priority').annotate(count=Count('id'))
+    )
+
+
+@receiver(post_init, sender=ActionItem)
+def remember_item_state(sender, instance, **kwargs):
+    instance._loaded_state = dashboard.item_state(instance)
+
+
+@receiver(post_save, sender=ActionItem)
+def count_item_change(sender, instance, created, **kwargs):
+    current = dashboard.item_state(instance)
+    previous = instance._loaded_state
+    if created or (previous is not None and current != previous):
+        dashboard.action_items_changed([(instance.user_id, None if created else previous, current)])
+    instance._loaded_state = current
+
+
+@receiver(post_delete, sender=ActionItem)
+def count_removed_item(sender, instance, origin=None, **kwargs):
+    if not _cascaded(sender, origin):
+        dashboard.action_items_changed([(instance.user_id, dashboard.item_state(instance), None)])
+
+
+@receiver(post_save, sender=ActionItem)
+def publish_new_action_item(sender, instance, created, **kwargs):
+    if created:
+        events.action_items_created([instance])
+
+
+@receiver(post_save, sender=Comment)
+def publish_new_comment(sender, instance, created, **kwargs):
+    if created:
+        events.comment_created(instance, instance.session.user_id)
@@ -0,0 +1,69 @@
+"""
+Delta sync for offline-first clients.
+
+A sync token is an opaque, signed timestamp. ``changes(user, since)``
+returns every session, action item and comment of ``user`` written at or
+after that timestamp, plus tombstones for the ones deleted since, and a
+token to pass next time. Rows may be sent twice across syncs (clients
+upsert by id); none are skipped, because the next token is taken from
+before the queries ran, minus ``SYNC_CLOCK_SKEW`` seconds to cover
+transactions that commit after they stamped ``updated_at``.
+"""
+import datetime
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+from .models import ActionItem, Comment, RecordingSession, Tombstone
+
+TOKEN_SALT = 'sessions.sync'
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def make_token(moment):
+    return signing.dumps(moment.isoformat(), salt=TOKEN_SALT)
+
+
+def parse_token(token):
+    try:
+        return datetime.datetime.fromisoformat(signing.loads(token, salt=TOKEN_SALT))
+    except (signing.BadSignature, TypeError, ValueError):
+        raise InvalidToken('Invalid sync token')
+
+
+def changes(user, since=None):
+    """
+    Changes for ``user`` since the ``since`` timestamp, or everything when
+    it is ``None`` or older than the tombstone retention window (the
+    latter is flagged with ``reset`` so the client drops its local copy).
+    """
+    now = timezone.now()
+    next_token = make_token(now - datetime.timedelta(seconds=settings.SYNC_CLOCK_SKEW))
+    retention = datetime.timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    reset = since is not None and since < now - retention
+    if reset:
+        since = None
+
+    sessions = RecordingSession.objects.filter(user=user).defer('transcript')
+    action_items = ActionItem.objects.filter(user=user)
+    comments = Comment.objects.filter(session__user=user)
+    deleted = Tombstone.objects.none()
+    if since is not None:
+        sessions = sessions.filter(updated_at__gte=since)
+        action_items = action_items.filter(updated_at__gte=since)
+        comments = comments.filter(updated_at__gte=since)
+        deleted = Tombstone.objects.filter(user=user, deleted_at__gte=since)
+
+    return {
+        'token': next_token,
+        'full': since is None,
+        'reset': reset,
+        'sessions': sessions.order_by('updated_at'),
+        'action_items': action_items.order_by('updated_at'),
+        'comments': comments.order_by('updated_at'),
+        'deleted': deleted.order_by('deleted_at').values('kind', 'object_id', 'deleted_at'),
+    }
@@ -0,0 +1,11 @@
+"""
+Background tasks for recording sessions.
+"""
+from jobs.queue import task
+
+from .processing import mark_failed, process_session
+
+
+@task('sessions.process_recording', max_attempts=3, on_failure=mark_failed)
+def process_recording(session_id):
+    process_session(session_id)
@@ -0,0 +1,567 @@
+import asyncio
+import datetime
+import io
+import json
+import tempfile
+from unittest import mock
+
+from django.core import signing
+from django.core.management import call_command
+from django.db.models.fields.files import FieldFile
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from jobs.models import Job
+from users.models import User
+
+from . import events, search, sync
+from .models import ActionItem, AudioUpload, Comment, RecordingSession, Tombstone
+from .processing import extract_action_items, process_session
+from .transcripts import RangeNotSatisfiable, parse_range
+from .uploads import UploadError, finalize_upload, store_chunk
+
+
+def create_sessions(user, count, items=3, comments=2):
+    sessions = []
+    for i in range(count):
+        session = RecordingSession.objects.create(user=user, title=f'Session {i}', transcript='budget review')
+        ActionItem.objects.bulk_create(
+            [ActionItem(session=session, user=user, title=f'Follow up {j}') for j in range(items)]
+        )
+        Comment.objects.bulk_create(
+            [Comment(session=session, user=user, content='Noted') for _ in range(comments)]
+        )
+        sessions.append(session)
+    return sessions
+
+
+overlapping = []
+
+
+def extract_while_another_attempt_runs(transcript):
+    """Extractor that lets a second attempt finish the session first."""
+    if not overlapping:
+        overlapping.append(True)
+        process_session(RecordingSession.objects.get(title='Overlapping').pk)
+    return extract_action_items(transcript)
+
+
+# Audit entries are written inline (one INSERT per request) instead of by
+# the background thread, so every query lands in the test's count.
+@override_settings(AUDIT_LOG_SYNC=True)
+class RecordingSessionQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='owner', email='owner@example.com')
+        cls.sessions = create_sessions(cls.user, 25)
+        cls.small = create_sessions(cls.user, 1, items=1, comments=1)[0]
+        cls.large = create_sessions(cls.user, 1, items=15, comments=15)[0]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_queries_do_not_grow_with_page_size(self):
+        # Validators (sessions, action items, comments), the page, the audit entry
+        for page_size in (5, 20):
+            with self.subTest(page_size=page_size), self.assertNumQueries(5):
+                response = self.client.get(f'/api/sessions/sessions/?page_size={page_size}')
+            self.assertEqual(len(response.data['results']), page_size)
+
+    def test_detail_queries_do_not_grow_with_nested_rows(self):
+        # Validators, the session, its action items, its comments, the audit entry
+        for session, items in ((self.small, 1), (self.large, 15)):
+            with self.subTest(items=items), self.assertNumQueries(7):
+                response = self.client.get(f'/api/sessions/sessions/{session.pk}/')
+            self.assertEqual(len(response.data['action_items']), items)
+
+
+# QueryBudgetExceeded fails the request when a view runs more queries than
+# its query_budget allows
+@override_settings(QUERY_INSPECTION=True, QUERY_BUDGET_STRICT=True, AUDIT_LOG_SYNC=True)
+class SessionQueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='owner', email='owner@example.com')
+        cls.session = create_sessions(cls.user, 25)[0]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_reads_stay_within_budget(self):
+        item = self.session.action_items.first()
+        for url in (
+            '/api/sessions/sessions/',
+            f'/api/sessions/sessions/{self.session.pk}/',
+            f'/api/sessions/sessions/{self.session.pk}/transcript/',
+            '/api/sessions/action-items/',
+            f'/api/sessions/action-items/{item.pk}/',
+            '/api/sessions/search/?q=budget',
+            '/api/sessions/sync/',
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_bulk_writes_stay_within_budget(self):
+        response = self.client.post(
+            '/api/sessions/action-items/bulk/',
+            [{'session': self.session.pk, 'title': f'Item {i}'} for i in range(20)],
+            format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+        response = self.client.patch(
+            '/api/sessions/action-items/bulk/',
+            [{'id': item['id'], 'status': 'completed'} for item in response.data],
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class ActionItemSessionOwnershipTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='owner', email='owner@example.com')
+        cls.other = User.objects.create(username='other', email='other@example.com')
+        cls.own_session = RecordingSession.objects.create(user=cls.user, title='Mine')
+        cls.other_session = RecordingSession.objects.create(user=cls.other, title='Theirs')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_create_rejects_another_users_session(self):
+        response = self.client.post(
+            '/api/sessions/action-items/', {'session': self.other_session.pk, 'title': 'Sneak in'}, format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('session', response.data)
+        self.assertFalse(ActionItem.objects.filter(session=self.other_session).exists())
+
+    def test_create_accepts_own_session(self):
+        response = self.client.post(
+            '/api/sessions/action-items/', {'session': self.own_session.pk, 'title': 'Follow up'}, format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def test_bulk_create_rejects_another_users_session(self):
+        response = self.client.post(
+            '/api/sessions/action-items/bulk/',
+            [{'session': self.own_session.pk, 'title': 'Mine'}, {'session': self.other_session.pk, 'title': 'Theirs'}],
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ActionItem.objects.exists())
+
+
+class BulkActionItemUpdateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='owner', email='owner@example.com')
+        cls.other = User.objects.create(username='other', email='other@example.com')
+        cls.session = create_sessions(cls.user, 1, items=3, comments=0)[0]
+        cls.theirs = create_sessions(cls.other, 1, items=1, comments=0)[0].action_items.get()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.items = list(self.session.action_items.order_by('pk'))
+
+    def patch(self, data):
+        return self.client.patch('/api/sessions/action-items/bulk/', data, format='json')
+
+    def test_completed_at_follows_status(self):
+        first, second = self.items[:2]
+        response = self.patch([{'id': first.pk, 'status': 'completed'}, {'id': second.pk, 'status': 'completed'}])
+        self.assertEqual(response.status_code, 200)
+        first.refresh_from_db()
+        self.assertIsNotNone(first.completed_at)
+
+        response = self.patch([{'id': first.pk, 'status': 'pending'}])
+        self.assertEqual(response.status_code, 200)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertIsNone(first.completed_at)
+        self.assertIsNotNone(second.completed_at)
+
+    def test_each_item_gets_its_own_changes(self):
+        # Submitted out of primary key order, so a pairing by position in
+        # the instance map instead of the request would swap the rows.
+        third, first, second = self.items[2], self.items[0], self.items[1]
+        response = self.patch([
+            {'id': third.pk, 'status': 'completed'},
+            {'id': first.pk, 'priority': 'high'},
+            {'id': second.pk, 'title': 'Renamed', 'status': 'in_progress'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in response.data], [third.pk, first.pk, second.pk])
+        rows = ActionItem.objects.in_bulk([item.pk for item in self.items])
+        self.assertEqual(
+            (rows[third.pk].status, rows[third.pk].priority, rows[third.pk].title),
+            ('completed', 'medium', third.title),
+        )
+        self.assertEqual((rows[first.pk].status, rows[first.pk].priority), ('pending', 'high'))
+        self.assertEqual((rows[second.pk].status, rows[second.pk].title), ('in_progress', 'Renamed'))
+
+    def test_unknown_or_foreign_ids_update_nothing(self):
+        for foreign in (self.theirs.pk, self.theirs.pk + 1000):
+            with self.subTest(id=foreign):
+                response = self.patch([
+                    {'id': self.items[0].pk, 'status': 'completed'},
+                    {'id': foreign, 'status': 'completed'},
+                ])
+                self.assertEqual(response.status_code, 400)
+                errors = response.data['errors']
+                self.assertEqual(len(errors), 2)
+                self.assertEqual(errors[0], {})
+                self.assertIn('id', errors[1])
+                self.assertFalse(ActionItem.objects.filter(status='completed').exists())
+
+    def test_duplicate_ids_are_rejected(self):
+        item = self.items[0]
+        response = self.patch([{'id': item.pk, 'status': 'completed'}, {'id': item.pk, 'status': 'pending'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('id', response.data['errors'][1])
+        item.refresh_from_db()
+        self.assertEqual(item.status, 'pending')
+
+
+class SearchFallbackTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='owner', email='owner@example.com')
+        cls.other = User.objects.create(username='other', email='other@example.com')
+        cls.session = RecordingSession.objects.create(
+            user=cls.user, title='Quarterly planning',
+            transcript='Opening remarks. ' * 40 + 'We agreed the Budget review moves to Friday. ' + 'Closing. ' * 40,
+        )
+        cls.item = ActionItem.objects.create(session=cls.session, user=cls.user, title='Send budget numbers')
+        RecordingSession.objects.create(user=cls.user, title='Standup', transcript='Budget is fine')
+        theirs = RecordingSession.objects.create(
+            user=cls.other, title='Budget review', transcript='Budget review with finance',
+        )
+        ActionItem.objects.create(session=theirs, user=cls.other, title='Budget review follow up')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, **params):
+        return self.client.get('/api/sessions/search/', params)
+
+    def test_every_word_must_match_within_the_users_rows(self):
+        response = self.search(q='budget review')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['id'] for result in response.data['sessions']], [self.session.pk])
+        self.assertEqual(response.data['action_items'], [])
+
+        response = self.search(q='budget')
+        self.assertEqual(len(response.data['sessions']), 2)
+        self.assertEqual([result['id'] for result in response.data['action_items']], [self.item.pk])
+        self.assertEqual(response.data['action_items'][0]['session'], self.session.pk)
+
+    def test_snippet_comes_from_around_the_match(self):
+        result = self.search(q='budget review').data['sessions'][0]
+        self.assertIsNone(result['rank'])
+        self.assertIn('Budget review', result['snippet'])
+        self.assertFalse(self.session.transcript.startswith(result['snippet']))
+        self.assertLessEqual(len(result['snippet']), search.SNIPPET_CHARS)
+
+    def test_limit_caps_each_list(self):
+        response = self.search(q='budget', limit=1)
+        self.assertEqual(len(response.data['sessions']), 1)
+
+    def test_bad_parameters_are_rejected(self):
+        for params in ({}, {'q': '  '}, {'q': 'budget', 'limit': 'ten'}, {'q': 'budget', 'limit': -1}):
+            with self.subTest(params=params):
+                self.assertEqual(self.search(**params).status_code, 400)
+
+
+class TranscriptTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='owner', email='owner@example.com')
+        cls.session = RecordingSession.objects.create(user=cls.user, title='Standup', transcript='abcdefghij')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/sessions/sessions/{self.session.pk}/transcript/'
+
+    def test_offset_and_length(self):
+        response = self.client.get(self.url, {'offset': 2, 'length': 3})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'cde')
+        self.assertEqual(response['Content-Range'], 'chars 2-4/10')
+
+        response = self.client.get(self.url, {'offset': 7})
+        self.assertEqual(b''.join(response.streaming_content), b'hij')
+        self.assertEqual(response['Content-Range'], 'chars 7-9/10')
+
+    def test_offset_past_the_end_is_not_satisfiable(self):
+        for offset in (10, 50):
+            with self.subTest(offset=offset):
+                response = self.client.get(self.url, {'offset': offset, 'length': 5})
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response['Content-Range'], 'chars */10')
+
+    def test_bad_length_is_rejected(self):
+        for params in ({'offset': 0, 'length': 0}, {'offset': 3, 'length': -1}, {'offset': 'x'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+
+
+class SyncTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='owner', email='owner@example.com')
+        cls.other = User.objects.create(username='other', email='other@example.com')
+        cls.session, cls.kept = create_sessions(cls.user, 2, items=2, comments=1)
+        create_sessions(cls.other, 1)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def sync(self, since=None):
+        response = self.client.get('/api/sessions/sync/', {'since': since} if since else {})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_full_sync_returns_only_the_users_rows(self):
+        data = self.sync()
+        self.assertTrue(data['full'])
+        self.assertFalse(data['reset'])
+        self.assertEqual(len(data['sessions']), 2)
+        self.assertEqual(len(data['action_items']), 4)
+        self.assertEqual(len(data['comments']), 2)
+        self.assertEqual(data['deleted'], [])
+
+    def test_delta_returns_rows_written_and_deleted_since_the_token(self):
+        # Backdate everything so only what happens below is newer than the token
+        past = timezone.now() - datetime.timedelta(hours=1)
+        for model in (RecordingSession, ActionItem, Comment):
+            model.objects.update(updated_at=past)
+        since = sync.make_token(timezone.now() - datetime.timedelta(minutes=1))
+
+        created = ActionItem.objects.create(session=self.kept, user=self.user, title='New')
+        updated = self.kept.action_items.exclude(pk=created.pk).first()
+        updated.status = 'completed'
+        updated.save()
+        comment_id, session_id = self.kept.comments.get().pk, self.session.pk
+        Comment.objects.get(pk=comment_id).delete()
+        self.session.delete()
+
+        data = self.sync(since)
+        self.assertFalse(data['full'])
+        self.assertEqual(data['sessions'], [])
+        self.assertEqual({item['id'] for item in data['action_items']}, {created.pk, updated.pk})
+        self.assertEqual(data['comments'], [])
+        self.assertEqual(
+            [(row['kind'], row['object_id']) for row in data['deleted']],
+            [('comment', comment_id), ('session', session_id)],
+        )
+
+    @override_settings(SYNC_CLOCK_SKEW=60)
+    def test_next_token_overlaps_by_the_clock_skew(self):
+        now = timezone.now()
+        with mock.patch('sessions.sync.timezone.now', return_value=now):
+            token = self.sync()['token']
+        self.assertEqual(sync.parse_token(token), now - datetime.timedelta(seconds=60))
+        # Rows written just before that sync ran are sent again
+        data = self.sync(token)
+        self.assertEqual(len(data['sessions']), 2)
+
+    @override_settings(SYNC_TOMBSTONE_RETENTION_DAYS=30)
+    def test_token_older_than_tombstone_retention_resets(self):
+        data = self.sync(sync.make_token(timezone.now() - datetime.timedelta(days=31)))
+        self.assertTrue(data['full'])
+        self.assertTrue(data['reset'])
+        self.assertEqual(len(data['sessions']), 2)
+
+    def test_tampered_or_foreign_tokens_are_rejected(self):
+        token = self.sync()['token']
+        tampered = token[:-1] + ('A' if token[-1] != 'A' else 'B')
+        foreign = signing.dumps(timezone.now().isoformat(), salt='elsewhere')
+        for since in (tampered, foreign, 'garbage'):
+            with self.subTest(since=since):
+                response = self.client.get('/api/sessions/sync/', {'since': since})
+                self.assertEqual(response.status_code, 400)
+        with self.assertRaises(sync.InvalidToken):
+            sync.parse_token(signing.dumps('not a timestamp', salt=sync.TOKEN_SALT))
+
+    def test_cascaded_deletes_leave_no_tombstones(self):
+        session_id = self.session.pk
+        self.session.delete()
+        self.assertEqual(list(Tombstone.objects.values_list('kind', 'object_id')), [('session', session_id)])
+
+    def test_comment_tombstone_belongs_to_the_session_owner(self):
+        comment = Comment.objects.create(session=self.kept, user=self.other, content='Drive-by')
+        comment_id = comment.pk
+        comment.delete()
+        tombstone = Tombstone.objects.get()
+        self.assertEqual((tombstone.user_id, tombstone.kind, tombstone.object_id),
+                         (self.user.pk, 'comment', comment_id))
+
+    @override_settings(SYNC_TOMBSTONE_RETENTION_DAYS=30)
+    def test_prune_tombstones(self):
+        now = timezone.now()
+        old = Tombstone.objects.create(user=self.user, kind='session', object_id=1,
+                                       deleted_at=now - datetime.timedelta(days=31))
+        recent = Tombstone.objects.create(user=self.user, kind='session', object_id=2,
+                                          deleted_at=now - datetime.timedelta(days=29))
+        call_command('prune_tombstones', stdout=io.StringIO())
+        self.assertEqual(list(Tombstone.objects.values_list('pk', flat=True)), [recent.pk])
+        self.assertFalse(Tombstone.objects.filter(pk=old.pk).exists())
+
+
+class SessionEventTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='owner', email='owner@example.com')
+        cls.other = User.objects.create(username='other', email='other@example.com')
+        cls.session = RecordingSession.objects.create(user=cls.user, title='Mine')
+        cls.other_session = RecordingSession.objects.create(user=cls.other, title='Theirs')
+
+    def setUp(self):
+        self.broker = events.EventBroker(queue_size=10)
+        patcher = mock.patch('sessions.events.broker', self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def subscribe(self, user):
+        async def subscribe():
+            return self.broker.subscribe(user.pk)
+        return self.loop.run_until_complete(subscribe())
+
+    def received(self, subscriber):
+        async def drain():
+            messages = []
+            while (message := await subscriber.get(0.01)) is not None:
+                messages.append(message)
+            return messages
+        return self.loop.run_until_complete(drain())
+
+    def read_stream(self, subscriber, max_duration=1):
+        async def read():
+            return [chunk async for chunk in events.stream(subscriber, 0.01, max_duration)]
+        return self.loop.run_until_complete(read())
+
+    def test_subscribers_get_their_own_users_events_after_commit(self):
+        mine, theirs = self.subscribe(self.user), self.subscribe(self.other)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.session.status = 'processing'
+            self.session.save()
+            item = ActionItem.objects.create(session=self.session, user=self.user, title='Follow up')
+            comment = Comment.objects.create(session=self.session, user=self.other, content='Noted')
+            self.other_session.status = 'processing'
+            self.other_session.save()
+            # Nothing is sent before the transaction commits
+            self.assertEqual(self.received(mine), [])
+
+        self.assertEqual(
+            [(message['event'], message['data']['id']) for message in self.received(mine)],
+            [('session.status', self.session.pk), ('action_item.created', item.pk), ('comment.created', comment.pk)],
+        )
+        self.assertEqual(
+            [(message['event'], message['data']['id']) for message in self.received(theirs)],
+            [('session.status', self.other_session.pk)],
+        )
+
+    def test_full_queue_ends_the_stream_with_overflow(self):
+        self.broker.queue_size = 1
+        subscriber = self.subscribe(self.user)
+        for i in range(2):
+            self.broker.dispatch(events._encode(self.user.pk, 'session.status', {'id': i}))
+        chunks = self.read_stream(subscriber)
+        self.assertEqual(chunks[-1], 'event: overflow\ndata: {}\n\n')
+        self.assertEqual(self.broker.stats()['streams'], 0)
+
+    def test_finished_stream_unsubscribes(self):
+        subscriber = self.subscribe(self.user)
+        self.broker.dispatch(events._encode(self.user.pk, 'session.status', {'id': 1}))
+        self.assertEqual(self.broker.stats()['streams'], 1)
+        chunks = self.read_stream(subscriber, max_duration=0.05)
+        self.assertEqual(chunks[0], 'retry: 3000\n\n')
+        self.assertEqual(chunks[1], 'event: session.status\ndata: {"id": 1}\n\n')
+        self.assertEqual(self.broker.stats(), {'users': 0, 'streams': 0, 'dispatched': 1})
+
+    def test_oversized_payloads_keep_only_ids(self):
+        payload = events._encode(self.user.pk, 'action_item.created', {
+            'id': 1, 'session': 2, 'title': 'x' * events.MAX_PAYLOAD,
+        })
+        self.assertLess(len(payload.encode()), events.MAX_PAYLOAD)
+        self.assertEqual(json.loads(payload)['data'], {'id': 1, 'session': 2, 'truncated': True})
+
+    def test_stream_requires_asgi_and_credentials(self):
+        self.assertEqual(self.client.get('/api/sessions/events/').status_code, 501)
+        response = self.loop.run_until_complete(AsyncClient().get('/api/sessions/events/'))
+        self.assertEqual(response.status_code, 401)
+
+
+class ParseRangeTests(SimpleTestCase):
+    def test_ranges(self):
+        self.assertEqual(parse_range('chars=0-9', 100), (0, 10))
+        self.assertEqual(parse_range('chars=90-', 100), (90, 100))
+        self.assertEqual(parse_range('chars=-10', 100), (90, 100))
+        self.assertEqual(parse_range('chars=-500', 100), (0, 100))
+        self.assertIsNone(parse_range('bytes=0-9', 100))
+
+    def test_unsatisfiable_ranges(self):
+        for header, total in (('chars=100-', 100), ('chars=5-2', 100), ('chars=-0', 100), ('chars=-5', 0)):
+            with self.subTest(header=header, total=total), self.assertRaises(RangeNotSatisfiable):
+                parse_range(header, total)
+
+
+class FinalizeUploadTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=media.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        self.user = User.objects.create(username='owner', email='owner@example.com')
+        session = RecordingSession.objects.create(user=self.user, title='Standup')
+        self.upload = AudioUpload.objects.create(session=session, user=self.user, filename='standup.webm')
+        store_chunk(self.upload, 0, io.BytesIO(b'a' * 1000))
+        store_chunk(self.upload, 1, io.BytesIO(b'b' * 500))
+
+    @mock.patch('sessions.uploads.metering.record')
+    def test_concurrent_finalize_bills_once(self, record):
+        first = AudioUpload.objects.get(pk=self.upload.pk)
+        second = AudioUpload.objects.get(pk=self.upload.pk)
+        original_save = FieldFile.save
+
+        def save_then_let_first_finish(field_file, name, content, save=True):
+            # The second call has streamed its copy but not yet committed
+            original_save(field_file, name, content, save)
+            patcher.stop()
+            finalize_upload(first, duration=90)
+
+        patcher = mock.patch.object(FieldFile, 'save', save_then_let_first_finish)
+        patcher.start()
+        with self.assertRaisesMessage(UploadError, 'no longer open'):
+            finalize_upload(second, duration=90)
+
+        record.assert_called_once()
+        self.assertEqual(Job.objects.filter(task__endswith='process_recording').count(), 1)
+        self.assertEqual(AudioUpload.objects.get(pk=self.upload.pk).status, 'completed')
+
+
+class ProcessSessionTests(TestCase):
+    @override_settings(SESSION_ACTION_ITEM_EXTRACTOR='sessions.tests.extract_while_another_attempt_runs')
+    def test_overlapping_attempts_create_items_once(self):
+        user = User.objects.create(username='owner', email='owner@example.com')
+        session = RecordingSession.objects.create(
+            user=user, title='Overlapping', transcript='Action item: send the deck\nTODO: book the room',
+        )
+        overlapping.clear()
+
+        process_session(session.pk)
+
+        self.assertEqual(session.action_items.count(), 2)
+        self.assertEqual(RecordingSession.objects.get(pk=session.pk).status, 'completed')
@@ -0,0 +1,80 @@
+"""
+Chunked transcript reads that never load the whole column at once.
+"""
+import re
+
+from django.db.models.functions import Substr
+
+from .models import RecordingSession
+
+RANGE_UNIT = 'chars'
+
+_RANGE_RE = re.compile(r'^\s*chars\s*=\s*(\d*)\s*-\s*(\d*)\s*$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, total):
+    """
+    Parse a ``Range: chars=start-end`` header into a half-open interval.
+
+    Offsets count characters, not bytes, so a range never splits a
+    multi-byte character. Returns ``None`` for a missing or malformed
+    header (serve everything) and raises ``RangeNotSatisfiable`` for a
+    range starting past the end or selecting no characters.
+    """
+    match = _RANGE_RE.match(header or '')
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N characters.
+        if int(last) == 0 or total == 0:
+            raise RangeNotSatisfiable()
+        return max(total - int(last), 0), total
+    start = int(first)
+    end = total if not last else min(int(last) + 1, total)
+    if start >= total or start >= end:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+def parse_offset(offset, length, total):
+    """
+    Turn ``?offset=&length=`` into a half-open interval, like ``parse_range``.
+
+    A missing ``length`` runs to the end. Raises ``ValueError`` for values
+    that are not integers or a length below one, and ``RangeNotSatisfiable``
+    for an offset at or past the end.
+    """
+    try:
+        start = max(int(offset), 0)
+        count = None if length is None else int(length)
+    except ValueError:
+        raise ValueError('offset and length must be integers')
+    if count is not None and count < 1:
+        raise ValueError('length must be positive')
+    if start >= total:
+        raise RangeNotSatisfiable()
+    return start, total if count is None else min(start + count, total)
+
+
+def iter_transcript(session_pk, start, end, chunk_size):
+    """Yield ``transcript[start:end]`` one ``chunk_size`` substring at a time."""
+    position = start
+    while position < end:
+        length = min(chunk_size, end - position)
+        chunk = (
+            RecordingSession.objects.filter(pk=session_pk)
+            .annotate(chunk=Substr('transcript', position + 1, length))
+            .values_list('chunk', flat=True)
+            .first()
+        )
+        if not chunk:
+            return
+        yield chunk
+        position += len(chunk)
@@ -0,0 +1,179 @@
+"""
+Chunked audio uploads streamed straight to storage.
+
+Chunk bodies are copied from the request stream to the storage backend in
+small blocks while a SHA-256 is computed on the fly, and finalising
+concatenates the stored parts the same way, so neither step ever holds a
+whole recording in memory or spools it through Django's upload handlers.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from users import metering
+
+from .models import AudioUpload, AudioUploadChunk
+
+BLOCK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """Raised for chunk or finalize requests that cannot be honoured."""
+
+
+class HashingReader:
+    """File-like wrapper that hashes and counts bytes as they are read."""
+    def __init__(self, stream, limit=None):
+        self.stream = stream
+        self.limit = limit
+        self.size = 0
+        self._hash = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self.stream.read(size if size and size > 0 else BLOCK_SIZE)
+        self.size += len(data)
+        if self.limit is not None and self.size > self.limit:
+            raise UploadError(f'Chunk exceeds the {self.limit} byte limit')
+        self._hash.update(data)
+        return data
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+
+class ChunkChainReader:
+    """Reads a sequence of stored chunk files as one continuous stream."""
+    def __init__(self, names, storage=default_storage):
+        self._names = iter(names)
+        self._storage = storage
+        self._current = None
+
+    def read(self, size=-1):
+        size = size if size and size > 0 else BLOCK_SIZE
+        while True:
+            if self._current is None:
+                name = next(self._names, None)
+                if name is None:
+                    return b''
+                self._current = self._storage.open(name, 'rb')
+            data = self._current.read(size)
+            if data:
+                return data
+            self._current.close()
+            self._current = None
+
+
+def chunk_name(upload, index):
+    return f'uploads/{upload.pk}/{index:06d}.part'
+
+
+def store_chunk(upload, index, stream, expected_sha256=''):
+    """
+    Stream one chunk from ``stream`` into storage and record it.
+
+    Re-sending an index replaces the earlier copy, which is how a client
+    resumes after a dropped connection.
+    """
+    if upload.status != 'open':
+        raise UploadError('Upload is no longer open')
+
+    reader = HashingReader(stream, limit=settings.AUDIO_UPLOAD_MAX_CHUNK_SIZE)
+    name = default_storage.get_available_name(chunk_name(upload, index))
+    try:
+        name = default_storage.save(name, File(reader))
+    except Exception:
+        # Drop whatever part of an oversized or interrupted body was written
+        default_storage.delete(name)
+        raise
+    checksum = reader.hexdigest()
+
+    if reader.size == 0 or (expected_sha256 and expected_sha256.lower() != checksum):
+        default_storage.delete(name)
+        raise UploadError('Chunk is empty' if reader.size == 0 else 'Chunk checksum mismatch')
+
+    previous = AudioUploadChunk.objects.filter(upload=upload, index=index).first()
+    chunk, _ = AudioUploadChunk.objects.update_or_create(
+        upload=upload,
+        index=index,
+        defaults={'file': name, 'size': reader.size, 'sha256': checksum},
+    )
+    if previous and previous.file.name != name:
+        default_storage.delete(previous.file.name)
+    return chunk
+
+
+def finalize_upload(upload, duration=None, expected_sha256=''):
+    """
+    Assemble the chunks into the session's ``audio_file``.
+
+    The parts are streamed from storage into the final file, and the
+    session's status and duration are updated without reading it back.
+    The session is then queued for background processing. Of concurrent
+    calls for one upload, only the first to commit completes it; the
+    others discard their copy and raise ``UploadError``.
+    """
+    if upload.status != 'open':
+        raise UploadError('Upload is no longer open')
+
+    chunks = list(upload.chunks.order_by('index'))
+    if not chunks:
+        raise UploadError('No chunks have been uploaded')
+    missing = sorted(set(range(chunks[-1].index + 1)) - {c.index for c in chunks})
+    if missing:
+        raise UploadError(f'Missing chunks: {missing}')
+    total_size = sum(c.size for c in chunks)
+    if upload.total_size is not None and upload.total_size != total_size:
+        raise UploadError(f'Expected {upload.total_size} bytes, received {total_size}')
+
+    reader = HashingReader(ChunkChainReader([c.file.name for c in chunks]))
+    session = upload.session
+    try:
+        session.audio_file.save(upload.filename, File(reader), save=False)
+    except OSError:
+        # A concurrent finalize completed first and deleted the chunks
+        if not AudioUpload.objects.filter(pk=upload.pk, status='open').exists():
+            raise UploadError('Upload is no longer open')
+        raise
+
+    expected_sha256 = (expected_sha256 or upload.sha256).lower()
+    if expected_sha256 and expected_sha256 != reader.hexdigest():
+        session.audio_file.delete(save=False)
+        raise UploadError('File checksum mismatch')
+
+    from .tasks import process_recording
+
+    with transaction.atomic():
+        # Re-checked under the row lock so the recording is only queued and billed once
+        if AudioUpload.objects.select_for_update().get(pk=upload.pk).status != 'open':
+            session.audio_file.delete(save=False)
+            raise UploadError('Upload is no longer open')
+        session.status = 'processing'
+        update_fields = ['audio_file', 'status', 'updated_at']
+        if duration is not None:
+            session.duration = duration
+            update_fields.append('duration')
+        session.save(update_fields=update_fields)
+
+        upload.status = 'completed'
+        upload.sha256 = reader.hexdigest()
+        upload.total_size = total_size
+        upload.save(update_fields=['status', 'sha256', 'total_size', 'updated_at'])
+        upload.chunks.all().delete()
+        process_recording.enqueue(session_id=session.pk)
+
+    metering.record(session.user_id, recordings=1, minutes=session.duration / 60)
+
+    for chunk in chunks:
+        default_storage.delete(chunk.file.name)
+    return session
+
+
+def discard_upload(upload):
+    """Delete an upload and any chunks stored for it."""
+    names = [c.file.name for c in upload.chunks.all()]
+    upload.delete()
+    for name in names:
+        default_storage.delete(name)
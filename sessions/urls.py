@@ -1,12 +1,32 @@
-from django.urls import path, include
+from django.conf import settings
+from django.urls import path, include, re_path
 from rest_framework.routers import DefaultRouter
+from memo_ai_backend.async_views import async_view
 from . import views
 
 router = DefaultRouter()
 router.register(r'sessions', views.RecordingSessionViewSet)
 router.register(r'action-items', views.ActionItemViewSet)
+router.register(r'uploads', views.AudioUploadViewSet)
 
 urlpatterns = [
+    path('search/', views.SearchView.as_view(), name='session-search'),
+    path('sync/', views.SyncView.as_view(), name='session-sync'),
+    path('events/', views.session_events, name='session-events'),
     path('', include(router.urls)),
 ]
 
+
+if settings.ASYNC_VIEWS:
+    # Same routes and names as the router's, served through async views
+    urlpatterns = [
+        path('sessions/', async_view(
+            views.RecordingSessionViewSet, {'get': 'list', 'post': 'create'},
+            basename='recordingsession', detail=False,
+        ), name='recordingsession-list'),
+        re_path(r'^sessions/(?P<pk>[^/.]+)/$', async_view(
+            views.RecordingSessionViewSet,
+            {'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'},
+            basename='recordingsession', detail=True,
+        ), name='recordingsession-detail'),
+    ] + urlpatterns
@@ -1,21 +1,92 @@
-from rest_framework import viewsets, status
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce, Length
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from rest_framework import exceptions, mixins, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import RecordingSession, ActionItem, Comment
+from rest_framework.views import APIView
+from memo_ai_backend.conditional import ConditionalGetMixin
+from memo_ai_backend.instrumentation import InstrumentedViewMixin
+from memo_ai_backend.pagination import CreatedAtCursorPagination
+from subscriptions.entitlements import has_quota
+from users.authentication import SupabaseJWTAuthentication
+from .models import RecordingSession, ActionItem, Comment, AudioUpload
 from .serializers import (
     RecordingSessionSerializer,
+    RecordingSessionListSerializer,
     ActionItemSerializer,
-    CommentSerializer
+    ActionItemSearchResultSerializer,
+    CommentSerializer,
+    AudioUploadSerializer,
+    SessionSearchResultSerializer,
+    SyncCommentSerializer,
+    SyncSessionSerializer,
 )
+from . import events, search, sync
+from .tasks import process_recording
+from .uploads import UploadError, discard_upload, finalize_upload, store_chunk
+from .transcripts import RANGE_UNIT, RangeNotSatisfiable, iter_transcript, parse_offset, parse_range
 
 
-class RecordingSessionViewSet(viewsets.ModelViewSet):
+def _count_per_session(model):
+    """Correlated COUNT(*) of ``model`` rows for each session."""
+    counts = (
+        model.objects.filter(session=OuterRef('pk'))
+        .order_by()
+        .values('session')
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+class RecordingSessionViewSet(InstrumentedViewMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """Recording session management."""
     serializer_class = RecordingSessionSerializer
     queryset = RecordingSession.objects.all()
+    pagination_class = CreatedAtCursorPagination
+    query_budget = {'list': 4, 'retrieve': 6, 'transcript': 1}
     
     def get_queryset(self):
-        return RecordingSession.objects.filter(user=self.request.user)
+        queryset = RecordingSession.objects.filter(user=self.request.user)
+        if self.action == 'list':
+            # Heavy text columns are only served by the detail and transcript views
+            return queryset.defer('description', 'transcript').annotate(
+                action_item_count=_count_per_session(ActionItem),
+                comment_count=_count_per_session(Comment),
+            )
+        if self.action in ('retrieve', 'update', 'partial_update'):
+            # Load the nested serializer's relations in a fixed number of queries
+            return queryset.select_related('user').prefetch_related(
+                'action_items',
+                Prefetch('comments', queryset=Comment.objects.select_related('user')),
+            )
+        if self.action == 'transcript':
+            return queryset.only('id').annotate(transcript_length=Length('transcript'))
+        return queryset
+    
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return RecordingSessionListSerializer
+        return RecordingSessionSerializer
+    
+    def get_conditional_sources(self):
+        # Lists show action item/comment counts and details nest the rows,
+        # so both change the payload without touching the session itself.
+        sessions = RecordingSession.objects.filter(user=self.request.user)
+        if self.action == 'retrieve':
+            sessions = sessions.filter(pk=self.kwargs['pk'])
+            related = {'session_id': self.kwargs['pk']}
+        else:
+            related = {'session__user': self.request.user}
+        return [
+            self.conditional_source(sessions),
+            self.conditional_source(ActionItem.objects.filter(**related)),
+            self.conditional_source(Comment.objects.filter(**related)),
+        ]
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -28,16 +99,296 @@ class RecordingSessionViewSet(viewsets.ModelViewSet):
             serializer.save(session=session, user=request.user)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=True, methods=['post'])
+    def uploads(self, request, pk=None):
+        """Start a chunked, resumable upload of the session's audio file."""
+        session = self.get_object()
+        serializer = AudioUploadSerializer(data=request.data)
+        if serializer.is_valid():
+            serializer.save(session=session, user=request.user)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=True, methods=['post'])
+    def process(self, request, pk=None):
+        """Queue the session for transcription and action-item extraction."""
+        session = self.get_object()
+        if session.status in ('processing', 'completed'):
+            return Response(
+                {'detail': f'Session is already {session.status}'},
+                status=status.HTTP_409_CONFLICT,
+            )
+        session.status = 'processing'
+        with transaction.atomic():
+            session.save(update_fields=['status', 'updated_at'])
+            process_recording.enqueue(session_id=session.pk)
+        return Response({'status': session.status}, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=True, methods=['get'])
+    def transcript(self, request, pk=None):
+        """
+        Stream the transcript as plain text in chunks.
+
+        A slice can be requested with ``Range: chars=start-end`` or with
+        ``?offset=&length=``; both count characters.
+        """
+        session = self.get_object()
+        total = session.transcript_length or 0
+        
+        try:
+            bounds = parse_range(request.META.get('HTTP_RANGE'), total)
+            if bounds is None and 'offset' in request.query_params:
+                bounds = parse_offset(
+                    request.query_params['offset'], request.query_params.get('length'), total,
+                )
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response['Content-Range'] = f'{RANGE_UNIT} */{total}'
+            return response
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        start, end = bounds or (0, total)
+        response = StreamingHttpResponse(
+            iter_transcript(session.pk, start, end, settings.TRANSCRIPT_CHUNK_SIZE),
+            content_type='text/plain; charset=utf-8',
+            status=status.HTTP_206_PARTIAL_CONTENT if bounds else status.HTTP_200_OK,
+        )
+        response['Accept-Ranges'] = RANGE_UNIT
+        response['X-Transcript-Length'] = str(total)
+        if bounds:
+            response['Content-Range'] = f'{RANGE_UNIT} {start}-{end - 1}/{total}'
+        return response
 
 
-class ActionItemViewSet(viewsets.ModelViewSet):
+class ActionItemViewSet(InstrumentedViewMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """Action item management."""
     serializer_class = ActionItemSerializer
     queryset = ActionItem.objects.all()
+    pagination_class = CreatedAtCursorPagination
+    # bulk includes the search vector refresh and NOTIFY run on PostgreSQL
+    query_budget = {'list': 2, 'retrieve': 2, 'bulk': 6}
     
     def get_queryset(self):
-        return ActionItem.objects.filter(user=self.request.user)
+        queryset = ActionItem.objects.filter(user=self.request.user)
+        statuses = self.request.query_params.get('status')
+        if statuses:
+            # ?status=pending,in_progress is served by action_item_user_open_idx
+            queryset = queryset.filter(status__in=statuses.split(','))
+        return queryset
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+    
+    @action(detail=False, methods=['post', 'patch'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Create (``POST``) or update (``PATCH``, each item with its ``id``) a
+        list of action items in one transaction. Nothing is written unless
+        every item is valid; ``errors`` lines up with the submitted list.
+        """
+        items = request.data if isinstance(request.data, list) else []
+        context = self.get_serializer_context()
+        context['sessions'] = RecordingSession.objects.filter(
+            user=request.user, pk__in=_bulk_ids(items, 'session'),
+        ).in_bulk()
+        options = {
+            'many': True,
+            'allow_empty': False,
+            'max_length': settings.ACTION_ITEM_BULK_MAX_ITEMS,
+            'context': context,
+        }
+        if request.method == 'POST':
+            serializer = ActionItemSerializer(data=request.data, **options)
+            save_kwargs, status_code = {'user': request.user}, status.HTTP_201_CREATED
+        else:
+            instances = ActionItem.objects.filter(
+                user=request.user, pk__in=_bulk_ids(items, 'id'),
+            ).in_bulk()
+            serializer = ActionItemSerializer(instances, data=request.data, partial=True, **options)
+            save_kwargs, status_code = {}, status.HTTP_200_OK
+
+        if not serializer.is_valid():
+            return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            saved = serializer.save(**save_kwargs)
+        return Response(ActionItemSerializer(saved, many=True).data, status=status_code)
+
+
+def _bulk_ids(items, key):
+    """Integer values of ``key`` across a submitted list, ignoring junk."""
+    ids = set()
+    for item in items:
+        try:
+            ids.add(int(item.get(key)))
+        except (AttributeError, TypeError, ValueError):
+            continue
+    return ids
+
+
+class AudioUploadViewSet(InstrumentedViewMixin,
+                         mixins.RetrieveModelMixin,
+                         mixins.DestroyModelMixin,
+                         viewsets.GenericViewSet):
+    """
+    Chunked audio uploads.
+
+    ``PUT chunks/{index}/`` streams a raw chunk body to storage (an optional
+    ``X-Chunk-SHA256`` header is verified), ``GET`` reports which chunks
+    have arrived so an interrupted client can resume, ``finalize/``
+    assembles the file onto the session and ``DELETE`` aborts.
+    """
+    serializer_class = AudioUploadSerializer
+    queryset = AudioUpload.objects.all()
+    
+    def get_queryset(self):
+        return AudioUpload.objects.filter(user=self.request.user).prefetch_related('chunks')
+    
+    def perform_destroy(self, instance):
+        discard_upload(instance)
+    
+    @action(detail=True, methods=['put'], url_path=r'chunks/(?P<index>\d+)')
+    def chunk(self, request, pk=None, index=None):
+        upload = self.get_object()
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        if content_length > settings.AUDIO_UPLOAD_MAX_CHUNK_SIZE:
+            return Response(
+                {'detail': f'Chunks may not exceed {settings.AUDIO_UPLOAD_MAX_CHUNK_SIZE} bytes'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+        if request.stream is None:
+            return Response({'detail': 'Chunk is empty'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            # Read the raw body stream; request.data would buffer it in memory
+            chunk = store_chunk(
+                upload,
+                int(index),
+                request.stream,
+                expected_sha256=request.META.get('HTTP_X_CHUNK_SHA256', ''),
+            )
+        except UploadError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {'index': chunk.index, 'size': chunk.size, 'sha256': chunk.sha256},
+            status=status.HTTP_201_CREATED,
+        )
+    
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        upload = self.get_object()
+        duration = request.data.get('duration')
+        try:
+            duration = float(duration) if duration is not None else None
+        except (TypeError, ValueError):
+            return Response(
+                {'detail': 'duration must be a number of seconds'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not has_quota(request.user, minutes=(duration or 0) / 60):
+            return Response(
+                {'detail': 'Monthly recording minutes exhausted for your plan'},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        try:
+            session = finalize_upload(
+                upload,
+                duration=duration,
+                expected_sha256=request.data.get('sha256', ''),
+            )
+        except UploadError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(RecordingSessionSerializer(session).data)
+
+
+class SearchView(InstrumentedViewMixin, APIView):
+    """
+    Full-text search over the user's sessions and action items.
+
+    ``?q=`` accepts web-search syntax (``"exact phrase"``, ``or``,
+    ``-excluded``); ``?limit=`` caps each result list.
+    """
+    query_budget = 2
+
+    def get(self, request):
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            return Response({'detail': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), 100)
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            return Response({'detail': 'limit must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'query': text,
+            'sessions': SessionSearchResultSerializer(
+                search.search_sessions(request.user, text, limit), many=True,
+            ).data,
+            'action_items': ActionItemSearchResultSerializer(
+                search.search_action_items(request.user, text, limit), many=True,
+            ).data,
+        })
+
+
+class SyncView(InstrumentedViewMixin, APIView):
+    """
+    Delta sync: everything created, updated or deleted since ``?since=``.
+
+    Without ``since`` (or with a token older than the tombstone retention,
+    flagged ``reset``) every row is returned. Pass the response's
+    ``token`` as ``since`` on the next call.
+    """
+    query_budget = 4
+
+    def get(self, request):
+        since = request.query_params.get('since')
+        try:
+            since = sync.parse_token(since) if since else None
+        except sync.InvalidToken as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = sync.changes(request.user, since)
+        return Response({
+            'token': result['token'],
+            'full': result['full'],
+            'reset': result['reset'],
+            'sessions': SyncSessionSerializer(result['sessions'], many=True).data,
+            'action_items': ActionItemSerializer(result['action_items'], many=True).data,
+            'comments': SyncCommentSerializer(result['comments'], many=True).data,
+            'deleted': list(result['deleted']),
+        })
+
+
+async def session_events(request):
+    """
+    Server-sent events for the user's sessions: ``session.status``,
+    ``action_item.created`` and ``comment.created``.
+
+    A plain async Django view rather than a DRF one, so an open stream
+    holds no worker thread. Requires the ASGI server.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'detail': 'Event streams are only served by the ASGI application'},
+            status=status.HTTP_501_NOT_IMPLEMENTED,
+        )
+    try:
+        result = await SupabaseJWTAuthentication().aauthenticate(request)
+    except exceptions.AuthenticationFailed as e:
+        return JsonResponse({'detail': str(e.detail)}, status=status.HTTP_401_UNAUTHORIZED)
+    if result is None:
+        return JsonResponse(
+            {'detail': 'Authentication credentials were not provided.'},
+            status=status.HTTP_401_UNAUTHORIZED,
+        )
 
+    subscriber = events.broker.subscribe(result[0].pk)
+    response = StreamingHttpResponse(
+        events.stream(subscriber, settings.SSE_HEARTBEAT_INTERVAL, settings.SSE_MAX_DURATION),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # stop nginx from buffering the stream
+    return response
@@ -0,0 +1,142 @@
+"""
+Plan entitlements resolved from an in-process TTL cache.
+
+    from subscriptions.entitlements import get_entitlements, has_quota
+    if not has_quota(request.user, minutes=30):
+        ...
+
+A user's effective plan is looked up at most once per
+``ENTITLEMENTS_CACHE_TTL`` seconds, and never cached past the
+subscription's ``expires_at``. Saving or deleting a ``Subscription``
+invalidates the local entry immediately; other worker processes pick the
+change up when their entry expires.
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.utils import timezone
+
+from users.models import UsageMonthly
+
+from .models import Subscription
+
+FALLBACK_PLAN = 'free'
+
+
+@dataclass(frozen=True)
+class Entitlements:
+    plan: str
+    status: str
+    expires_at: object = None
+    limits: dict = field(default_factory=dict)
+
+    def limit(self, name):
+        """The plan's limit for ``name``; ``None`` means unlimited."""
+        return self.limits.get(name)
+
+
+class TTLCache:
+    """Small thread-safe map whose entries expire after a per-entry TTL."""
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl):
+        if ttl <= 0:
+            return
+        with self._lock:
+            if len(self._entries) >= self.max_size:
+                self._entries.clear()
+            self._entries[key] = (value, time.monotonic() + ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_entitlements = TTLCache()
+_monthly_minutes = TTLCache()
+
+
+def resolve(subscription, now=None):
+    """Compute the effective entitlements for a subscription (or ``None``)."""
+    now = now or timezone.now()
+    plan, status, expires_at = FALLBACK_PLAN, 'none', None
+    if subscription is not None:
+        status, expires_at = subscription.status, subscription.expires_at
+        expired = status == 'expired' or (expires_at is not None and expires_at <= now)
+        # A cancelled plan stays usable until the end of its paid period
+        lapsed = status == 'cancelled' and expires_at is None
+        if not expired and not lapsed:
+            plan = subscription.plan
+    return Entitlements(
+        plan=plan,
+        status=status,
+        expires_at=expires_at,
+        limits=settings.PLAN_LIMITS.get(plan, settings.PLAN_LIMITS[FALLBACK_PLAN]),
+    )
+
+
+def get_entitlements(user):
+    """Return the cached effective plan and limits for ``user``."""
+    user_id = getattr(user, 'pk', user)
+    cached = _entitlements.get(user_id)
+    if cached is not None:
+        return cached
+
+    now = timezone.now()
+    subscription = Subscription.objects.filter(user_id=user_id).first()
+    entitlements = resolve(subscription, now)
+
+    ttl = settings.ENTITLEMENTS_CACHE_TTL
+    if entitlements.expires_at is not None and entitlements.expires_at > now:
+        # Re-resolve the moment the plan lapses
+        ttl = min(ttl, (entitlements.expires_at - now).total_seconds())
+    _entitlements.set(user_id, entitlements, ttl)
+    return entitlements
+
+
+def monthly_minutes(user):
+    """Minutes recorded in the current calendar month, cached briefly."""
+    user_id = getattr(user, 'pk', user)
+    cached = _monthly_minutes.get(user_id)
+    if cached is not None:
+        return cached
+    # One row of the monthly rollup rather than a sum over daily rows
+    minutes = UsageMonthly.objects.filter(
+        user_id=user_id, month=timezone.localdate().replace(day=1),
+    ).values_list('minutes_recorded', flat=True).first() or 0.0
+    _monthly_minutes.set(user_id, minutes, settings.USAGE_TOTALS_CACHE_TTL)
+    return minutes
+
+
+def has_quota(user, minutes=0.0):
+    """Whether ``user`` may record ``minutes`` more this month."""
+    limit = get_entitlements(user).limit('minutes_per_month')
+    if limit is None:
+        return True
+    return monthly_minutes(user) + minutes <= limit
+
+
+def invalidate(user):
+    user_id = getattr(user, 'pk', user)
+    _entitlements.delete(user_id)
+    _monthly_minutes.delete(user_id)
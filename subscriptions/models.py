@@ -65,6 +65,9 @@ class Invoice(models.Model):
     class Meta:
         db_table = 'invoices'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='invoice_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"Invoice #{self.id} - {self.user.email}"
@@ -90,6 +93,9 @@ class BillingLog(models.Model):
     class Meta:
         db_table = 'billing_logs'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='billing_log_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.event_type}"
@@ -1,9 +1,10 @@
 from rest_framework import serializers
+from memo_ai_backend.instrumentation import InstrumentedSerializerMixin
 from .models import Subscription, Invoice, BillingLog
 from users.serializers import UserSerializer
 
 
-class SubscriptionSerializer(serializers.ModelSerializer):
+class SubscriptionSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     
     class Meta:
@@ -12,7 +13,7 @@ class SubscriptionSerializer(serializers.ModelSerializer):
         read_only_fields = ['user', 'created_at', 'updated_at']
 
 
-class InvoiceSerializer(serializers.ModelSerializer):
+class InvoiceSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     
     class Meta:
@@ -21,7 +22,7 @@ class InvoiceSerializer(serializers.ModelSerializer):
         read_only_fields = ['user', 'created_at', 'updated_at']
 
 
-class BillingLogSerializer(serializers.ModelSerializer):
+class BillingLogSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = BillingLog
         fields = '__all__'
@@ -0,0 +1,27 @@
+"""
+Signal handlers for the subscriptions app.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users import dashboard
+
+from . import entitlements
+from .models import Subscription
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def invalidate_entitlements(sender, instance, **kwargs):
+    """Drop the cached plan so the next check sees the change."""
+    entitlements.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Subscription)
+def update_dashboard_plan(sender, instance, **kwargs):
+    dashboard.plan_changed(instance.user_id, entitlements.resolve(instance).plan, instance.expires_at)
+
+
+@receiver(post_delete, sender=Subscription)
+def reset_dashboard_plan(sender, instance, **kwargs):
+    dashboard.plan_changed(instance.user_id, entitlements.FALLBACK_PLAN, None)
@@ -0,0 +1,38 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from users.models import User
+
+from .models import BillingLog, Invoice, Subscription
+
+
+# QueryBudgetExceeded fails the request when a view runs more queries than
+# its query_budget allows
+@override_settings(QUERY_INSPECTION=True, QUERY_BUDGET_STRICT=True, AUDIT_LOG_SYNC=True)
+class SubscriptionQueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='owner', email='owner@example.com')
+        cls.subscription = Subscription.objects.create(user=cls.user, plan='pro', status='active')
+        Invoice.objects.bulk_create(
+            [Invoice(subscription=cls.subscription, user=cls.user, amount=10) for _ in range(25)]
+        )
+        BillingLog.objects.bulk_create([BillingLog(user=cls.user, event_type='invoice_paid') for _ in range(25)])
+        cls.invoice = Invoice.objects.first()
+        cls.log = BillingLog.objects.first()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_reads_stay_within_budget(self):
+        for url in (
+            '/api/subscriptions/subscriptions/',
+            f'/api/subscriptions/subscriptions/{self.subscription.pk}/',
+            '/api/subscriptions/invoices/',
+            f'/api/subscriptions/invoices/{self.invoice.pk}/',
+            '/api/subscriptions/logs/',
+            f'/api/subscriptions/logs/{self.log.pk}/',
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
@@ -1,5 +1,7 @@
-from django.urls import path, include
+from django.conf import settings
+from django.urls import path, include, re_path
 from rest_framework.routers import DefaultRouter
+from memo_ai_backend.async_views import async_view
 from . import views
 
 router = DefaultRouter()
@@ -11,3 +13,13 @@ urlpatterns = [
     path('', include(router.urls)),
 ]
 
+if settings.ASYNC_VIEWS:
+    # Same routes and names as the router's, served through async views
+    urlpatterns = [
+        path('subscriptions/', async_view(
+            views.SubscriptionViewSet, {'get': 'list'}, basename='subscription', detail=False,
+        ), name='subscription-list'),
+        re_path(r'^subscriptions/(?P<pk>[^/.]+)/$', async_view(
+            views.SubscriptionViewSet, {'get': 'retrieve'}, basename='subscription', detail=True,
+        ), name='subscription-detail'),
+    ] + urlpatterns
@@ -1,4 +1,7 @@
 from rest_framework import viewsets
+from memo_ai_backend.conditional import ConditionalGetMixin
+from memo_ai_backend.instrumentation import InstrumentedViewMixin
+from memo_ai_backend.pagination import CreatedAtCursorPagination
 from .models import Subscription, Invoice, BillingLog
 from .serializers import (
     SubscriptionSerializer,
@@ -7,28 +10,35 @@ from .serializers import (
 )
 
 
-class SubscriptionViewSet(viewsets.ReadOnlyModelViewSet):
+class SubscriptionViewSet(InstrumentedViewMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """Subscription management."""
     serializer_class = SubscriptionSerializer
     queryset = Subscription.objects.all()
+    query_budget = {'list': 3, 'retrieve': 2}
     
     def get_queryset(self):
-        return Subscription.objects.filter(user=self.request.user)
+        # select_related for the nested user
+        return Subscription.objects.filter(user=self.request.user).select_related('user')
 
 
-class InvoiceViewSet(viewsets.ReadOnlyModelViewSet):
+class InvoiceViewSet(InstrumentedViewMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """Invoice management."""
     serializer_class = InvoiceSerializer
     queryset = Invoice.objects.all()
+    pagination_class = CreatedAtCursorPagination
+    query_budget = {'list': 2, 'retrieve': 2}
     
     def get_queryset(self):
-        return Invoice.objects.filter(user=self.request.user)
+        return Invoice.objects.filter(user=self.request.user).select_related('user')
 
 
-class BillingLogViewSet(viewsets.ReadOnlyModelViewSet):
+class BillingLogViewSet(InstrumentedViewMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """Billing log viewing."""
     serializer_class = BillingLogSerializer
     queryset = BillingLog.objects.all()
+    pagination_class = CreatedAtCursorPagination
+    query_budget = {'list': 2, 'retrieve': 2}
+    conditional_field = 'created_at'  # append-only
     
     def get_queryset(self):
         return BillingLog.objects.filter(user=self.request.user)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Profile, Usage, AuditLog
+from .models import User, Profile, Usage, UsageMonthly, DashboardSummary, AuditLog
 
 
 @admin.register(User)
@@ -23,6 +23,20 @@ class UsageAdmin(admin.ModelAdmin):
     search_fields = ['user__email']
 
 
+@admin.register(UsageMonthly)
+class UsageMonthlyAdmin(admin.ModelAdmin):
+    list_display = ['user', 'month', 'recordings_count', 'minutes_recorded']
+    list_filter = ['month']
+    search_fields = ['user__email']
+
+
+@admin.register(DashboardSummary)
+class DashboardSummaryAdmin(admin.ModelAdmin):
+    list_display = ['user', 'plan', 'minutes_this_month', 'month', 'updated_at']
+    search_fields = ['user__email']
+    readonly_fields = ['updated_at']
+
+
 @admin.register(AuditLog)
 class AuditLogAdmin(admin.ModelAdmin):
     list_display = ['user', 'action', 'resource_type', 'created_at']
@@ -0,0 +1,170 @@
+"""
+Asynchronous, batched AuditLog writer.
+
+    from users import audit
+    audit.log(user, 'update', 'recordingsession', resource_id=42)
+
+Entries go into a bounded in-memory queue and a background thread writes
+them with ``bulk_create`` once ``batch_size`` entries are waiting or
+``flush_interval`` seconds have passed, so request threads never wait on
+an INSERT. When the queue is full new entries are dropped and counted
+rather than blocking the request.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections
+from django.dispatch import receiver
+
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+class AuditWriter:
+    """Bounded entry queue drained by a background ``bulk_create`` thread."""
+    def __init__(self, max_size=10000, batch_size=200, flush_interval=2.0, sync=False):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sync = sync
+        self._reset()
+
+    def _reset(self):
+        self._queue = queue.Queue(maxsize=self.max_size)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._pid = os.getpid()
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def log(self, user, action, resource_type, resource_id='', description='',
+            ip_address=None, user_agent=''):
+        entry = AuditLog(
+            user_id=getattr(user, 'pk', user),
+            action=action,
+            resource_type=resource_type,
+            resource_id=str(resource_id or ''),
+            description=description,
+            ip_address=ip_address,
+            user_agent=user_agent,
+        )
+        if self.sync:
+            self._write([entry])
+            return True
+
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def flush(self):
+        """Write everything currently queued from the calling thread."""
+        with self._flush_lock:
+            while True:
+                batch = self._drain(self.batch_size)
+                if not batch:
+                    return
+                self._write(batch)
+
+    def _drain(self, limit):
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        try:
+            # created_at is auto_now_add, so rows carry the flush time, at
+            # most flush_interval seconds after the action itself.
+            AuditLog.objects.bulk_create(batch)
+        except Exception:
+            logger.exception('Dropping %d audit log entries after a failed write', len(batch))
+            with self._lock:
+                self.failed += len(batch)
+            return
+        with self._lock:
+            self.written += len(batch)
+
+    def _ensure_thread(self):
+        if self._pid != os.getpid():
+            # Forked child: the parent's thread and queue did not come along
+            self._reset()
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            close_old_connections()
+            with self._flush_lock:
+                self._write(batch)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'queued': self._queue.qsize(),
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'dropped': self.dropped,
+                'failed': self.failed,
+            }
+
+
+writer = AuditWriter(
+    max_size=settings.AUDIT_LOG_BUFFER_SIZE,
+    batch_size=settings.AUDIT_LOG_BATCH_SIZE,
+    flush_interval=settings.AUDIT_LOG_FLUSH_INTERVAL,
+    sync=settings.AUDIT_LOG_SYNC,
+)
+log = writer.log
+flush = writer.flush
+atexit.register(writer.flush)
+
+# AUDIT_LOG_* setting -> writer attribute, so override_settings reaches the writer
+WRITER_SETTINGS = {
+    'AUDIT_LOG_SYNC': 'sync',
+    'AUDIT_LOG_BATCH_SIZE': 'batch_size',
+    'AUDIT_LOG_FLUSH_INTERVAL': 'flush_interval',
+}
+
+
+@receiver(setting_changed)
+def apply_setting(setting, value, **kwargs):
+    if setting in WRITER_SETTINGS:
+        setattr(writer, WRITER_SETTINGS[setting], value)
@@ -1,55 +1,184 @@
 """
 Supabase JWT authentication for Django REST Framework.
 """
+import contextlib
+
 import jwt
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from rest_framework import authentication, exceptions
-from supabase import create_client, Client
+
+from memo_ai_backend.instrumentation import timed
+
+from .jwks import SigningKeyError, get_key_store
+from .supabase_client import get_async_http_client, get_client
+from .sync import user_sync
+from .token_cache import token_cache
 
 User = get_user_model()
 
+AUTH_MODE_LOCAL = 'local'
+AUTH_MODE_REMOTE = 'remote'
+
 
 class SupabaseJWTAuthentication(authentication.BaseAuthentication):
     """
     Custom authentication class for Supabase JWT tokens.
+
+    In ``local`` mode (the default when ``SUPABASE_JWT_SECRET`` is set) the
+    token signature and claims are checked in-process against the cached
+    project secret or JWKS keys. ``remote`` mode asks the Supabase auth
+    server about every token.
+    Verified tokens are remembered in ``token_cache`` so repeat requests
+    with the same token skip verification and user sync entirely.
     """
+    @timed('auth')
     def authenticate(self, request):
-        auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-        
-        if not auth_header.startswith('Bearer '):
+        token = get_bearer_token(request)
+        if token is None:
             return None
-        
-        token = auth_header.split(' ')[1]
-        
-        try:
-            # Verify token with Supabase
-            supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
-            user_data = supabase.auth.get_user(token)
-            
-            if not user_data:
-                raise exceptions.AuthenticationFailed('Invalid token')
-            
-            # Get or create user
-            user, created = User.objects.get_or_create(
-                supabase_id=user_data.user.id,
-                defaults={
-                    'email': user_data.user.email,
-                    'username': user_data.user.email,
-                }
-            )
-            
-            if not created:
-                # Update user if needed
-                user.email = user_data.user.email
-                user.save()
-            
+
+        user_pk = token_cache.get(token)
+        if user_pk is not None:
+            return (self.check_cached_user(User.objects.filter(pk=user_pk).first(), user_pk), token)
+
+        with translate_verification_errors():
+            if settings.SUPABASE_AUTH_MODE == AUTH_MODE_REMOTE:
+                supabase_id, claims, exp = self.verify_remote(token)
+            else:
+                supabase_id, claims, exp = self.verify_local(token)
+            return (self.get_user(token, supabase_id, claims, exp), token)
+
+    @timed('auth')
+    async def aauthenticate(self, request):
+        """
+        ``authenticate`` for async views.
+
+        A token cache hit costs one async query, and in remote mode the
+        Supabase auth call goes through a non-blocking HTTP client, so no
+        thread is held while it is in flight.
+        """
+        token = get_bearer_token(request)
+        if token is None:
+            return None
+
+        user_pk = token_cache.get(token)
+        if user_pk is not None:
+            user = await User.objects.filter(pk=user_pk).afirst()
+            return (self.check_cached_user(user, user_pk), token)
+
+        with translate_verification_errors():
+            if settings.SUPABASE_AUTH_MODE == AUTH_MODE_REMOTE:
+                supabase_id, claims, exp = await self.averify_remote(token)
+            else:
+                # May fetch JWKS keys with the blocking client
+                supabase_id, claims, exp = await sync_to_async(self.verify_local)(token)
+            user = await sync_to_async(self.get_user)(token, supabase_id, claims, exp)
             return (user, token)
-            
-        except jwt.ExpiredSignatureError:
-            raise exceptions.AuthenticationFailed('Token has expired')
-        except jwt.InvalidTokenError:
+
+    def authenticate_header(self, request):
+        # Makes DRF answer failed authentication with 401 rather than 403
+        return 'Bearer'
+
+    def check_cached_user(self, user, user_pk):
+        if user is None or not user.is_active:
+            token_cache.invalidate_user(user_pk)
+            raise exceptions.AuthenticationFailed('User inactive or deleted')
+        return user
+
+    def get_user(self, token, supabase_id, claims, exp):
+        """Get or create the user for verified claims and cache the token."""
+        email = claims['email'] or ''
+        user, created = User.objects.get_or_create(
+            supabase_id=supabase_id,
+            defaults={
+                'email': email,
+                'username': email,
+                'is_verified': bool(claims.get('is_verified')),
+            }
+        )
+
+        if not created:
+            # Only write columns whose claims actually changed
+            user_sync.sync(user, claims)
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted')
+
+        token_cache.set(token, user.pk, exp)
+        return user
+
+    def verify_local(self, token):
+        """Verify the token signature and claims without a network call."""
+        try:
+            key, algorithm = get_key_store().get_key(token)
+        except SigningKeyError as e:
+            raise exceptions.AuthenticationFailed(str(e))
+
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=settings.SUPABASE_JWT_AUDIENCE,
+            leeway=settings.SUPABASE_JWT_LEEWAY,
+            options={'require': ['exp', 'sub']},
+        )
+        metadata = claims.get('user_metadata') or {}
+        return claims['sub'], {
+            # None (claim absent) leaves the stored value alone
+            'email': claims.get('email'),
+            'is_verified': metadata.get('email_verified'),
+        }, claims['exp']
+
+    def verify_remote(self, token):
+        """Verify the token with the Supabase auth server."""
+        user_data = get_client().auth.get_user(token)
+
+        if not user_data:
             raise exceptions.AuthenticationFailed('Invalid token')
-        except Exception as e:
-            raise exceptions.AuthenticationFailed(f'Authentication failed: {str(e)}')
 
+        # The server vouched for the token, so reading exp unverified is safe.
+        claims = jwt.decode(token, options={'verify_signature': False})
+        return user_data.user.id, {
+            'email': user_data.user.email,
+            'is_verified': user_data.user.email_confirmed_at is not None,
+        }, claims.get('exp', 0)
+
+    async def averify_remote(self, token):
+        """``verify_remote`` over the non-blocking HTTP client."""
+        response = await get_async_http_client().get(
+            f"{settings.SUPABASE_URL.rstrip('/')}/auth/v1/user",
+            headers={'apikey': settings.SUPABASE_KEY, 'Authorization': f'Bearer {token}'},
+        )
+        if response.status_code != 200:
+            raise exceptions.AuthenticationFailed('Invalid token')
+        user_data = response.json()
+
+        claims = jwt.decode(token, options={'verify_signature': False})
+        return user_data['id'], {
+            'email': user_data.get('email'),
+            'is_verified': user_data.get('email_confirmed_at') is not None,
+        }, claims.get('exp', 0)
+
+
+def get_bearer_token(request):
+    auth_header = request.META.get('HTTP_AUTHORIZATION', '')
+    if not auth_header.startswith('Bearer '):
+        return None
+    return auth_header.split(' ')[1]
+
+
+@contextlib.contextmanager
+def translate_verification_errors():
+    """Report every verification failure as ``AuthenticationFailed``."""
+    try:
+        yield
+    except exceptions.AuthenticationFailed:
+        raise
+    except jwt.ExpiredSignatureError:
+        raise exceptions.AuthenticationFailed('Token has expired')
+    except jwt.InvalidTokenError:
+        raise exceptions.AuthenticationFailed('Invalid token')
+    except Exception as e:
+        raise exceptions.AuthenticationFailed(f'Authentication failed: {str(e)}')
@@ -0,0 +1,187 @@
+"""
+Incrementally maintained home screen totals.
+
+    from users import dashboard
+    dashboard.session_status_changed(user_id, 'processing', 'completed')
+
+Every write that changes a total applies the difference to the user's
+``DashboardSummary`` row with an ``F()`` update in the writer's own
+transaction, so the dashboard is a single primary-key read. Rows are
+created on first read by ``rebuild()``; until then deltas update nothing.
+``reconcile_dashboards`` re-runs ``rebuild()`` nightly to correct any
+drift, e.g. from writes that bypass the hooks.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Value, When
+from django.utils import timezone
+
+from .models import DashboardSummary, UsageMonthly
+
+SESSION_FIELDS = {
+    'pending': 'sessions_pending',
+    'recording': 'sessions_recording',
+    'processing': 'sessions_processing',
+    'completed': 'sessions_completed',
+    'failed': 'sessions_failed',
+}
+OPEN_ITEM_FIELDS = {
+    'low': 'open_items_low',
+    'medium': 'open_items_medium',
+    'high': 'open_items_high',
+}
+OPEN_STATUSES = ('pending', 'in_progress')
+COUNTER_FIELDS = list(SESSION_FIELDS.values()) + list(OPEN_ITEM_FIELDS.values())
+
+
+def item_state(item):
+    """``(status, priority)`` of a loaded action item, or ``None`` if deferred."""
+    status, priority = item.__dict__.get('status'), item.__dict__.get('priority')
+    return None if status is None or priority is None else (status, priority)
+
+
+def _apply(deltas):
+    """Add ``{user_id: Counter(field=delta)}`` to the users' rows."""
+    now = timezone.now()
+    for user_id, counts in deltas.items():
+        updates = {name: F(name) + delta for name, delta in counts.items() if delta}
+        if updates:
+            DashboardSummary.objects.filter(user_id=user_id).update(updated_at=now, **updates)
+
+
+def session_status_changed(user_id, previous, current):
+    """``previous`` is ``None`` for a new session, ``current`` for a deleted one."""
+    if previous == current:
+        return
+    counts = Counter()
+    if previous in SESSION_FIELDS:
+        counts[SESSION_FIELDS[previous]] -= 1
+    if current in SESSION_FIELDS:
+        counts[SESSION_FIELDS[current]] += 1
+    _apply({user_id: counts})
+
+
+def action_items_changed(changes):
+    """Apply ``(user_id, previous, current)`` item states (see ``item_state``)."""
+    deltas = defaultdict(Counter)
+    for user_id, previous, current in changes:
+        for state, delta in ((previous, -1), (current, 1)):
+            if state is not None and state[0] in OPEN_STATUSES and state[1] in OPEN_ITEM_FIELDS:
+                deltas[user_id][OPEN_ITEM_FIELDS[state[1]]] += delta
+    _apply(deltas)
+
+
+def open_items_removed(rows):
+    """Subtract ``(user_id, priority, count)`` open items, e.g. ahead of a cascade."""
+    deltas = defaultdict(Counter)
+    for user_id, priority, count in rows:
+        if priority in OPEN_ITEM_FIELDS:
+            deltas[user_id][OPEN_ITEM_FIELDS[priority]] -= count
+    _apply(deltas)
+
+
+def minutes_recorded(rows):
+    """
+    Add metered ``(user_id, date, minutes)`` rows to the monthly totals.
+
+    A row still holding an earlier month starts over; minutes for a month
+    older than the row's are ignored.
+    """
+    totals = defaultdict(float)
+    for user_id, date, minutes in rows:
+        if minutes:
+            totals[(user_id, date.replace(day=1))] += minutes
+    now = timezone.now()
+    for (user_id, month), minutes in totals.items():
+        DashboardSummary.objects.filter(user_id=user_id, month__lte=month).update(
+            minutes_this_month=Case(
+                When(month=month, then=F('minutes_this_month') + minutes),
+                default=Value(minutes),
+            ),
+            month=month,
+            updated_at=now,
+        )
+
+
+def plan_changed(user_id, plan, expires_at):
+    DashboardSummary.objects.filter(user_id=user_id).update(
+        plan=plan, plan_expires_at=expires_at, updated_at=timezone.now(),
+    )
+
+
+def _totals(summary):
+    # Sums of float minutes may differ in the last bits depending on order
+    return (
+        [getattr(summary, name) for name in COUNTER_FIELDS],
+        summary.month, round(summary.minutes_this_month, 6), summary.plan, summary.plan_expires_at,
+    )
+
+
+def get_summary(user):
+    """The user's summary row, built on first use."""
+    user_id = getattr(user, 'pk', user)
+    summary = DashboardSummary.objects.filter(user_id=user_id).first()
+    if summary is None:
+        summary = rebuild([user_id])[0][user_id]
+    return summary
+
+
+def rebuild(user_ids):
+    """
+    Recompute the rows of ``user_ids`` from the source tables.
+
+    Returns ``({user_id: summary}, corrected)`` where ``corrected`` counts
+    the rows whose stored totals were wrong. The rows are locked while the
+    totals are counted, so deltas from concurrent writers queue behind the
+    rebuild and land on top of it instead of being overwritten.
+    """
+    from sessions.models import ActionItem, RecordingSession
+    from subscriptions.entitlements import resolve
+    from subscriptions.models import Subscription
+
+    user_ids = sorted(set(user_ids))
+    now = timezone.now()
+    month = timezone.localdate().replace(day=1)
+    fresh = {user_id: DashboardSummary(user_id=user_id, month=month) for user_id in user_ids}
+
+    with transaction.atomic():
+        DashboardSummary.objects.bulk_create(fresh.values(), ignore_conflicts=True)
+        stored = {
+            summary.user_id: summary
+            for summary in DashboardSummary.objects.select_for_update()
+            .filter(user_id__in=user_ids).order_by('user_id')
+        }
+
+        sessions = (RecordingSession.objects.filter(user_id__in=user_ids).order_by()
+                    .values_list('user_id', 'status').annotate(count=Count('id')))
+        for user_id, status, count in sessions:
+            if status in SESSION_FIELDS:
+                setattr(fresh[user_id], SESSION_FIELDS[status], count)
+        items = (ActionItem.objects.filter(user_id__in=user_ids, status__in=OPEN_STATUSES).order_by()
+                 .values_list('user_id', 'priority').annotate(count=Count('id')))
+        for user_id, priority, count in items:
+            if priority in OPEN_ITEM_FIELDS:
+                setattr(fresh[user_id], OPEN_ITEM_FIELDS[priority], count)
+        minutes = UsageMonthly.objects.filter(user_id__in=user_ids, month=month).values_list(
+            'user_id', 'minutes_recorded',
+        )
+        for user_id, total in minutes:
+            fresh[user_id].minutes_this_month = total
+        for subscription in Subscription.objects.filter(user_id__in=user_ids):
+            summary = fresh[subscription.user_id]
+            summary.plan = resolve(subscription, now).plan
+            summary.plan_expires_at = subscription.expires_at
+
+        fields = COUNTER_FIELDS + ['month', 'minutes_this_month', 'plan', 'plan_expires_at']
+        changed = []
+        for user_id, summary in fresh.items():
+            current = stored.get(user_id)
+            if current is not None and _totals(current) == _totals(summary):
+                fresh[user_id] = current
+                continue
+            summary.updated_at = now
+            changed.append(summary)
+        DashboardSummary.objects.bulk_update(changed, fields + ['updated_at'])
+
+    return fresh, len(changed)
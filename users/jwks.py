@@ -0,0 +1,124 @@
+"""
+Signing key cache for local Supabase JWT verification.
+"""
+import threading
+import time
+
+import jwt
+from django.conf import settings
+
+from .supabase_client import get_http_client
+
+
+class SigningKeyError(Exception):
+    """Raised when no key is available to verify a token."""
+
+
+class SupabaseKeyStore:
+    """
+    Process-wide cache of the keys Supabase signs access tokens with.
+
+    Legacy projects sign with a shared HS256 secret; newer projects publish
+    asymmetric keys on the JWKS endpoint. The JWKS document is fetched once,
+    kept for ``refresh_interval`` seconds and refetched early when a token
+    arrives with a ``kid`` we have not seen (key rotation), at most once per
+    ``min_refresh_interval`` so bad tokens cannot hammer the auth server.
+    """
+    def __init__(self, jwks_url, secret='', refresh_interval=600,
+                 min_refresh_interval=30):
+        self.jwks_url = jwks_url
+        self.secret = secret
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self._keys = {}
+        self._fetched_at = None
+        self._lock = threading.Lock()
+
+    def get_key(self, token):
+        """Return the verification key and algorithm for ``token``."""
+        header = jwt.get_unverified_header(token)
+        algorithm = header.get('alg', '')
+
+        if algorithm.startswith('HS'):
+            if not self.secret:
+                raise SigningKeyError('SUPABASE_JWT_SECRET is not configured')
+            return self.secret, algorithm
+
+        kid = header.get('kid')
+        key = self._lookup(kid)
+        if key is None:
+            raise SigningKeyError(f'Unknown signing key: {kid}')
+        return key.key, key.algorithm_name or algorithm
+
+    def _lookup(self, kid):
+        if self._age() >= self.refresh_interval:
+            try:
+                self.refresh(max_age=self.refresh_interval)
+            except Exception:
+                # Keep serving the previous keys if the auth server is down,
+                # retrying after the short interval instead of every request.
+                if not self._keys:
+                    raise
+                self._fetched_at = (
+                    time.monotonic() - self.refresh_interval + self.min_refresh_interval
+                )
+        key = self._keys.get(kid)
+        if key is None and self._age() >= self.min_refresh_interval:
+            # Unknown kid: the project may have rotated its keys.
+            self.refresh(max_age=self.min_refresh_interval)
+            key = self._keys.get(kid)
+        return key
+
+    def _age(self):
+        if self._fetched_at is None:
+            return float('inf')
+        return time.monotonic() - self._fetched_at
+
+    def refresh(self, max_age=0):
+        """
+        Fetch the JWKS document and replace the cached keys.
+
+        Concurrent callers queue on the lock; once one of them has refreshed,
+        the rest see a document younger than ``max_age`` and return early.
+        """
+        with self._lock:
+            if max_age and self._age() < max_age:
+                return
+            data = self._fetch()
+            keys = {}
+            for jwk in jwt.PyJWKSet.from_dict(data).keys:
+                keys[jwk.key_id] = jwk
+            self._keys = keys
+            self._fetched_at = time.monotonic()
+
+    def _fetch(self):
+        response = get_http_client().get(
+            self.jwks_url,
+            headers={'apikey': settings.SUPABASE_KEY},
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def clear(self):
+        with self._lock:
+            self._keys = {}
+            self._fetched_at = None
+
+
+_key_store = None
+_key_store_lock = threading.Lock()
+
+
+def get_key_store():
+    """Return the lazily created process-wide key store."""
+    global _key_store
+    if _key_store is None:
+        with _key_store_lock:
+            if _key_store is None:
+                _key_store = SupabaseKeyStore(
+                    jwks_url=settings.SUPABASE_JWKS_URL,
+                    secret=settings.SUPABASE_JWT_SECRET,
+                    refresh_interval=settings.SUPABASE_JWKS_REFRESH_INTERVAL,
+                    min_refresh_interval=settings.SUPABASE_JWKS_MIN_REFRESH_INTERVAL,
+                )
+    return _key_store
@@ -0,0 +1,68 @@
+"""
+Manage monthly partitions of audit_logs and billing_logs.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from users import partitioning
+
+
+class Command(BaseCommand):
+    help = (
+        'Partition audit_logs and billing_logs by month. "convert" turns the '
+        'existing tables into partitioned ones (run once); "maintain" creates '
+        'upcoming partitions and archives/drops expired ones (run daily).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['convert', 'maintain', 'create', 'prune'])
+        parser.add_argument('--table', action='append', choices=list(partitioning.PARTITIONED_TABLES),
+                            help='Limit to this table (repeatable).')
+        parser.add_argument('--months-ahead', type=int, default=settings.LOG_PARTITION_MONTHS_AHEAD,
+                            help='Months of future partitions to keep ready.')
+        parser.add_argument('--archive-dir', default=str(settings.LOG_ARCHIVE_DIR),
+                            help='Where expired partitions are written as .jsonl.gz.')
+        parser.add_argument('--no-archive', action='store_true',
+                            help='Drop expired partitions without archiving them.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report the partitions prune would drop.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Log partitioning requires PostgreSQL.')
+
+        action = options['action']
+        for table in options['table'] or partitioning.PARTITIONED_TABLES:
+            if action == 'convert':
+                if partitioning.is_partitioned(table):
+                    self.stdout.write(f'{table} is already partitioned')
+                    continue
+                partitioning.convert_table(table, options['months_ahead'])
+                self.stdout.write(self.style.SUCCESS(f'Converted {table}'))
+                continue
+
+            if not partitioning.is_partitioned(table):
+                raise CommandError(f'{table} is not partitioned yet; run "partition_logs convert" first.')
+            if action in ('maintain', 'create'):
+                partitioning.create_default_partition(table)
+                for name, rows in partitioning.drain_default_partition(table):
+                    self.stderr.write(self.style.WARNING(
+                        f'{rows} rows of {table} were in its default partition; moved them to {name}'
+                    ))
+                for name in partitioning.create_future_partitions(table, options['months_ahead']):
+                    self.stdout.write(f'Partition {name} ready')
+            if action in ('maintain', 'prune'):
+                self.prune(table, options)
+
+    def prune(self, table, options):
+        retain = partitioning.retention_months(table)
+        for name, month in partitioning.expired_partitions(table, retain):
+            if options['dry_run']:
+                self.stdout.write(f'Would drop {name}')
+                continue
+            if not options['no_archive']:
+                path = partitioning.archive_partition(name, options['archive_dir'])
+                self.stdout.write(f'Archived {name} to {path}')
+            partitioning.drop_partition(table, name)
+            self.stdout.write(self.style.SUCCESS(f'Dropped {name}'))
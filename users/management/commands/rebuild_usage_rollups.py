@@ -0,0 +1,58 @@
+"""
+Recompute the monthly usage rollup from the daily usage rows.
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from users.models import Usage, UsageMonthly
+
+
+class Command(BaseCommand):
+    help = 'Rebuild usage_monthly from usage (run once after deploying the rollup, or to repair it).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append',
+                            help='Only rebuild this user id (repeatable).')
+
+    def handle(self, *args, **options):
+        daily = Usage.objects.order_by()
+        monthly = UsageMonthly.objects.all()
+        if options['user']:
+            daily = daily.filter(user_id__in=options['user'])
+            monthly = monthly.filter(user_id__in=options['user'])
+
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # Meter flushes wait until the rebuild commits and then add
+                # their increments on top, instead of being lost or counted twice.
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'LOCK TABLE {connection.ops.quote_name(UsageMonthly._meta.db_table)} '
+                        'IN SHARE ROW EXCLUSIVE MODE'
+                    )
+            monthly.delete()
+            now = timezone.now()
+            rows = (
+                daily.annotate(month=TruncMonth('date'))
+                .values('user_id', 'month')
+                .annotate(
+                    recordings=Sum('recordings_count'),
+                    minutes=Sum('minutes_recorded'),
+                    transcriptions=Sum('transcriptions_count'),
+                )
+            )
+            created = UsageMonthly.objects.bulk_create([
+                UsageMonthly(
+                    user_id=row['user_id'],
+                    month=row['month'],
+                    recordings_count=row['recordings'],
+                    minutes_recorded=row['minutes'],
+                    transcriptions_count=row['transcriptions'],
+                    updated_at=now,
+                )
+                for row in rows
+            ], batch_size=1000)
+        self.stdout.write(f'Rebuilt {len(created)} monthly usage rows')
@@ -0,0 +1,28 @@
+"""
+Recompute dashboard summaries from the source tables.
+"""
+from django.core.management.base import BaseCommand
+
+from users import dashboard
+from users.models import DashboardSummary
+
+
+class Command(BaseCommand):
+    help = 'Recompute every dashboard summary and correct any drift (run nightly).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append',
+                            help='Only reconcile this user id (repeatable).')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Summaries recomputed (and locked) per transaction.')
+
+    def handle(self, *args, **options):
+        user_ids = options['user'] or list(
+            DashboardSummary.objects.order_by('user_id').values_list('user_id', flat=True)
+        )
+        batch_size = options['batch_size']
+        corrected = 0
+        for start in range(0, len(user_ids), batch_size):
+            _, changed = dashboard.rebuild(user_ids[start:start + batch_size])
+            corrected += changed
+        self.stdout.write(f'Reconciled {len(user_ids)} dashboards, corrected {corrected}')
@@ -0,0 +1,181 @@
+"""
+Usage metering with write-behind aggregation.
+
+    from users import metering
+    metering.record(user, recordings=1, minutes=42.5)
+
+Increments are summed in memory per ``(user, date)`` and periodically
+written with one ``INSERT ... ON CONFLICT DO UPDATE SET x = x + EXCLUDED.x``
+per batch, so concurrent recordings never read-modify-write a ``Usage``
+row and never lose an update. The same flush adds the batch to the
+``UsageMonthly`` rollup that quota checks read.
+"""
+import atexit
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from . import dashboard
+from .models import Usage, UsageMonthly
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ('recordings_count', 'minutes_recorded', 'transcriptions_count')
+
+
+class UsageMeter:
+    """
+    In-process buffer of usage increments.
+
+    With ``flush_interval`` set to 0 every ``record()`` is written through
+    immediately (useful for tests and scripts); otherwise a daemon thread
+    flushes every ``flush_interval`` seconds, and earlier once ``max_pending``
+    distinct rows are buffered.
+    """
+    def __init__(self, flush_interval=5.0, max_pending=1000, batch_size=500):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.flushed_rows = 0
+        self.failed_flushes = 0
+
+    def record(self, user, recordings=0, minutes=0.0, transcriptions=0, date=None):
+        user_id = getattr(user, 'pk', user)
+        key = (user_id, date or timezone.localdate())
+        with self._lock:
+            totals = self._pending.setdefault(key, [0, 0.0, 0])
+            totals[0] += recordings
+            totals[1] += minutes
+            totals[2] += transcriptions
+            pending = len(self._pending)
+
+        if not self.flush_interval:
+            self.flush()
+        else:
+            self._ensure_thread()
+            if pending >= self.max_pending:
+                self._wakeup.set()
+
+    def flush(self):
+        """Write every buffered increment; failed batches are re-buffered."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        rows = [(user_id, date, *totals) for (user_id, date), totals in pending.items()]
+        written = 0
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            try:
+                self._upsert(batch)
+                written += len(batch)
+            except Exception:
+                logger.exception('Usage flush failed; keeping %d rows for retry', len(batch))
+                self.failed_flushes += 1
+                self._requeue(batch)
+        self.flushed_rows += written
+        return written
+
+    def _upsert(self, rows):
+        monthly = {}
+        for user_id, date, *totals in rows:
+            month_totals = monthly.setdefault((user_id, date.replace(day=1)), [0, 0.0, 0])
+            for i, value in enumerate(totals):
+                month_totals[i] += value
+        now = timezone.now()
+        with transaction.atomic():
+            _add_counters(Usage, 'date', rows, now)
+            # The rollup moves in the same transaction as the daily rows
+            _add_counters(UsageMonthly, 'month',
+                          [(user_id, month, *totals) for (user_id, month), totals in monthly.items()],
+                          now, touch='updated_at')
+            dashboard.minutes_recorded([(user_id, date, minutes) for user_id, date, _, minutes, _ in rows])
+
+    def _requeue(self, rows):
+        with self._lock:
+            for user_id, date, recordings, minutes, transcriptions in rows:
+                totals = self._pending.setdefault((user_id, date), [0, 0.0, 0])
+                totals[0] += recordings
+                totals[1] += minutes
+                totals[2] += transcriptions
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='usage-meter', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            close_old_connections()
+            self.flush()
+
+    def _after_fork(self):
+        # Increments buffered by the parent are the parent's to flush
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'pending_rows': pending,
+            'flushed_rows': self.flushed_rows,
+            'failed_flushes': self.failed_flushes,
+        }
+
+
+def _add_counters(model, period, rows, now, touch=None):
+    """
+    ``INSERT ... ON CONFLICT (user_id, <period>) DO UPDATE`` adding each
+    ``(user_id, period, recordings, minutes, transcriptions)`` row to
+    ``model``'s counters. New rows get ``now`` in ``created_at``, or in
+    ``touch``, which conflicting rows also have set.
+    """
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    columns = [model._meta.get_field(name).column for name in COUNTERS]
+    stamp = qn(touch or 'created_at')
+    placeholders = ', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(rows))
+    params = []
+    for user_id, key, recordings, minutes, transcriptions in rows:
+        params.extend([user_id, key, recordings, minutes, transcriptions, now])
+    updates = [f'{qn(column)} = {table}.{qn(column)} + EXCLUDED.{qn(column)}' for column in columns]
+    if touch:
+        updates.append(f'{stamp} = EXCLUDED.{stamp}')
+    sql = (
+        f'INSERT INTO {table} ({qn("user_id")}, {qn(period)}, '
+        f'{", ".join(qn(column) for column in columns)}, {stamp}) '
+        f'VALUES {placeholders} '
+        f'ON CONFLICT ({qn("user_id")}, {qn(period)}) DO UPDATE SET {", ".join(updates)}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+meter = UsageMeter(
+    flush_interval=settings.USAGE_FLUSH_INTERVAL,
+    max_pending=settings.USAGE_MAX_PENDING,
+)
+record = meter.record
+flush = meter.flush
+atexit.register(meter.flush)
+os.register_at_fork(after_in_child=meter._after_fork)
@@ -0,0 +1,85 @@
+"""
+Request middleware for the users app.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from . import audit
+
+METHOD_ACTIONS = {
+    'GET': 'view',
+    'POST': 'create',
+    'PUT': 'update',
+    'PATCH': 'update',
+    'DELETE': 'delete',
+}
+
+
+class AuditLogMiddleware:
+    """
+    Record an AuditLog entry for each successful authenticated API call.
+
+    Runs after the view so it sees the user DRF authenticated; the entry
+    is handed to the asynchronous writer in ``users.audit``. Under ASGI it
+    stays on the event loop unless recording needs the database: entries
+    written inline (``AUDIT_LOG_SYNC``) or a user that has not been loaded.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self.loggable(request, response):
+            self.record(request)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self.loggable(request, response):
+            # Views outside DRF leave the session-backed lazy user in place
+            if audit.writer.sync or isinstance(getattr(request, 'user', None), SimpleLazyObject):
+                await sync_to_async(self.record)(request)
+            else:
+                self.record(request)
+        return response
+
+    @staticmethod
+    def loggable(request, response):
+        """Whether the request may be audited, before looking at its user."""
+        return (
+            request.method in METHOD_ACTIONS
+            and response.status_code < 400
+            and request.path.startswith(settings.AUDIT_LOG_PATH_PREFIX)
+        )
+
+    def record(self, request):
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return
+        match = request.resolver_match
+        audit.log(
+            user,
+            METHOD_ACTIONS[request.method],
+            resource_type=self.resource_type(match),
+            resource_id=match.kwargs.get('pk', '') if match else '',
+            description=f'{request.method} {request.path}',
+            ip_address=request.META.get('REMOTE_ADDR'),
+            user_agent=request.META.get('HTTP_USER_AGENT', ''),
+        )
+
+    @staticmethod
+    def resource_type(match):
+        if match is None:
+            return ''
+        initkwargs = getattr(match.func, 'initkwargs', {})
+        if initkwargs.get('basename'):
+            return initkwargs['basename']
+        return match.url_name or ''
@@ -58,6 +58,72 @@ class Usage(models.Model):
         return f"{self.user.email} - {self.date}"
 
 
+class UsageMonthly(models.Model):
+    """
+    Monthly totals of ``Usage``, kept in step by the usage meter's flush.
+
+    ``month`` is the first day of the month. ``rebuild_usage_rollups``
+    recomputes the table from the daily rows.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='usage_months')
+    month = models.DateField()
+    recordings_count = models.IntegerField(default=0)
+    minutes_recorded = models.FloatField(default=0.0)
+    transcriptions_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'usage_monthly'
+        unique_together = ['user', 'month']
+        ordering = ['-month']
+
+    def __str__(self):
+        return f"{self.user_id} - {self.month:%Y-%m}"
+
+
+class DashboardSummary(models.Model):
+    """
+    Per-user home screen totals, maintained incrementally (see users.dashboard).
+
+    Counters are adjusted with ``F()`` deltas by the writes that change
+    them and recomputed nightly by ``reconcile_dashboards``.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True,
+                                related_name='dashboard_summary')
+    # Plain integers: a counter that drifted below zero must not fail the
+    # write that decrements it.
+    sessions_pending = models.IntegerField(default=0)
+    sessions_recording = models.IntegerField(default=0)
+    sessions_processing = models.IntegerField(default=0)
+    sessions_completed = models.IntegerField(default=0)
+    sessions_failed = models.IntegerField(default=0)
+    open_items_low = models.IntegerField(default=0)
+    open_items_medium = models.IntegerField(default=0)
+    open_items_high = models.IntegerField(default=0)
+    # Minutes recorded in ``month`` (the first day of a calendar month)
+    month = models.DateField()
+    minutes_this_month = models.FloatField(default=0.0)
+    plan = models.CharField(max_length=20, default='free')
+    plan_expires_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'dashboard_summaries'
+
+    def __str__(self):
+        return f"{self.user_id} - Dashboard"
+
+    def minutes(self, today=None):
+        """Minutes for the current month; a row not written this month has none."""
+        month = (today or timezone.localdate()).replace(day=1)
+        return self.minutes_this_month if self.month == month else 0.0
+
+    def effective_plan(self, now=None):
+        if self.plan_expires_at is not None and self.plan_expires_at <= (now or timezone.now()):
+            return 'free'
+        return self.plan
+
+
 class AuditLog(models.Model):
     """Audit trail for user actions."""
     ACTION_CHOICES = [
@@ -81,6 +147,9 @@ class AuditLog(models.Model):
     class Meta:
         db_table = 'audit_logs'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='audit_log_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.email if self.user else 'Anonymous'} - {self.action} - {self.created_at}"
@@ -0,0 +1,246 @@
+"""
+Monthly range partitioning and retention for the append-only log tables.
+
+``audit_logs`` and ``billing_logs`` are partitioned by ``created_at`` into
+one table per calendar month (``audit_logs_p202610``). New partitions are
+created ahead of time, and expired ones are archived to compressed JSONL
+and dropped as a whole instead of being deleted row by row. A default
+partition (``audit_logs_default``) catches rows for months that have no
+partition yet, so inserts never fail; creating the missing partition later
+moves those rows into it.
+
+PostgreSQL only; driven by ``manage.py partition_logs``.
+"""
+import datetime
+import gzip
+import re
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+
+# table -> (model label, retention setting)
+PARTITIONED_TABLES = {
+    'audit_logs': ('users.AuditLog', 'AUDIT_LOG_RETENTION_MONTHS'),
+    'billing_logs': ('subscriptions.BillingLog', 'BILLING_LOG_RETENTION_MONTHS'),
+}
+
+_PARTITION_RE = re.compile(r'_p(\d{4})(\d{2})$')
+
+
+def month_start(value, offset=0):
+    """First day of the month ``offset`` months after ``value``'s month."""
+    index = value.year * 12 + value.month - 1 + offset
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y%m}'
+
+
+def default_partition_name(table):
+    return f'{table}_default'
+
+
+def _month_bounds(month):
+    """UTC timestamps starting ``month`` and the month after it."""
+    return tuple(
+        datetime.datetime.combine(day, datetime.time(), tzinfo=datetime.timezone.utc)
+        for day in (month_start(month), month_start(month, 1))
+    )
+
+
+def is_partitioned(table):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE relname = %s', [table])
+        row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def list_partitions(table):
+    """Return ``[(partition name, month)]`` for ``table``, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            """,
+            [table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = []
+    for name in names:
+        match = _PARTITION_RE.search(name)
+        if match:
+            partitions.append((name, datetime.date(int(match[1]), int(match[2]), 1)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def create_partition(table, month):
+    """
+    Create the partition holding ``month`` if it does not exist yet.
+
+    Rows of that month already in the default partition are moved into the
+    new partition.
+    """
+    qn = connection.ops.quote_name
+    start, end = month_start(month), month_start(month, 1)
+    name = partition_name(table, start)
+    default = default_partition_name(table)
+    bounds = _month_bounds(start)
+    in_month = f'{qn("created_at")} >= %s AND {qn("created_at")} < %s'
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('SELECT to_regclass(%s), to_regclass(%s)', [name, default])
+        exists, has_default = cursor.fetchone()
+        if exists:
+            return name
+        stranded = False
+        if has_default:
+            cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {qn(default)} WHERE {in_month})', bounds)
+            stranded = cursor.fetchone()[0]
+        if stranded:
+            # A new partition cannot be attached while the default one
+            # holds rows it would cover.
+            cursor.execute(f'ALTER TABLE {qn(table)} DETACH PARTITION {qn(default)}')
+        cursor.execute(
+            f'CREATE TABLE {qn(name)} PARTITION OF {qn(table)} '
+            f"FOR VALUES FROM ('{start.isoformat()} 00:00:00+00') "
+            f"TO ('{end.isoformat()} 00:00:00+00')"
+        )
+        if stranded:
+            cursor.execute(f'INSERT INTO {qn(name)} SELECT * FROM {qn(default)} WHERE {in_month}', bounds)
+            cursor.execute(f'DELETE FROM {qn(default)} WHERE {in_month}', bounds)
+            cursor.execute(f'ALTER TABLE {qn(table)} ATTACH PARTITION {qn(default)} DEFAULT')
+    return name
+
+
+def create_default_partition(table):
+    """Create the partition catching rows no monthly partition covers."""
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {qn(default_partition_name(table))} '
+            f'PARTITION OF {qn(table)} DEFAULT'
+        )
+
+
+def default_partition_months(table):
+    """Return ``[(month, rows)]`` held by the default partition, oldest first."""
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT date_trunc('month', {qn('created_at')} AT TIME ZONE 'UTC')::date, COUNT(*) "
+            f'FROM {qn(default_partition_name(table))} GROUP BY 1 ORDER BY 1'
+        )
+        return cursor.fetchall()
+
+
+def drain_default_partition(table):
+    """
+    Move rows out of the default partition into monthly partitions.
+
+    Returns ``[(partition name, rows)]`` for every partition that received
+    rows; an empty list means the default partition was empty.
+    """
+    return [(create_partition(table, month), rows) for month, rows in default_partition_months(table)]
+
+
+def create_future_partitions(table, months_ahead, today=None):
+    today = today or datetime.date.today()
+    return [create_partition(table, month_start(today, offset)) for offset in range(months_ahead + 1)]
+
+
+def convert_table(table, months_ahead):
+    """
+    Replace ``table`` with a partitioned copy holding the same rows.
+
+    Runs in a single transaction and holds an exclusive lock on the table
+    while rows are copied, so schedule it in a maintenance window.
+    """
+    model = apps.get_model(PARTITIONED_TABLES[table][0])
+    qn = connection.ops.quote_name
+    legacy = f'{table}_unpartitioned'
+    sequence = f'{table}_id_seq'
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}')
+        cursor.execute(
+            f'CREATE TABLE {qn(table)} (LIKE {qn(legacy)} INCLUDING DEFAULTS) '
+            f'PARTITION BY RANGE ({qn("created_at")})'
+        )
+
+        cursor.execute(f'SELECT MIN({qn("created_at")}) FROM {qn(legacy)}')
+        oldest = cursor.fetchone()[0]
+        today = datetime.date.today()
+        month = month_start(oldest.date() if oldest else today)
+        while month <= month_start(today, months_ahead):
+            create_partition(table, month)
+            month = month_start(month, 1)
+        create_default_partition(table)
+
+        cursor.execute(f'INSERT INTO {qn(table)} SELECT * FROM {qn(legacy)}')
+        # Dropping the old table frees its constraint, index and identity
+        # sequence names for the partitioned table.
+        cursor.execute(f'DROP TABLE {qn(legacy)}')
+
+        # Identity columns are not allowed on partitioned tables before
+        # PostgreSQL 17, so ids come from a plain sequence instead.
+        cursor.execute(f'CREATE SEQUENCE {qn(sequence)} OWNED BY {qn(table)}.{qn("id")}')
+        cursor.execute(
+            f"SELECT setval('{sequence}', COALESCE((SELECT MAX({qn('id')}) FROM {qn(table)}), 0) + 1, false)"
+        )
+        cursor.execute(
+            f'ALTER TABLE {qn(table)} ALTER COLUMN {qn("id")} '
+            f"SET DEFAULT nextval('{sequence}')"
+        )
+        # The partition key must be part of every unique constraint
+        cursor.execute(f'ALTER TABLE {qn(table)} ADD PRIMARY KEY ({qn("id")}, {qn("created_at")})')
+        cursor.execute(
+            f'ALTER TABLE {qn(table)} ADD FOREIGN KEY ({qn("user_id")}) '
+            f'REFERENCES {qn("users")} ({qn("id")}) DEFERRABLE INITIALLY DEFERRED'
+        )
+
+        # Recreate the model's indexes with the names Django expects. Each
+        # leads with user_id, so the foreign key needs no index of its own.
+        with connection.schema_editor(atomic=False) as editor:
+            for index in model._meta.indexes:
+                cursor.execute(str(index.create_sql(model, editor)))
+
+
+def archive_partition(name, archive_dir, batch_size=5000):
+    """Stream every row of partition ``name`` to ``<archive_dir>/<name>.jsonl.gz``."""
+    archive_dir = Path(archive_dir)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    path = archive_dir / f'{name}.jsonl.gz'
+    qn = connection.ops.quote_name
+    with transaction.atomic(), gzip.open(path, 'wt', encoding='utf-8') as output:
+        connection.ensure_connection()
+        # A named (server-side) cursor keeps memory flat for large partitions
+        with connection.connection.cursor(name=f'archive_{name}') as cursor:
+            cursor.itersize = batch_size
+            cursor.execute(f'SELECT row_to_json(t)::text FROM {qn(name)} t')
+            for (row,) in cursor:
+                output.write(row)
+                output.write('\n')
+    return path
+
+
+def drop_partition(table, name):
+    qn = connection.ops.quote_name
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}')
+        cursor.execute(f'DROP TABLE {qn(name)}')
+
+
+def expired_partitions(table, retain_months, today=None):
+    """Partitions whose whole month is older than ``retain_months``."""
+    cutoff = month_start(today or datetime.date.today(), -retain_months)
+    return [(name, month) for name, month in list_partitions(table) if month < cutoff]
+
+
+def retention_months(table):
+    return getattr(settings, PARTITIONED_TABLES[table][1])
@@ -1,18 +1,21 @@
+from django.conf import settings
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import Profile, Usage
+from memo_ai_backend.instrumentation import InstrumentedSerializerMixin
+from . import dashboard
+from .models import DashboardSummary, Profile, Usage
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'email', 'username', 'is_verified', 'created_at']
         read_only_fields = ['id', 'created_at']
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     
     class Meta:
@@ -21,9 +24,39 @@ class ProfileSerializer(serializers.ModelSerializer):
         read_only_fields = ['user', 'created_at', 'updated_at']
 
 
-class UsageSerializer(serializers.ModelSerializer):
+class UsageSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Usage
         fields = '__all__'
         read_only_fields = ['user', 'created_at']
 
+
+class DashboardSummarySerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
+    sessions = serializers.SerializerMethodField()
+    open_action_items = serializers.SerializerMethodField()
+    minutes_this_month = serializers.SerializerMethodField()
+    plan = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DashboardSummary
+        fields = ['sessions', 'open_action_items', 'minutes_this_month', 'plan', 'updated_at']
+
+    def get_sessions(self, obj):
+        by_status = {status: getattr(obj, field) for status, field in dashboard.SESSION_FIELDS.items()}
+        return {'total': sum(by_status.values()), 'by_status': by_status}
+
+    def get_open_action_items(self, obj):
+        by_priority = {priority: getattr(obj, field) for priority, field in dashboard.OPEN_ITEM_FIELDS.items()}
+        return {'total': sum(by_priority.values()), 'by_priority': by_priority}
+
+    def get_minutes_this_month(self, obj):
+        return round(obj.minutes(), 2)
+
+    def get_plan(self, obj):
+        plan = obj.effective_plan()
+        limits = settings.PLAN_LIMITS.get(plan, {})
+        return {
+            'name': plan,
+            'expires_at': obj.plan_expires_at if plan == obj.plan else None,
+            'minutes_per_month': limits.get('minutes_per_month'),
+        }
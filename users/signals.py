@@ -0,0 +1,20 @@
+"""
+Signal handlers for the users app.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import User
+from .token_cache import token_cache
+
+
+@receiver(post_save, sender=User)
+def invalidate_tokens_on_deactivation(sender, instance, **kwargs):
+    """Stop honouring cached tokens as soon as a user is deactivated."""
+    if not instance.is_active:
+        token_cache.invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_tokens_on_delete(sender, instance, **kwargs):
+    token_cache.invalidate_user(instance.pk)
@@ -0,0 +1,114 @@
+"""
+Process-wide Supabase client and pooled HTTP session.
+"""
+import asyncio
+import os
+import threading
+
+import httpx
+from django.conf import settings
+from supabase import Client, ClientOptions, create_client
+
+_lock = threading.Lock()
+_pid = None
+_http_client = None
+_client = None
+# Async clients are bound to the event loop that created them
+_async_clients = {}
+
+
+def _client_options():
+    return {
+        'timeout': httpx.Timeout(
+            settings.SUPABASE_HTTP_TIMEOUT,
+            connect=settings.SUPABASE_HTTP_CONNECT_TIMEOUT,
+        ),
+        'limits': httpx.Limits(
+            max_connections=settings.SUPABASE_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SUPABASE_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.SUPABASE_HTTP_KEEPALIVE_EXPIRY,
+        ),
+    }
+
+
+def _build_http_client():
+    return httpx.Client(**_client_options())
+
+
+def _ensure_process():
+    """
+    Drop clients inherited from a parent process.
+
+    Sockets are not safe to share across ``fork()`` (gunicorn preloading),
+    so each worker builds its own pool on first use.
+    """
+    global _pid, _http_client, _client
+    if _pid != os.getpid():
+        _pid = os.getpid()
+        _http_client = None
+        _client = None
+        _async_clients.clear()
+
+
+def get_http_client() -> httpx.Client:
+    """Return this worker's keep-alive HTTP client for Supabase calls."""
+    global _http_client
+    with _lock:
+        _ensure_process()
+        if _http_client is None:
+            _http_client = _build_http_client()
+        return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Return the keep-alive async HTTP client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        _ensure_process()
+        client = _async_clients.get(loop)
+        if client is None:
+            # Forget clients of loops that have since closed
+            for stale in [other for other in _async_clients if other.is_closed()]:
+                del _async_clients[stale]
+            client = _async_clients[loop] = httpx.AsyncClient(**_client_options())
+        return client
+
+
+def get_client() -> Client:
+    """Return this worker's Supabase client, creating it on first use."""
+    global _client
+    http_client = get_http_client()
+    with _lock:
+        if _client is None:
+            _client = create_client(
+                settings.SUPABASE_URL,
+                settings.SUPABASE_KEY,
+                options=ClientOptions(
+                    httpx_client=http_client,
+                    auto_refresh_token=False,
+                    persist_session=False,
+                    postgrest_client_timeout=settings.SUPABASE_HTTP_TIMEOUT,
+                ),
+            )
+        return _client
+
+
+def reset():
+    """Close and forget the cached clients (tests, settings changes)."""
+    global _http_client, _client
+    with _lock:
+        if _http_client is not None and _pid == os.getpid():
+            _http_client.close()
+        _http_client = None
+        _client = None
+        _async_clients.clear()
+
+
+def _after_fork_in_child():
+    global _lock
+    # The parent's lock may have been held mid-fork; start fresh.
+    _lock = threading.Lock()
+    _ensure_process()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,74 @@
+"""
+Change-detecting sync of Supabase identity claims onto local users.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+
+class UserSync:
+    """
+    Copies identity claims onto ``User`` rows only when they differ.
+
+    Only the changed columns (plus ``updated_at``) are written. When
+    ``interval`` is set, a user is compared at most once per ``interval``
+    seconds per process; requests in between skip the comparison too.
+    """
+    def __init__(self, interval=0, max_tracked=50000):
+        self.interval = interval
+        self.max_tracked = max_tracked
+        self._last_synced = {}
+        self._lock = threading.Lock()
+        self.writes = 0
+        self.skipped = 0
+
+    def sync(self, user, claims):
+        """
+        Apply ``claims`` (field name -> value) to ``user``.
+
+        ``None`` values mean the claim was not present in the token and are
+        ignored. Returns the list of fields written.
+        """
+        if not self._due(user.pk):
+            self._count(skipped=1)
+            return []
+
+        changed = []
+        for field, value in claims.items():
+            if value is not None and getattr(user, field) != value:
+                setattr(user, field, value)
+                changed.append(field)
+
+        if not changed:
+            self._count(skipped=1)
+            return []
+
+        user.save(update_fields=changed + ['updated_at'])
+        self._count(writes=1)
+        return changed
+
+    def _due(self, user_pk):
+        if not self.interval:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_synced.get(user_pk)
+            if last is not None and now - last < self.interval:
+                return False
+            if len(self._last_synced) >= self.max_tracked:
+                self._last_synced.clear()
+            self._last_synced[user_pk] = now
+            return True
+
+    def _count(self, writes=0, skipped=0):
+        with self._lock:
+            self.writes += writes
+            self.skipped += skipped
+
+    def stats(self):
+        with self._lock:
+            return {'writes': self.writes, 'skipped': self.skipped}
+
+
+user_sync = UserSync(interval=settings.SUPABASE_USER_SYNC_INTERVAL)
@@ -0,0 +1,579 @@
+import datetime
+import importlib.util
+import io
+import json
+import os
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.conf import settings
+from django.core.management import call_command
+from django.db import close_old_connections
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from rest_framework import exceptions
+from rest_framework.test import APIClient
+
+from sessions.models import ActionItem, RecordingSession
+from subscriptions import entitlements
+from subscriptions.models import Subscription
+
+from . import dashboard, metering, supabase_client
+from .authentication import SupabaseJWTAuthentication
+from .jwks import SigningKeyError, SupabaseKeyStore
+from .models import DashboardSummary, Profile, Usage, UsageMonthly, User
+from .sync import user_sync
+from .token_cache import TokenCache, token_cache
+
+SECRET = 'test-jwt-secret-of-at-least-32-bytes'
+
+
+def make_token(subject=None, key=SECRET, algorithm='HS256', headers=None, **claims):
+    payload = {
+        'sub': subject or str(uuid.uuid4()),
+        'aud': 'authenticated',
+        'exp': int(time.time()) + 3600,
+        'email': 'owner@example.com',
+        **claims,
+    }
+    return jwt.encode({k: v for k, v in payload.items() if v is not None}, key,
+                      algorithm=algorithm, headers=headers)
+
+
+def rsa_jwk(kid, alg='RS256'):
+    """A private key and the public JWK Supabase would publish for it."""
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    return private_key, {**jwk, 'kid': kid, 'alg': alg}
+
+
+class LocalAuthTestMixin:
+    """Verifies tokens in-process against ``self.store``."""
+    def setUp(self):
+        super().setUp()
+        self.store = SupabaseKeyStore(jwks_url='', secret=SECRET)
+        local = override_settings(SUPABASE_AUTH_MODE='local', SUPABASE_JWT_SECRET=SECRET)
+        local.enable()
+        self.addCleanup(local.disable)
+        key_store = mock.patch('users.authentication.get_key_store', return_value=self.store)
+        key_store.start()
+        self.addCleanup(key_store.stop)
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+
+    def authenticate(self, token):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return SupabaseJWTAuthentication().authenticate(request)
+
+
+class StubAuthHandler(BaseHTTPRequestHandler):
+    """Answers ``GET /auth/v1/user`` and records the client port of each request."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.ports.append(self.client_address[1])
+        body = json.dumps({
+            'id': '00000000-0000-0000-0000-000000000001',
+            'aud': 'authenticated',
+            'role': 'authenticated',
+            'email': 'stub@example.com',
+            'app_metadata': {},
+            'user_metadata': {},
+            'created_at': '2026-01-01T00:00:00Z',
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SupabaseClientTests(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubAuthHandler)
+        self.server.ports = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        settings = override_settings(SUPABASE_URL=f'http://127.0.0.1:{self.server.server_port}',
+                                     SUPABASE_KEY='stub.anon.key')
+        settings.enable()
+        self.addCleanup(settings.disable)
+        supabase_client.reset()
+        self.addCleanup(supabase_client.reset)
+
+    def test_calls_reuse_one_connection(self):
+        for _ in range(5):
+            response = supabase_client.get_client().auth.get_user('token')
+            self.assertEqual(response.user.email, 'stub@example.com')
+
+        self.assertEqual(len(self.server.ports), 5)
+        self.assertEqual(len(set(self.server.ports)), 1)
+
+    def test_client_is_shared(self):
+        self.assertIs(supabase_client.get_client(), supabase_client.get_client())
+        self.assertIs(supabase_client.get_http_client(), supabase_client.get_http_client())
+
+
+class LocalVerificationTests(LocalAuthTestMixin, TestCase):
+    def test_valid_token_creates_the_user(self):
+        subject = str(uuid.uuid4())
+        user, token = self.authenticate(make_token(subject, user_metadata={'email_verified': True}))
+        self.assertEqual(str(user.supabase_id), subject)
+        self.assertEqual(user.email, 'owner@example.com')
+        self.assertTrue(user.is_verified)
+
+    def test_rejected_tokens(self):
+        tokens = {
+            'expired': make_token(exp=int(time.time()) - 3600),
+            'bad signature': make_token(key=SECRET[::-1]),
+            'wrong audience': make_token(aud='anon'),
+            'no subject': make_token(sub=None),
+        }
+        for reason, token in tokens.items():
+            with self.subTest(reason), self.assertRaises(exceptions.AuthenticationFailed):
+                self.authenticate(token)
+        self.assertFalse(User.objects.exists())
+
+    def test_signing_algorithm_comes_from_the_jwk(self):
+        private_key, jwk = rsa_jwk('key-1', alg='RS256')
+        self.store._fetch = mock.Mock(return_value={'keys': [jwk]})
+
+        user, _ = self.authenticate(make_token(key=private_key, algorithm='RS256', headers={'kid': 'key-1'}))
+        self.assertEqual(user.email, 'owner@example.com')
+        # A header naming another algorithm does not get to choose it
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate(make_token(key=private_key, algorithm='RS512', headers={'kid': 'key-1'}))
+
+
+class UserSyncTests(LocalAuthTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.subject = str(uuid.uuid4())
+        self.user, _ = self.authenticate(make_token(self.subject))
+
+    def test_token_without_email_keeps_the_stored_email(self):
+        user, _ = self.authenticate(make_token(self.subject, email=None))
+        self.assertEqual(user.email, 'owner@example.com')
+        self.assertEqual(User.objects.get(pk=self.user.pk).email, 'owner@example.com')
+
+    def test_unchanged_claims_write_nothing(self):
+        writes = user_sync.stats()['writes']
+        with self.assertNumQueries(1):
+            self.authenticate(make_token(self.subject))
+        self.assertEqual(user_sync.stats()['writes'], writes)
+
+    def test_changed_claims_write_only_those_columns(self):
+        writes = user_sync.stats()['writes']
+        user, _ = self.authenticate(make_token(self.subject, email='renamed@example.com'))
+        self.assertEqual(User.objects.get(pk=user.pk).email, 'renamed@example.com')
+        self.assertEqual(user_sync.stats()['writes'], writes + 1)
+
+
+class KeyStoreTests(SimpleTestCase):
+    def test_unknown_kid_refetches_the_jwks(self):
+        old_key, old_jwk = rsa_jwk('old')
+        new_key, new_jwk = rsa_jwk('new')
+        store = SupabaseKeyStore(jwks_url='', min_refresh_interval=0)
+        store._fetch = mock.Mock(side_effect=[{'keys': [old_jwk]}, {'keys': [old_jwk, new_jwk]}])
+
+        store.get_key(make_token(key=old_key, algorithm='RS256', headers={'kid': 'old'}))
+        key, algorithm = store.get_key(make_token(key=new_key, algorithm='RS256', headers={'kid': 'new'}))
+        self.assertEqual(algorithm, 'RS256')
+        self.assertEqual(store._fetch.call_count, 2)
+        # Known keys are served from the cache
+        store.get_key(make_token(key=old_key, algorithm='RS256', headers={'kid': 'old'}))
+        self.assertEqual(store._fetch.call_count, 2)
+
+    def test_unknown_kid_refetches_at_most_once_per_interval(self):
+        _, jwk = rsa_jwk('known')
+        other_key, _ = rsa_jwk('unknown')
+        store = SupabaseKeyStore(jwks_url='', min_refresh_interval=30)
+        store._fetch = mock.Mock(return_value={'keys': [jwk]})
+
+        for _ in range(3):
+            with self.assertRaises(SigningKeyError):
+                store.get_key(make_token(key=other_key, algorithm='RS256', headers={'kid': 'unknown'}))
+        self.assertEqual(store._fetch.call_count, 1)
+
+    def test_hs256_without_a_secret_is_refused(self):
+        with self.assertRaises(SigningKeyError):
+            SupabaseKeyStore(jwks_url='').get_key(make_token())
+
+
+class AuthModeDefaultTests(SimpleTestCase):
+    def load_settings(self, **env):
+        spec = importlib.util.spec_from_file_location(
+            'settings_under_test', settings.BASE_DIR / 'memo_ai_backend' / 'settings.py',
+        )
+        module = importlib.util.module_from_spec(spec)
+        environ = {k: v for k, v in os.environ.items() if not k.startswith('SUPABASE_')}
+        with mock.patch.dict(os.environ, {**environ, **env}, clear=True), \
+                mock.patch('dotenv.load_dotenv'):
+            spec.loader.exec_module(module)
+        return module
+
+    def test_remote_without_a_secret(self):
+        self.assertEqual(self.load_settings().SUPABASE_AUTH_MODE, 'remote')
+
+    def test_local_with_a_secret(self):
+        self.assertEqual(self.load_settings(SUPABASE_JWT_SECRET=SECRET).SUPABASE_AUTH_MODE, 'local')
+
+    def test_explicit_mode_wins(self):
+        loaded = self.load_settings(SUPABASE_JWT_SECRET=SECRET, SUPABASE_AUTH_MODE='remote')
+        self.assertEqual(loaded.SUPABASE_AUTH_MODE, 'remote')
+
+
+class TokenCacheTests(SimpleTestCase):
+    @mock.patch('users.token_cache.time.time')
+    def test_entries_expire_at_exp_or_ttl_whichever_is_first(self, now):
+        now.return_value = 1000.0
+        cache = TokenCache(ttl=300)
+        cache.set('short', 1, exp=1100)
+        cache.set('long', 2, exp=5000)
+        cache.set('expired', 3, exp=1000)
+
+        now.return_value = 1099.0
+        self.assertEqual((cache.get('short'), cache.get('long')), (1, 2))
+        now.return_value = 1100.0
+        self.assertIsNone(cache.get('short'))
+        now.return_value = 1299.0
+        self.assertEqual(cache.get('long'), 2)
+        now.return_value = 1300.0
+        self.assertIsNone(cache.get('long'))
+        self.assertIsNone(cache.get('expired'))
+        self.assertEqual(cache.stats()['size'], 0)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = TokenCache(max_size=2)
+        exp = time.time() + 3600
+        cache.set('a', 1, exp)
+        cache.set('b', 2, exp)
+        self.assertEqual(cache.get('a'), 1)  # b is now the oldest
+        cache.set('c', 3, exp)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((cache.get('a'), cache.get('c')), (1, 3))
+        self.assertEqual(cache.stats(), {'size': 2, 'hits': 3, 'misses': 1, 'evictions': 1})
+
+    def test_invalidate_user_drops_all_their_tokens(self):
+        cache = TokenCache()
+        exp = time.time() + 3600
+        cache.set('a', 1, exp)
+        cache.set('b', 1, exp)
+        cache.set('c', 2, exp)
+        cache.invalidate_user(1)
+        self.assertEqual([cache.get(token) for token in 'abc'], [None, None, 2])
+
+
+class CachedTokenTests(LocalAuthTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.token = make_token()
+        self.user, _ = self.authenticate(self.token)
+
+    def test_deactivation_invalidates_cached_tokens(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(token_cache.get(self.token))
+
+    def test_delete_invalidates_cached_tokens(self):
+        self.user.delete()
+        self.assertIsNone(token_cache.get(self.token))
+
+    def test_other_saves_keep_cached_tokens(self):
+        self.user.first_name = 'Owner'
+        self.user.save()
+        self.assertEqual(token_cache.get(self.token), self.user.pk)
+
+    def test_cache_hit_rejects_an_inactive_user(self):
+        # Bypasses the post_save signal, as a write from another process would
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        with self.assertRaisesMessage(exceptions.AuthenticationFailed, 'inactive'):
+            self.authenticate(self.token)
+        self.assertIsNone(token_cache.get(self.token))
+
+    def test_cache_hit_costs_one_query(self):
+        with self.assertNumQueries(1):
+            user, _ = self.authenticate(self.token)
+        self.assertEqual(user, self.user)
+
+
+class UsageMeterTests(TransactionTestCase):
+    threads = 8
+    records_per_thread = 500
+
+    def test_concurrent_records_lose_no_increments(self):
+        users = [User.objects.create(username=f'user{i}', email=f'user{i}@example.com') for i in range(4)]
+        day = datetime.date(2026, 3, 14)
+        start = threading.Barrier(self.threads + 1)
+
+        def record():
+            start.wait()
+            for i in range(self.records_per_thread):
+                metering.record(users[i % len(users)], recordings=1, minutes=0.5, transcriptions=1, date=day)
+            close_old_connections()
+
+        # Buffered, with no background flushes: only the flushes below write
+        with mock.patch.object(metering.meter, 'flush_interval', 3600), \
+                mock.patch.object(metering.meter, 'max_pending', 10 ** 6):
+            workers = [threading.Thread(target=record) for _ in range(self.threads)]
+            for worker in workers:
+                worker.start()
+            start.wait()
+            # Flushing while the threads record swaps the buffer under them
+            while any(worker.is_alive() for worker in workers):
+                metering.flush()
+            for worker in workers:
+                worker.join()
+            metering.flush()
+
+        per_user = self.threads * self.records_per_thread // len(users)
+        for model in (Usage, UsageMonthly):
+            for row in model.objects.all():
+                with self.subTest(model=model.__name__, user=row.user_id):
+                    self.assertEqual(row.recordings_count, per_user)
+                    self.assertEqual(row.transcriptions_count, per_user)
+                    self.assertEqual(row.minutes_recorded, per_user * 0.5)
+            self.assertEqual(model.objects.count(), len(users))
+        self.assertEqual(metering.meter.stats()['pending_rows'], 0)
+
+
+class DashboardConsistencyTests(TestCase):
+    """Every incremental update leaves the summary equal to a rebuild."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='owner', email='owner@example.com')
+        cls.session = RecordingSession.objects.create(user=cls.user, title='Standup')
+        ActionItem.objects.bulk_create([
+            ActionItem(session=cls.session, user=cls.user, title='Low', priority='low'),
+            ActionItem(session=cls.session, user=cls.user, title='High', priority='high'),
+        ])
+
+    def setUp(self):
+        self.summary = dashboard.get_summary(self.user)
+
+    def assertConsistent(self, **expected):
+        stored = DashboardSummary.objects.get(user=self.user)
+        for name, value in expected.items():
+            self.assertEqual(getattr(stored, name), value, name)
+        fresh, corrected = dashboard.rebuild([self.user.pk])
+        self.assertEqual(corrected, 0)
+        self.assertEqual(dashboard._totals(fresh[self.user.pk]), dashboard._totals(stored))
+        output = io.StringIO()
+        call_command('reconcile_dashboards', stdout=output)
+        self.assertIn('corrected 0', output.getvalue())
+
+    def test_session_lifecycle(self):
+        self.assertConsistent(sessions_pending=1, open_items_low=1, open_items_high=1)
+        session = RecordingSession.objects.create(user=self.user, title='Retro')
+        self.assertConsistent(sessions_pending=2)
+        for status in ('recording', 'processing', 'completed'):
+            session.status = status
+            session.save()
+            self.assertConsistent(**{dashboard.SESSION_FIELDS[status]: 1, 'sessions_pending': 1})
+        session.delete()
+        self.assertConsistent(sessions_pending=1, sessions_completed=0)
+
+    def test_action_item_changes(self):
+        item = ActionItem.objects.create(session=self.session, user=self.user, title='New')
+        self.assertConsistent(open_items_medium=1)
+        item.priority = 'high'
+        item.save()
+        self.assertConsistent(open_items_medium=0, open_items_high=2)
+        item.status = 'in_progress'
+        item.save()
+        self.assertConsistent(open_items_high=2)
+        item.status = 'completed'
+        item.save()
+        self.assertConsistent(open_items_high=1)
+        item.status = 'pending'
+        item.save()
+        self.assertConsistent(open_items_high=2)
+        item.delete()
+        self.assertConsistent(open_items_high=1)
+
+    def test_bulk_item_updates(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        items = list(self.session.action_items.order_by('pk'))
+        response = client.patch('/api/sessions/action-items/bulk/', [
+            {'id': items[0].pk, 'priority': 'medium'},
+            {'id': items[1].pk, 'status': 'cancelled'},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertConsistent(open_items_low=0, open_items_medium=1, open_items_high=0)
+
+    def test_cascaded_session_delete_removes_its_open_items(self):
+        ActionItem.objects.create(session=self.session, user=self.user, title='Done', status='completed')
+        self.session.delete()
+        self.assertConsistent(sessions_pending=0, open_items_low=0, open_items_high=0)
+
+    def test_minutes_cross_a_month_boundary(self):
+        meter = metering.UsageMeter(flush_interval=0)
+        this_month = self.summary.month
+        last_month = (this_month - datetime.timedelta(days=1)).replace(day=1)
+        meter.record(self.user, minutes=30, date=last_month)
+        # Last month's minutes do not count towards this month's row
+        self.assertConsistent(month=this_month, minutes_this_month=0)
+
+        # A row still holding last month starts over with this month's minutes
+        DashboardSummary.objects.filter(user=self.user).update(month=last_month, minutes_this_month=30)
+        meter.record(self.user, minutes=12.5, date=this_month)
+        self.assertConsistent(month=this_month, minutes_this_month=12.5)
+        meter.record(self.user, minutes=2.5, date=this_month + datetime.timedelta(days=1))
+        self.assertConsistent(minutes_this_month=15)
+
+    def test_plan_changes(self):
+        subscription = Subscription.objects.create(user=self.user, plan='pro', status='active')
+        self.assertConsistent(plan='pro')
+        subscription.plan = 'enterprise'
+        subscription.save()
+        self.assertConsistent(plan='enterprise')
+        subscription.delete()
+        self.assertConsistent(plan=entitlements.FALLBACK_PLAN, plan_expires_at=None)
+
+
+class UsageSummaryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='owner', email='owner@example.com')
+        other = User.objects.create(username='other', email='other@example.com')
+        Usage.objects.bulk_create([
+            # Sunday, then Monday and Tuesday of the following ISO week
+            Usage(user=cls.user, date=datetime.date(2026, 1, 4),
+                  recordings_count=1, minutes_recorded=10.5, transcriptions_count=1),
+            Usage(user=cls.user, date=datetime.date(2026, 1, 5),
+                  recordings_count=2, minutes_recorded=20.25, transcriptions_count=0),
+            Usage(user=cls.user, date=datetime.date(2026, 1, 6),
+                  recordings_count=1, minutes_recorded=5, transcriptions_count=1),
+            Usage(user=cls.user, date=datetime.date(2026, 2, 1),
+                  recordings_count=3, minutes_recorded=30, transcriptions_count=2),
+            Usage(user=other, date=datetime.date(2026, 1, 5), recordings_count=100, minutes_recorded=100),
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def summary(self, **params):
+        return self.client.get('/api/users/usage/summary/', params)
+
+    def periods(self, response):
+        return [(row['period'], row['recordings'], row['minutes'], row['transcriptions'])
+                for row in response.data['results']]
+
+    def test_buckets(self):
+        expected = {
+            'day': [
+                (datetime.date(2026, 1, 4), 1, 10.5, 1),
+                (datetime.date(2026, 1, 5), 2, 20.25, 0),
+                (datetime.date(2026, 1, 6), 1, 5.0, 1),
+                (datetime.date(2026, 2, 1), 3, 30.0, 2),
+            ],
+            'week': [
+                (datetime.date(2025, 12, 29), 1, 10.5, 1),
+                (datetime.date(2026, 1, 5), 3, 25.25, 1),
+                (datetime.date(2026, 1, 26), 3, 30.0, 2),
+            ],
+            'month': [
+                (datetime.date(2026, 1, 1), 4, 35.75, 2),
+                (datetime.date(2026, 2, 1), 3, 30.0, 2),
+            ],
+        }
+        for bucket, periods in expected.items():
+            with self.subTest(bucket=bucket):
+                response = self.summary(bucket=bucket, **{'from': '2026-01-01', 'to': '2026-02-28'})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(self.periods(response), periods)
+                self.assertEqual(response.data['totals'], {'recordings': 7, 'minutes': 65.75, 'transcriptions': 4})
+
+    def test_from_and_to_are_inclusive(self):
+        response = self.summary(**{'from': '2026-01-05', 'to': '2026-01-06'})
+        self.assertEqual([row[0] for row in self.periods(response)],
+                         [datetime.date(2026, 1, 5), datetime.date(2026, 1, 6)])
+        self.assertEqual((response.data['from'], response.data['to']),
+                         (datetime.date(2026, 1, 5), datetime.date(2026, 1, 6)))
+
+    @override_settings(USAGE_SUMMARY_MAX_DAYS=31)
+    def test_range_limit(self):
+        self.assertEqual(self.summary(**{'from': '2026-01-01', 'to': '2026-01-31'}).status_code, 200)
+        self.assertEqual(self.summary(**{'from': '2026-01-01', 'to': '2026-02-01'}).status_code, 400)
+
+    def test_bad_parameters_are_rejected(self):
+        for params in (
+            {'from': '2026-02-01', 'to': '2026-01-01'},
+            {'from': '2026-13-01'},
+            {'to': 'yesterday'},
+            {'bucket': 'year'},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.summary(**params).status_code, 400)
+
+
+class RebuildUsageRollupsTests(TestCase):
+    def test_rebuild_matches_the_rollup_the_meter_kept(self):
+        users = [User.objects.create(username=f'user{i}', email=f'user{i}@example.com') for i in range(2)]
+        meter = metering.UsageMeter(flush_interval=0)
+        for day in (datetime.date(2026, 1, 30), datetime.date(2026, 1, 31), datetime.date(2026, 2, 1)):
+            for i, user in enumerate(users):
+                meter.record(user, recordings=1, minutes=2.5 * (i + 1), transcriptions=i, date=day)
+        columns = ('user_id', 'month', 'recordings_count', 'minutes_recorded', 'transcriptions_count')
+        kept = list(UsageMonthly.objects.order_by('user_id', 'month').values_list(*columns))
+        self.assertEqual(len(kept), 4)
+
+        UsageMonthly.objects.filter(user=users[0]).update(minutes_recorded=0)
+        UsageMonthly.objects.filter(user=users[1], month=datetime.date(2026, 2, 1)).delete()
+        call_command('rebuild_usage_rollups', stdout=io.StringIO())
+        self.assertEqual(list(UsageMonthly.objects.order_by('user_id', 'month').values_list(*columns)), kept)
+
+        # --user leaves the other users' rows alone
+        UsageMonthly.objects.filter(user=users[1]).update(recordings_count=0)
+        call_command('rebuild_usage_rollups', user=[users[0].pk], stdout=io.StringIO())
+        self.assertFalse(UsageMonthly.objects.filter(user=users[1]).exclude(recordings_count=0).exists())
+        self.assertEqual(
+            list(UsageMonthly.objects.filter(user=users[0]).order_by('month').values_list(*columns)), kept[:2],
+        )
+
+
+# QueryBudgetExceeded fails the request when a view runs more queries than
+# its query_budget allows
+@override_settings(QUERY_INSPECTION=True, QUERY_BUDGET_STRICT=True, AUDIT_LOG_SYNC=True)
+class UserQueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='owner', email='owner@example.com')
+        cls.profile = Profile.objects.create(user=cls.user, first_name='Owner')
+        Usage.objects.bulk_create([
+            Usage(user=cls.user, date=datetime.date(2026, 1, 1) + datetime.timedelta(days=i), minutes_recorded=5)
+            for i in range(25)
+        ])
+        cls.usage = Usage.objects.filter(user=cls.user).first()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_reads_stay_within_budget(self):
+        for url in (
+            '/api/users/me/',
+            # The first request builds the summary row, the second reads it
+            '/api/users/dashboard/',
+            '/api/users/dashboard/',
+            '/api/users/profiles/',
+            f'/api/users/profiles/{self.profile.pk}/',
+            '/api/users/usage/',
+            f'/api/users/usage/{self.usage.pk}/',
+            '/api/users/usage/summary/?from=2026-01-01&to=2026-12-31&bucket=week',
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
@@ -0,0 +1,101 @@
+"""
+Per-process cache of verified bearer tokens.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class TokenCache:
+    """
+    Bounded LRU map from a token hash to the primary key of its ``User``.
+
+    Entries never outlive the token's ``exp`` claim, and are capped at
+    ``ttl`` seconds so a revoked session stops working reasonably soon.
+    Raw tokens are never stored, only their SHA-256 digest.
+    """
+    def __init__(self, max_size=10000, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token):
+        """Return the cached user primary key for ``token``, or ``None``."""
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            user_pk, expires_at = entry
+            if expires_at <= time.time():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return user_pk
+
+    def set(self, token, user_pk, exp):
+        """Cache ``user_pk`` for ``token`` until ``exp`` (epoch seconds)."""
+        if self.max_size <= 0:
+            return
+        expires_at = min(exp, time.time() + self.ttl)
+        if expires_at <= time.time():
+            return
+        key = self._key(token)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (user_pk, expires_at)
+            self._keys_by_user.setdefault(user_pk, set()).add(key)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate_user(self, user_pk):
+        """Drop every cached token belonging to ``user_pk``."""
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_pk, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def _remove(self, key):
+        user_pk, _ = self._entries.pop(key)
+        keys = self._keys_by_user.get(user_pk)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user_pk]
+
+
+token_cache = TokenCache(
+    max_size=settings.SUPABASE_TOKEN_CACHE_SIZE,
+    ttl=settings.SUPABASE_TOKEN_CACHE_TTL,
+)
@@ -1,5 +1,7 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from memo_ai_backend.async_views import async_view
 from . import views
 
 router = DefaultRouter()
@@ -9,5 +11,11 @@ router.register(r'usage', views.UsageViewSet)
 urlpatterns = [
     path('', include(router.urls)),
     path('me/', views.CurrentUserView.as_view(), name='current-user'),
+    path('dashboard/', views.DashboardView.as_view(), name='dashboard'),
 ]
 
+if settings.ASYNC_VIEWS:
+    urlpatterns = [
+        path('me/', async_view(views.CurrentUserView), name='current-user'),
+    ] + urlpatterns
+
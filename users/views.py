@@ -1,38 +1,134 @@
+import datetime
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db.models import DateField, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from memo_ai_backend.conditional import (
+    ConditionalGetMixin, make_etag, not_modified, set_validators, user_validators
+)
+from memo_ai_backend.instrumentation import InstrumentedViewMixin
+from memo_ai_backend.pagination import DateCursorPagination
+from . import dashboard
 from .models import Profile, Usage
-from .serializers import UserSerializer, ProfileSerializer, UsageSerializer
+from .serializers import DashboardSummarySerializer, UserSerializer, ProfileSerializer, UsageSerializer
 
 User = get_user_model()
 
 
-class CurrentUserView(APIView):
+class CurrentUserView(InstrumentedViewMixin, APIView):
     """Get current authenticated user."""
+    query_budget = 0
+
     def get(self, request):
-        serializer = UserSerializer(request.user)
-        return Response(serializer.data)
+        etag, last_modified = user_validators(request)
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            response = Response(UserSerializer(request.user).data)
+        return set_validators(response, etag, last_modified)
+
 
+class DashboardView(InstrumentedViewMixin, APIView):
+    """Home screen totals, read from the user's precomputed summary row."""
+    # One row read; the first request per user also builds the row
+    query_budget = 9
+
+    def get(self, request):
+        summary = dashboard.get_summary(request.user)
+        data = DashboardSummarySerializer(summary).data
+        # The month and plan shown also depend on the date, not just the row
+        etag = make_etag(request.user.pk, summary.updated_at.isoformat(),
+                         data['minutes_this_month'], data['plan']['name'])
+        response = not_modified(request, etag, summary.updated_at)
+        if response is None:
+            response = Response(data)
+        return set_validators(response, etag, summary.updated_at)
 
-class ProfileViewSet(viewsets.ModelViewSet):
+
+class ProfileViewSet(InstrumentedViewMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """Profile management."""
     serializer_class = ProfileSerializer
     queryset = Profile.objects.all()
+    query_budget = {'list': 3, 'retrieve': 2}
     
     def get_queryset(self):
-        return Profile.objects.filter(user=self.request.user)
+        return Profile.objects.filter(user=self.request.user).select_related('user')
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
-class UsageViewSet(viewsets.ReadOnlyModelViewSet):
+class UsageViewSet(InstrumentedViewMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """User usage statistics."""
     serializer_class = UsageSerializer
     queryset = Usage.objects.all()
+    pagination_class = DateCursorPagination
+    query_budget = {'list': 2, 'retrieve': 2, 'summary': 1}
+    # Counters are incremented in place without a timestamp, so their
+    # totals are part of the validators.
+    conditional_field = 'created_at'
+    conditional_aggregates = {
+        'recordings': Sum('recordings_count'),
+        'minutes': Sum('minutes_recorded'),
+        'transcriptions': Sum('transcriptions_count'),
+    }
     
     def get_queryset(self):
         return Usage.objects.filter(user=self.request.user)
+    
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """
+        Usage totals per ``bucket`` (``day``, ``week`` or ``month``) between
+        the inclusive ``from`` and ``to`` dates (default: the last 30 days),
+        computed with one ``GROUP BY``. Periods without usage are omitted.
+        """
+        bucket = request.query_params.get('bucket', 'day')
+        if bucket not in ('day', 'week', 'month'):
+            return Response({'detail': 'bucket must be day, week or month'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            end = _query_date(request, 'to') or timezone.localdate()
+            start = _query_date(request, 'from') or end - datetime.timedelta(days=29)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if start > end:
+            return Response({'detail': '"from" must not be after "to"'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if (end - start).days >= settings.USAGE_SUMMARY_MAX_DAYS:
+            return Response({'detail': f'Ranges are limited to {settings.USAGE_SUMMARY_MAX_DAYS} days'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        rows = list(
+            Usage.objects.filter(user=request.user, date__range=(start, end))
+            .annotate(period=Trunc('date', bucket, output_field=DateField()))
+            .values('period')
+            .annotate(
+                recordings=Sum('recordings_count'),
+                minutes=Sum('minutes_recorded'),
+                transcriptions=Sum('transcriptions_count'),
+            )
+            .order_by('period')
+        )
+        totals = {'recordings': 0, 'minutes': 0.0, 'transcriptions': 0}
+        for row in rows:
+            row['minutes'] = round(row['minutes'], 2)
+            for name in totals:
+                totals[name] += row[name]
+        totals['minutes'] = round(totals['minutes'], 2)
+        return Response({'from': start, 'to': end, 'bucket': bucket, 'totals': totals, 'results': rows})
+
 
+def _query_date(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'"{name}" must be a date (YYYY-MM-DD)')
@@ -20,7 +20,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'memo_ai_backend.settings')
 django.setup()
 
 from django.conf import settings
-from supabase import create_client, Client
+from users.supabase_client import get_client
 from psycopg2 import connect, OperationalError
 
 
@@ -37,7 +37,7 @@ def verify_supabase_client():
         return False
     
     try:
-        supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+        get_client()
         print("SUCCESS: Supabase client created successfully")
         print(f"URL: {settings.SUPABASE_URL}")
         return True